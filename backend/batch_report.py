@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import logging
+import argparse
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import report_gen
+from section_cache import SECTION_CACHE_DIR, artifact_digest
+from instrumentation import get_logger, configure_logging
+
+# Offline re-analysis of saved acquisitions.
+#
+#   python batch_report.py /evidence/acquisitions --formats docx html --workers 8
+#
+# Every folder under the root that holds at least one artifact named as in
+# report_gen.log_files is one acquisition. Reports are built in a process
+# pool, one acquisition per worker, into <folder>/report (or the same
+# relative path under --output-dir). A stamp file beside the outputs records
+# the artifact sizes, mtimes and digests plus the parser versions they were
+# built with; folders whose stamp still matches are skipped. The run ends
+# with batch_summary.json covering every acquisition.
+
+REPORT_SUBDIR = "report"
+STAMP_NAME = "batch_stamp.json"
+SUMMARY_NAME = "batch_summary.json"
+
+logger = get_logger("batch")
+
+
+def find_acquisitions(root):
+    """Folders under `root` (including itself) containing any report artifact, sorted."""
+    artifact_names = set(report_gen.log_files.values())
+    found = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d != REPORT_SUBDIR)
+        if artifact_names.intersection(files):
+            found.append(folder)
+    return found
+
+
+def _load_stamp(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(path, stamp):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, indent=2)
+
+
+def _artifact_states(folder, previous):
+    """
+    {filename: {size, mtime_ns, sha256}} for the folder's artifacts. Digests
+    from the previous stamp are reused while size and mtime are unchanged.
+    """
+    states = {}
+    for filename in sorted(set(report_gen.log_files.values())):
+        path = os.path.join(folder, filename)
+        if not os.path.isfile(path):
+            continue
+        st = os.stat(path)
+        old = previous.get(filename, {})
+        if old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns and old.get("sha256"):
+            digest = old["sha256"]
+        else:
+            digest = report_gen.get_artifact_digest(filename, folder)
+        states[filename] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    return states
+
+
+def process_acquisition(folder, output_dir, formats, force=False, cache_dir=SECTION_CACHE_DIR):
+    """Builds one acquisition's report unless it is up to date. Runs in a worker."""
+    started = time.perf_counter()
+    result = {"folder": folder, "output_dir": output_dir, "status": None, "outputs": [],
+              "seconds": None, "totals": None, "error": None}
+    try:
+        stamp_path = os.path.join(output_dir, STAMP_NAME)
+        stamp = _load_stamp(stamp_path)
+        states = _artifact_states(folder, stamp.get("artifacts", {}))
+        empty = artifact_digest(b"")
+        digests = {
+            section: states.get(report_gen.log_files[section], {}).get("sha256", empty)
+            for section, _, _ in report_gen.report_sections
+        }
+        key = artifact_digest(f"{report_gen.report_input_key(digests)}\0{','.join(formats)}")
+
+        outputs = [os.path.join(output_dir, f"Preliminary_Forensic_Report.{fmt}") for fmt in formats]
+        if not force and stamp.get("key") == key and all(os.path.exists(p) for p in outputs):
+            result.update(status="skipped", outputs=outputs, totals=stamp.get("totals"))
+            if states != stamp.get("artifacts"):
+                # Touched but unchanged files: record the new mtimes so they are not hashed again
+                _write_stamp(stamp_path, dict(stamp, artifacts=states))
+            return result
+
+        report_gen.generate_forensic_report(
+            output_dir=output_dir, max_workers=1, cache_dir=cache_dir, digests=digests,
+            formats=formats, artifact_dir=folder,
+        )
+        timings = _load_stamp(os.path.join(output_dir, "Preliminary_Forensic_Report.timings.json"))
+        result.update(status="built", outputs=outputs, totals=timings.get("totals"))
+        _write_stamp(stamp_path, {
+            "key": key,
+            "formats": list(formats),
+            "artifacts": states,
+            "totals": result["totals"],
+            "built_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+    except Exception as e:
+        logger.exception("Report for %s failed", folder)
+        result.update(status="failed", error=str(e))
+    finally:
+        result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(root, output_root=None, formats=("docx",), workers=None, force=False,
+              cache_dir=SECTION_CACHE_DIR):
+    """Processes every acquisition under `root` and writes the aggregate run summary."""
+    started_at = datetime.datetime.now()
+    started = time.perf_counter()
+    root = os.path.abspath(root)
+    folders = find_acquisitions(root)
+    summary_dir = os.path.abspath(output_root) if output_root else root
+    logger.info("Found %d acquisition folder(s) under %s", len(folders), root)
+
+    def output_dir_for(folder):
+        if output_root:
+            return os.path.normpath(os.path.join(summary_dir, os.path.relpath(folder, root)))
+        return os.path.join(folder, REPORT_SUBDIR)
+
+    results = []
+    if folders:
+        workers = workers or min(len(folders), os.cpu_count() or 1)
+        level = logging.getLevelName(logger.getEffectiveLevel())
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=configure_logging,
+                                 initargs=(level,)) as pool:
+            futures = [
+                pool.submit(process_acquisition, folder, output_dir_for(folder), tuple(formats), force, cache_dir)
+                for folder in folders
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                results.append(result)
+                logger.info("[%d/%d] %s %s (%.1f s)", done, len(folders), result["status"],
+                            result["folder"], result["seconds"])
+
+    results.sort(key=lambda r: r["folder"])
+    counts = {status: sum(r["status"] == status for r in results) for status in ("built", "skipped", "failed")}
+    built_totals = [r["totals"] for r in results if r["status"] == "built" and r["totals"]]
+    summary = {
+        "root": root,
+        "formats": list(formats),
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "wall_s": round(time.perf_counter() - started, 3),
+        "counts": counts,
+        "built_totals": {
+            name: round(sum(t.get(name) or 0 for t in built_totals), 4)
+            for name in ("input_bytes", "records", "parse_s", "render_s")
+        },
+        "acquisitions": results,
+    }
+    os.makedirs(summary_dir, exist_ok=True)
+    summary_path = os.path.join(summary_dir, SUMMARY_NAME)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    logger.info("Batch finished: %d built, %d skipped, %d failed in %.1f s. Summary: %s",
+                counts["built"], counts["skipped"], counts["failed"], summary["wall_s"], summary_path)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build preliminary reports for saved acquisition folders.")
+    parser.add_argument("root", help="directory tree of acquisition folders")
+    parser.add_argument("--output-dir", help="write reports under this directory instead of <folder>/report")
+    parser.add_argument("--formats", nargs="+", default=["docx"], choices=sorted(report_gen.REPORT_FORMATS))
+    parser.add_argument("--workers", type=int, help="parallel acquisitions (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rebuild reports even when up to date")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the section cache")
+    parser.add_argument("--log-level", help="DEBUG, INFO, WARNING, ... (default: REPORT_LOG_LEVEL or INFO)")
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    summary = run_batch(
+        args.root, args.output_dir, formats=args.formats, workers=args.workers, force=args.force,
+        cache_dir=None if args.no_cache else SECTION_CACHE_DIR,
+    )
+    return 1 if summary["counts"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
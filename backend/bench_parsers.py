@@ -0,0 +1,213 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import functools
+import tracemalloc
+import numpy as np
+import pandas as pd
+import docx
+
+import report_gen
+import synthetic_dumps
+
+# Benchmarks the report parsers on synthetic dumps of increasing size.
+#
+#   python bench_parsers.py                         # 0.25, 1 and 4 MB inputs
+#   python bench_parsers.py --sizes 1 16 64 --repeat 5
+#   python bench_parsers.py --compare bench_results/<earlier run>.json
+#
+# For every parser and size it records the best wall time over --repeat runs,
+# throughput (MB/s), peak traced memory (tracemalloc, measured in a separate
+# run so tracing does not skew the timings) and the number of records
+# produced. The scaling exponent is the slope of log(time) over log(size):
+# ~1.0 is linear. add_dataframe_to_doc is measured the same way over table
+# row counts. Results are written as JSON so runs can be compared.
+
+BENCH_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results")
+DEFAULT_SIZES_MB = [0.25, 1, 4]
+DEFAULT_DOC_ROWS = [100, 1000, 5000]
+
+
+def _count_records(result):
+    """Number of rows a parser produced, whatever shape it returns."""
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(_count_records(value) for value in result.values())
+    if isinstance(result, (tuple, list)):
+        return sum(_count_records(value) for value in result)
+    return 0
+
+
+def _bluetooth_uncached(text):
+    # Draw the chart every run so repeats are not served from the chart cache
+    render = report_gen.render_bar_chart
+    report_gen.render_bar_chart = functools.partial(render, cache_dir=None)
+    try:
+        return report_gen.parse_bluetooth_log(text)
+    finally:
+        report_gen.render_bar_chart = render
+
+
+# name -> (generator key, parser taking the dump text)
+PARSERS = {
+    "parse_account_info": ("account", report_gen.parse_account_info),
+    "parse_wifi_log_extended": ("wifi", report_gen.parse_wifi_log_extended),
+    "extract_sensor_data": ("sensor", report_gen.extract_sensor_data),
+    "extract_ip_info": ("ip", report_gen.extract_ip_info),
+    "get_location_text": ("location", report_gen.get_location_text),
+    "parse_bluetooth_log": ("bluetooth", _bluetooth_uncached),
+}
+
+
+def measure(func, arg, repeat):
+    """Returns (best_seconds, peak_bytes, result) for func(arg)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def scaling_exponent(sizes, seconds):
+    """Slope of log(seconds) against log(size); None with fewer than two usable points."""
+    points = [(s, t) for s, t in zip(sizes, seconds) if s > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+    return round(float(np.polyfit(x, y, 1)[0]), 3)
+
+
+def bench_parsers(names, sizes_mb, repeat, seed):
+    results = {}
+    for name in names:
+        kind, parser = PARSERS[name]
+        points = []
+        for size_mb in sizes_mb:
+            text = synthetic_dumps.GENERATORS[kind](int(size_mb * 1024 * 1024), seed=seed)
+            input_mb = len(text.encode("utf-8")) / (1024 * 1024)
+            seconds, peak, result = measure(parser, text, repeat)
+            points.append({
+                "input_mb": round(input_mb, 3),
+                "lines": text.count("\n"),
+                "seconds": round(seconds, 4),
+                "mb_per_s": round(input_mb / seconds, 2) if seconds else None,
+                "peak_mb": round(peak / (1024 * 1024), 2),
+                "records": _count_records(result),
+            })
+            print(f"  {name:<26} {input_mb:8.2f} MB {seconds:8.3f} s {points[-1]['mb_per_s']:8.2f} MB/s "
+                  f"peak {points[-1]['peak_mb']:8.2f} MB  {points[-1]['records']} records")
+        results[name] = {
+            "points": points,
+            "scaling_exponent": scaling_exponent([p["input_mb"] for p in points], [p["seconds"] for p in points]),
+        }
+    return results
+
+
+def _add_table(rows_df):
+    doc = docx.Document()
+    report_gen.add_dataframe_to_doc(doc, rows_df, "Benchmark Table")
+    return doc
+
+
+def bench_add_dataframe_to_doc(row_counts, repeat, seed):
+    rng = np.random.default_rng(seed)
+    points = []
+    for rows in row_counts:
+        df = pd.DataFrame({
+            "timestamp": pd.date_range("2025-03-08", periods=rows, freq="s").astype(str),
+            "provider": rng.choice(["gps", "network", "fused"], rows),
+            "latitude": rng.uniform(12.9, 13.0, rows).round(6),
+            "longitude": rng.uniform(77.5, 77.6, rows).round(6),
+            "accuracy": rng.uniform(3, 60, rows).round(1),
+        })
+        seconds, peak, _ = measure(_add_table, df, repeat)
+        points.append({
+            "rows": rows,
+            "cells": rows * df.shape[1],
+            "seconds": round(seconds, 4),
+            "rows_per_s": round(rows / seconds, 1) if seconds else None,
+            "peak_mb": round(peak / (1024 * 1024), 2),
+        })
+        print(f"  {'add_dataframe_to_doc':<26} {rows:8d} rows {seconds:8.3f} s "
+              f"{points[-1]['rows_per_s']:10.1f} rows/s peak {points[-1]['peak_mb']:8.2f} MB")
+    return {
+        "points": points,
+        "scaling_exponent": scaling_exponent(row_counts, [p["seconds"] for p in points]),
+    }
+
+
+def compare(current, previous):
+    """Prints per-benchmark speedups of `current` over `previous` (matched by position)."""
+    print(f"\nCompared with {previous.get('created_at', '?')}:")
+    for name, bench in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if not old:
+            continue
+        for new_point, old_point in zip(bench["points"], old["points"]):
+            if new_point["seconds"] and old_point["seconds"]:
+                label = new_point.get("input_mb", new_point.get("rows"))
+                print(f"  {name:<26} {label!s:>8}: {old_point['seconds'] / new_point['seconds']:6.2f}x "
+                      f"({old_point['seconds']:.3f} s -> {new_point['seconds']:.3f} s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the forensic report parsers on synthetic dumps.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES_MB, help="input sizes in MB")
+    parser.add_argument("--doc-rows", type=int, nargs="+", default=DEFAULT_DOC_ROWS,
+                        help="table row counts for add_dataframe_to_doc")
+    parser.add_argument("--parsers", nargs="+", choices=sorted(PARSERS), default=list(PARSERS))
+    parser.add_argument("--skip-doc", action="store_true", help="do not benchmark add_dataframe_to_doc")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per point (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results JSON path (default: bench_results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    created_at = datetime.datetime.now()
+    print("Parsers:")
+    results = bench_parsers(args.parsers, args.sizes, args.repeat, args.seed)
+    if not args.skip_doc:
+        print("Report rendering:")
+        results["add_dataframe_to_doc"] = bench_add_dataframe_to_doc(args.doc_rows, args.repeat, args.seed)
+
+    run = {
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sizes_mb": args.sizes,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    output = args.output or os.path.join(BENCH_RESULTS_DIR, f"bench-{created_at:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(run, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
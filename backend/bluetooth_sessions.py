@@ -0,0 +1,205 @@
+import re
+import datetime
+import pandas as pd
+
+# Single-pass reconstruction of Bluetooth connection sessions from
+# `dumpsys bluetooth_manager` output.
+#
+# Every line is looked at once. Timestamped lines that name a device (MAC)
+# and a connection state drive a small state machine keyed by (MAC, profile):
+# CONNECTED opens a session, DISCONNECTED closes it. Only the open sessions
+# are held while scanning, never the dump text. Lines under a "Bonded
+# devices:" header (or tagged "(Connected)") are collected as bonded devices.
+
+SESSION_COLUMNS = ["MAC Address", "Device Name", "Profile", "Start", "End", "Duration (min)"]
+DAILY_COLUMNS = ["Date", "Connections", "Disconnections", "Devices", "Connected (min)"]
+DEVICE_COLUMNS = ["MAC Address", "Device Name", "Sessions", "Profiles", "First Seen", "Last Seen", "Connected (min)"]
+BONDED_COLUMNS = ["Device Name", "MAC Address", "Connected"]
+
+# Recent Android versions mask the leading octets as XX
+MAC_RE = re.compile(r'([0-9A-Fa-fXx]{2}(?::[0-9A-Fa-fXx]{2}){5})(?![0-9A-Fa-f]|:[0-9A-Fa-f]{2})')
+TIME_RE = re.compile(
+    r'(?:(?P<date>\d{4}-\d{2}-\d{2})|(?P<md>\d{2}-\d{2}))[ T](?P<time>\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)'
+)
+# BluetoothProfile numeric states, e.g. "state 0 -> 2"
+NUMERIC_STATE_RE = re.compile(r'\b[Ss]tate\b\D{0,16}?\d\s*->\s*(\d)\b')
+NUMERIC_STATES = {"0": "DISCONNECTED", "1": "CONNECTING", "2": "CONNECTED", "3": "DISCONNECTING"}
+PROFILES = [
+    (re.compile(r'A2dp|A2DP'), "A2DP"),
+    (re.compile(r'Headset|HFP|HeadsetClient'), "HFP"),
+    (re.compile(r'HearingAid|Hearing Aid|ASHA'), "Hearing Aid"),
+    (re.compile(r'LeAudio|LE Audio|LE_AUDIO'), "LE Audio"),
+    (re.compile(r'HidHost|HidDevice|\bHID\b'), "HID"),
+    (re.compile(r'PanService|\bPAN\b'), "PAN"),
+    (re.compile(r'Gatt|GATT'), "GATT"),
+    (re.compile(r'Avrcp|AVRCP'), "AVRCP"),
+    (re.compile(r'Pbap|PBAP'), "PBAP"),
+    (re.compile(r'\bACL(?![A-Za-z])|Acl'), "ACL"),
+]
+BONDED_HEADER_RE = re.compile(r'^\s*Bonded devices\s*:', re.I)
+BONDED_ENTRY_RE = re.compile(r'^\s*(?P<connected>\(Connected\)\s*)?(?P<mac>(?:[0-9A-Fa-fXx]{2}:){5}[0-9A-Fa-fXx]{2})\s*(?P<rest>.*)$')
+
+
+def _profile(line):
+    for pattern, name in PROFILES:
+        if pattern.search(line):
+            return name
+    return "Unknown"
+
+
+def _state(line):
+    """
+    Connection state named on a line. The last one wins, so
+    "DISCONNECTED->CONNECTED" is a connect. Plain str searches are used here
+    because this runs on every line that carries a MAC.
+    """
+    upper = line.upper()
+    connected, connecting = upper.rfind("CONNECTED"), upper.rfind("CONNECTING")
+    if connected < 0 and connecting < 0:
+        m = NUMERIC_STATE_RE.search(line)
+        return NUMERIC_STATES.get(m.group(1)) if m else None
+    if connecting > connected:
+        return "CONNECTING"
+    return "DISCONNECTED" if upper.endswith("DIS", 0, connected) else "CONNECTED"
+
+
+def _timestamp(m, year):
+    date = m.group("date") or f"{year}-{m.group('md')}"
+    try:
+        return datetime.datetime.fromisoformat(f"{date} {m.group('time')}")
+    except ValueError:
+        return None
+
+
+def _bonded_name(rest):
+    """Name after the "[ DUAL ][ 0x240404 ]" type/class brackets."""
+    name = rest.rsplit("]", 1)[-1] if "]" in rest else rest
+    return name.split("(", 1)[0].strip()
+
+
+def _add_bonded(bonded, entry):
+    """Records a BONDED_ENTRY_RE match; returns False for lines that are not bonded-device entries."""
+    if not entry or "[" not in entry.group("rest"):
+        return False
+    mac = entry.group("mac").upper()
+    name, connected = bonded.get(mac, ["", False])
+    bonded[mac] = [name or _bonded_name(entry.group("rest")), connected or bool(entry.group("connected"))]
+    return True
+
+
+def _minutes(start, end):
+    if start is None or end is None or end < start:
+        return None
+    return round((end - start).total_seconds() / 60.0, 2)
+
+
+def parse_bluetooth_sessions(source, year=None, bonded_lines=None):
+    """
+    Rebuilds Bluetooth connection sessions from `dumpsys bluetooth_manager`.
+
+    `source` is the dump text or an iterable of its lines; `MM-DD` stamps get
+    `year` (default current year). Returns a dict of DataFrames:
+      sessions - one row per connection (SESSION_COLUMNS); sessions still
+                 open at the end of the dump have no End
+      daily    - per-day connection counts and connected time (DAILY_COLUMNS)
+      devices  - per-device totals (DEVICE_COLUMNS)
+      bonded   - bonded devices (BONDED_COLUMNS)
+    `bonded_lines`, when given, are the lines of the already located
+    "Bonded devices" section(s) and `source` is then only scanned for events.
+    """
+    year = year or datetime.datetime.now().year
+    lines = source.splitlines() if isinstance(source, str) else source
+
+    open_sessions = {}   # (mac, profile) -> start time
+    sessions = []        # (mac, profile, start, end)
+    daily = {}           # date -> [connections, disconnections, set of macs]
+    bonded = {}          # mac -> [name, connected]
+    in_bonded = False
+    find_bonded = bonded_lines is None
+    if not find_bonded:
+        for line in bonded_lines:
+            _add_bonded(bonded, BONDED_ENTRY_RE.match(line))
+
+    for line in lines:
+        if find_bonded:
+            if BONDED_HEADER_RE.match(line):
+                in_bonded = True
+                continue
+            entry = BONDED_ENTRY_RE.match(line) if (in_bonded or "(Connected)" in line) else None
+            if _add_bonded(bonded, entry):
+                continue
+            in_bonded = False
+
+        mac = MAC_RE.search(line)
+        if not mac:
+            continue
+        state = _state(line)
+        if state not in ("CONNECTED", "DISCONNECTED"):
+            continue
+        # Timestamps normally lead the line; fall back to a full search
+        m = TIME_RE.match(line.lstrip()) or TIME_RE.search(line)
+        when = _timestamp(m, year) if m else None
+        if when is None:
+            continue
+
+        mac = mac.group(1).upper()
+        key = (mac, _profile(line))
+        day = daily.setdefault(when.date(), [0, 0, set()])
+        day[2].add(mac)
+        if state == "CONNECTED":
+            day[0] += 1
+            # Repeated CONNECTED lines keep the earliest start
+            open_sessions.setdefault(key, when)
+        else:
+            day[1] += 1
+            start = open_sessions.pop(key, None)
+            if start is not None:
+                sessions.append((mac, key[1], start, when))
+
+    for (mac, profile), start in open_sessions.items():
+        sessions.append((mac, profile, start, None))
+
+    names = {mac: name for mac, (name, _) in bonded.items()}
+    sessions_df = pd.DataFrame(
+        [
+            (mac, names.get(mac, ""), profile, start, end, _minutes(start, end))
+            for mac, profile, start, end in sorted(sessions, key=lambda s: (s[2], s[0]))
+        ],
+        columns=SESSION_COLUMNS,
+    )
+    sessions_df["Start"] = pd.to_datetime(sessions_df["Start"])
+    sessions_df["End"] = pd.to_datetime(sessions_df["End"])
+    sessions_df["Duration (min)"] = sessions_df["Duration (min)"].astype("float64")
+
+    connected_by_day = (
+        sessions_df.groupby(sessions_df["Start"].dt.date)["Duration (min)"].sum()
+        if not sessions_df.empty else {}
+    )
+    daily_df = pd.DataFrame(
+        [
+            (day.strftime("%m-%d"), c, d, len(macs), round(float(connected_by_day.get(day, 0.0)), 2))
+            for day, (c, d, macs) in sorted(daily.items())
+        ],
+        columns=DAILY_COLUMNS,
+    )
+
+    if sessions_df.empty:
+        devices_df = pd.DataFrame(columns=DEVICE_COLUMNS)
+    else:
+        grouped = sessions_df.groupby("MAC Address", sort=False)
+        devices_df = pd.DataFrame({
+            "Sessions": grouped.size(),
+            "Profiles": grouped["Profile"].agg(lambda p: ", ".join(sorted(set(p)))),
+            "First Seen": grouped["Start"].min(),
+            "Last Seen": pd.concat([grouped["Start"].max(), grouped["End"].max()], axis=1).max(axis=1),
+            "Connected (min)": grouped["Duration (min)"].sum().round(2),
+        }).reset_index()
+        devices_df.insert(1, "Device Name", devices_df["MAC Address"].map(names).fillna(""))
+        devices_df = devices_df.sort_values("Connected (min)", ascending=False)[DEVICE_COLUMNS].reset_index(drop=True)
+
+    bonded_df = pd.DataFrame(
+        [(name, mac, connected) for mac, (name, connected) in bonded.items()],
+        columns=BONDED_COLUMNS,
+    )
+
+    return {"sessions": sessions_df, "daily": daily_df, "devices": devices_df, "bonded": bonded_df}
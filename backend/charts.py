@@ -0,0 +1,143 @@
+import os
+import io
+import json
+import hashlib
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from instrumentation import get_logger
+
+# Charts are drawn with the object-oriented Agg API only: no pyplot state is
+# touched, so rendering is safe inside worker processes and never writes
+# intermediate files. Rendered PNGs are cached on disk by content hash.
+
+CHART_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chart_cache")
+# Bump when the drawing code changes so cached images are redrawn
+CHART_VERSION = 2
+
+logger = get_logger("charts")
+
+
+def chart_key(kind, series, params):
+    """Returns a sha256 hex key for a chart from its input series and parameters."""
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([CHART_VERSION, kind, params], sort_keys=True, default=str).encode("utf-8"))
+    for values in series:
+        arr = np.asarray(values)
+        if arr.dtype.kind in "OUS":
+            hasher.update(json.dumps([str(v) for v in arr.tolist()]).encode("utf-8"))
+        else:
+            hasher.update(arr.dtype.str.encode("ascii"))
+            hasher.update(np.ascontiguousarray(arr).tobytes())
+    return hasher.hexdigest()
+
+
+def _load_cached(cache_dir, key):
+    if not cache_dir:
+        return None
+    try:
+        with open(os.path.join(cache_dir, f"{key}.png"), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store_cached(cache_dir, key, png):
+    """Writes a cached chart atomically so concurrent workers never see partial files."""
+    if not cache_dir:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f"{key}.png")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache chart %s: %s", key, e)
+
+
+def _figure_to_png(fig, tight=False):
+    buf = io.BytesIO()
+    FigureCanvasAgg(fig)
+    fig.savefig(buf, format="png", bbox_inches="tight" if tight else None)
+    return buf.getvalue()
+
+
+def render_bar_chart(labels, values, title, xlabel, ylabel, figsize=(10, 6),
+                     color="skyblue", rotation=45, ha="center", grid=False,
+                     tight=False, max_labels=None, cache_dir=CHART_CACHE_DIR):
+    """
+    Renders a bar chart and returns it as PNG bytes. With `max_labels`, only
+    every n-th bar is labelled so that at most that many labels are drawn.
+    Identical inputs return the cached image without redrawing.
+    """
+    labels = [str(label) for label in labels]
+    values = np.asarray(values, dtype="float64")
+    params = {
+        "title": title, "xlabel": xlabel, "ylabel": ylabel, "figsize": list(figsize),
+        "color": color, "rotation": rotation, "ha": ha, "grid": grid, "tight": tight,
+        "max_labels": max_labels,
+    }
+    key = chart_key("bar", [labels, values], params)
+    cached = _load_cached(cache_dir, key)
+    if cached is not None:
+        return cached
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    positions = np.arange(len(labels))
+    ax.bar(positions, values, color=color)
+    step = max(1, -(-len(labels) // max_labels)) if max_labels else 1
+    ax.set_xticks(positions[::step])
+    ax.set_xticklabels(labels[::step])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.tick_params(axis="x", labelrotation=rotation)
+    for tick in ax.get_xticklabels():
+        tick.set_horizontalalignment(ha)
+    if grid:
+        ax.grid(axis="y", linestyle="--", alpha=0.7)
+    fig.tight_layout()
+
+    png = _figure_to_png(fig, tight=tight)
+    _store_cached(cache_dir, key, png)
+    return png
+
+
+def render_line_chart(lines, title, xlabel, ylabel, figsize=(10, 4), grid=True,
+                      tight=False, cache_dir=CHART_CACHE_DIR):
+    """
+    Renders one or more line series and returns PNG bytes.
+    `lines` maps a legend label to its (x, y) arrays; callers downsample
+    long series first (timeseries.lttb) so drawing cost stays bounded.
+    """
+    labels = list(lines)
+    series = [labels]
+    for label in labels:
+        series.extend(lines[label])
+    params = {"title": title, "xlabel": xlabel, "ylabel": ylabel, "figsize": list(figsize),
+              "grid": grid, "tight": tight}
+    key = chart_key("line", series, params)
+    cached = _load_cached(cache_dir, key)
+    if cached is not None:
+        return cached
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    for label in labels:
+        x, y = lines[label]
+        ax.plot(x, y, linewidth=1, label=str(label))
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    if len(labels) > 1:
+        ax.legend(loc="best", fontsize="small")
+    if grid:
+        ax.grid(linestyle="--", alpha=0.5)
+    fig.tight_layout()
+
+    png = _figure_to_png(fig, tight=tight)
+    _store_cached(cache_dir, key, png)
+    return png
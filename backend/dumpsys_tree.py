@@ -0,0 +1,269 @@
+import re
+from fnmatch import fnmatchcase
+
+# `dumpsys` output is an indentation-structured tree:
+#
+#   WifiConfigManager - Log Begin ----
+#     Configured networks:
+#       ID: 0 SSID: "HomeNet" ...
+#
+# SectionTree indexes that structure in one linear pass over the dump text.
+# A line becomes a section when the next non-blank line is indented deeper
+# (or when it ends with ":"). Sections are stored as offsets into the
+# original text in flat lists, so building the tree copies no strings;
+# names and bodies are sliced only when a query asks for them.
+#
+# The text may also be a bytes buffer, typically an mmap of the artifact
+# spooled to disk, so a large dump is indexed without ever being held as a
+# Python str. Slices are decoded as UTF-8 when read, and section lines are
+# produced one at a time; an optional raw-bytes `line_filter` drops lines
+# before they are decoded, like report_gen's streaming filters.
+#
+# Paths are "a > b > c": each step matches a descendant section (at any
+# depth, nearest first) whose name starts with the step, case-insensitively.
+# A step containing shell wildcards ("*ClientModeImpl*", "* provider") must
+# match the whole name instead.
+
+INDENT_RE = re.compile(r"[ \t]*")
+INDENT_BYTES_RE = re.compile(rb"[ \t]*")
+
+
+class Section:
+    """A view of one section of a SectionTree."""
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    def __repr__(self):
+        return f"Section({self.name!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Section) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    @property
+    def name(self):
+        return self.tree.name(self.index)
+
+    @property
+    def header(self):
+        """The section's own header line, stripped."""
+        tree = self.tree
+        return tree.slice(tree.starts[self.index], tree.header_ends[self.index]).strip()
+
+    @property
+    def span(self):
+        """(start, end) offsets of the section body in the dump text."""
+        return self.tree.body_span(self.index)
+
+    @property
+    def children(self):
+        return [Section(self.tree, child) for child in self.tree.children[self.index]]
+
+    def text(self):
+        return self.tree.slice(*self.span)
+
+    def lines(self, exclude=()):
+        """Body lines (nested sections included), skipping the sections in `exclude`."""
+        return self.tree.lines_between(*self.span, exclude=exclude)
+
+    def find(self, path):
+        return self.tree.find(path, within=self)
+
+    def find_one(self, path):
+        found = self.find(path)
+        return found[0] if found else None
+
+
+class SectionTree:
+    """
+    Section index over `dumpsys` text (str, or a bytes-like buffer such as
+    an mmap). `root_name` names the whole dump (usually the service, e.g.
+    "wifi") so paths may start with it. `line_filter`, for bytes buffers,
+    receives each raw line and can drop it from lines() before decoding.
+    """
+
+    def __init__(self, text, root_name="", line_filter=None):
+        self.text = text
+        self.root_name = root_name
+        self.is_bytes = not isinstance(text, str)
+        self.line_filter = line_filter if self.is_bytes else None
+        # Flat per-section arrays; index 0 is the root (the whole dump)
+        self.starts = [0]           # header line start
+        self.header_ends = [0]      # header line end (before the newline)
+        self.ends = [len(text)]     # end of the section body
+        self.indents = [-1]
+        self.parents = [-1]
+        self.children = [[]]
+        self._parse()
+
+    def _add(self, start, header_end, indent, parent):
+        index = len(self.starts)
+        self.starts.append(start)
+        self.header_ends.append(header_end)
+        self.ends.append(header_end)
+        self.indents.append(indent)
+        self.parents.append(parent)
+        self.children.append([])
+        self.children[parent].append(index)
+        return index
+
+    def slice(self, start, end):
+        """text[start:end] as str."""
+        if self.is_bytes:
+            return self.text[start:end].decode("utf-8", errors="ignore")
+        return self.text[start:end]
+
+    def _parse(self):
+        text = self.text
+        n = len(text)
+        indents = self.indents
+        ends = self.ends
+        stack = [0]
+        prev = None  # (start, end, indent, ends_with_colon) of the previous non-blank line
+        pos = 0
+        if self.is_bytes:
+            newline_char, cr, colon, tab, indent_re = b"\n", b"\r", b":", b"\t", INDENT_BYTES_RE
+        else:
+            newline_char, cr, colon, tab, indent_re = "\n", "\r", ":", "\t", INDENT_RE
+        while pos < n:
+            newline = text.find(newline_char, pos)
+            if newline < 0:
+                newline = n
+            # One-character slices compare alike for str and bytes buffers
+            line_end = newline - 1 if newline > pos and text[newline - 1:newline] == cr else newline
+            body = indent_re.match(text, pos, line_end).end()
+            if body < line_end:
+                indent = body - pos
+                if body > pos:
+                    indent += 7 * text[pos:body].count(tab)
+                if prev is not None:
+                    p_start, p_end, p_indent, p_colon = prev
+                    if indent > p_indent:
+                        stack.append(self._add(p_start, p_end, p_indent, stack[-1]))
+                    elif p_colon:
+                        self._add(p_start, p_end, p_indent, stack[-1])
+                while indents[stack[-1]] >= indent:
+                    ends[stack.pop()] = pos
+                prev = (pos, line_end, indent, text[line_end - 1:line_end] == colon)
+            pos = newline + 1
+        if prev is not None and prev[3]:
+            self._add(prev[0], prev[1], prev[2], stack[-1])
+        for index in stack:
+            ends[index] = n
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    @property
+    def root(self):
+        return Section(self, 0)
+
+    def name(self, index):
+        if index == 0:
+            return self.root_name
+        return self.slice(self.starts[index], self.header_ends[index]).strip().rstrip(":").strip()
+
+    def body_span(self, index):
+        if index == 0:
+            return 0, self.ends[0]
+        end = self.ends[index]
+        return min(self.header_ends[index] + 1, end), end
+
+    def lines_between(self, start, end, exclude=()):
+        """Lines of text[start:end] with the spans of `exclude` sections cut out."""
+        cut = sorted((self.starts[s.index], self.ends[s.index]) for s in exclude)
+        pos = start
+        for cut_start, cut_end in cut:
+            if cut_end <= pos or cut_start >= end:
+                continue
+            yield from self._lines(pos, max(pos, cut_start))
+            pos = max(pos, cut_end)
+        if pos < end:
+            yield from self._lines(pos, end)
+
+    def _lines(self, start, end):
+        if not self.is_bytes:
+            yield from self.text[start:end].splitlines()
+            return
+        # One line at a time, so a large span is never decoded as a whole
+        text, line_filter = self.text, self.line_filter
+        pos = start
+        while pos < end:
+            newline = text.find(b"\n", pos, end)
+            if newline < 0:
+                newline = end
+            raw = text[pos:newline].rstrip(b"\r")
+            if line_filter is None or line_filter(raw):
+                yield raw.decode("utf-8", errors="ignore")
+            pos = newline + 1
+
+    @staticmethod
+    def _pattern(step):
+        step = step.strip().lower()
+        return step if any(c in step for c in "*?[") else step + "*"
+
+    def _descendants_matching(self, index, pattern, found):
+        for child in self.children[index]:
+            if fnmatchcase(self.name(child).lower(), pattern):
+                found.append(child)
+            else:
+                self._descendants_matching(child, pattern, found)
+
+    def find(self, path, within=None):
+        """All sections matching `path` below `within` (default: the root), in dump order."""
+        steps = [step for step in path.split(">") if step.strip()]
+        current = [within.index if within is not None else 0]
+        if (
+            steps and current == [0] and self.root_name
+            and fnmatchcase(self.root_name.lower(), self._pattern(steps[0]))
+        ):
+            steps = steps[1:]
+        for step in steps:
+            pattern = self._pattern(step)
+            found = []
+            for index in current:
+                self._descendants_matching(index, pattern, found)
+            current = sorted(set(found))
+            if not current:
+                break
+        return [Section(self, index) for index in current]
+
+    def find_one(self, path):
+        found = self.find(path)
+        return found[0] if found else None
+
+    def select(self, *paths):
+        """Sections matching any of `paths`, outermost only (nested matches are dropped)."""
+        indexes = sorted({s.index for path in paths for s in self.find(path)})
+        selected = []
+        for index in indexes:
+            if selected and self.starts[index] < self.ends[selected[-1]]:
+                continue
+            selected.append(index)
+        return [Section(self, index) for index in selected]
+
+    def select_lines(self, *paths, fallback=True):
+        """
+        Lines of every section matching `paths`. When nothing matches and
+        `fallback` is set, all lines of the dump are returned instead, so an
+        unfamiliar layout degrades to a full scan rather than to no data.
+        """
+        sections = self.select(*paths)
+        if not sections:
+            return self.root.lines() if fallback else iter(())
+        return (line for section in sections for line in section.lines())
+
+
+def as_section_tree(source, root_name=""):
+    """Builds a SectionTree from dump text or an iterable of its lines (trees pass through)."""
+    if isinstance(source, SectionTree):
+        return source
+    if not isinstance(source, str):
+        source = "\n".join(source)
+    return SectionTree(source, root_name)
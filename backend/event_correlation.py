@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from event_histogram import device_timezone
+from timeline_store import TIMELINE_DB, EVENT_COLUMNS, TimelineStore, alexa_events
+from instrumentation import get_logger, configure_logging
+
+# Correlates Alexa voice interactions with device events.
+#
+#   python event_correlation.py matched_audio_transcripts.json --window 300 --k 3
+#
+# Alexa interactions come from matched_audio_transcripts.json (times parsed
+# with generateAudioReport.parse_timestamp, via timeline_store.alexa_events);
+# device events are read from the timeline store for the span the
+# interactions cover, widened by the window. Both streams are sorted once
+# and joined in a single pass: three np.searchsorted calls over the sorted
+# device times give, for every interaction, the first event of its window,
+# the event after its window and its insertion point. The k nearest events
+# of an interaction are then among the k events either side of its
+# insertion point, so only (interactions x 2k) candidates are ever compared,
+# never every pair.
+
+DEFAULT_WINDOW_S = 300
+DEFAULT_K = 3
+DEVICE_SOURCES = ("bluetooth", "wifi", "location")
+
+logger = get_logger("correlation")
+
+
+def nearest_events(query_ms, event_ms, window_ms, k=DEFAULT_K):
+    """
+    For sorted int64 `query_ms` and sorted int64 `event_ms`, the indexes of
+    the k events nearest each query within +/- `window_ms`, as an (n, k)
+    array ordered nearest first and padded with -1, and the number of
+    events inside each query's window.
+    """
+    query_ms = np.asarray(query_ms, dtype=np.int64)
+    event_ms = np.asarray(event_ms, dtype=np.int64)
+    if len(event_ms) == 0 or k <= 0:
+        return np.full((len(query_ms), max(k, 0)), -1, dtype=np.int64), np.zeros(len(query_ms), dtype=np.int64)
+    lo = np.searchsorted(event_ms, query_ms - window_ms, side="left")
+    hi = np.searchsorted(event_ms, query_ms + window_ms, side="right")
+    pos = np.searchsorted(event_ms, query_ms, side="left")
+
+    candidates = pos[:, None] + np.arange(-k, k)
+    inside = (candidates >= lo[:, None]) & (candidates < hi[:, None])
+    distance = np.abs(event_ms[np.clip(candidates, 0, len(event_ms) - 1)] - query_ms[:, None])
+    distance = np.where(inside, distance, np.iinfo(np.int64).max)
+    # Stable, so of two equally distant events the earlier one ranks first
+    order = np.argsort(distance, axis=1, kind="stable")[:, :k]
+    nearest = np.take_along_axis(candidates, order, axis=1)
+    nearest[~np.take_along_axis(inside, order, axis=1)] = -1
+    return nearest, hi - lo
+
+
+def correlate(queries, events, window_s=DEFAULT_WINDOW_S, k=DEFAULT_K):
+    """
+    Joins two event frames with a `ts_ms` column (UTC epoch ms, any order).
+    Returns one row per (query, matched event): the query's columns
+    prefixed "query_", the event's prefixed "event_", the event's `rank`
+    (1 = nearest), `offset_s` (event time minus query time) and
+    `in_window` (events within the window of that query).
+    """
+    start = time.perf_counter()
+    q_order = np.argsort(queries["ts_ms"].to_numpy(dtype=np.int64), kind="stable")
+    e_order = np.argsort(events["ts_ms"].to_numpy(dtype=np.int64), kind="stable")
+    q_sorted = queries.iloc[q_order].reset_index(drop=True)
+    e_sorted = events.iloc[e_order].reset_index(drop=True)
+    q_ms = q_sorted["ts_ms"].to_numpy(dtype=np.int64)
+    e_ms = e_sorted["ts_ms"].to_numpy(dtype=np.int64)
+    nearest, in_window = nearest_events(q_ms, e_ms, int(window_s * 1000), k)
+
+    q_rows, ranks = np.nonzero(nearest >= 0)
+    e_rows = nearest[q_rows, ranks]
+    pairs = pd.concat([
+        q_sorted.iloc[q_rows].add_prefix("query_").reset_index(drop=True),
+        e_sorted.iloc[e_rows].add_prefix("event_").reset_index(drop=True),
+    ], axis=1)
+    pairs["rank"] = ranks + 1
+    pairs["offset_s"] = (e_ms[e_rows] - q_ms[q_rows]) / 1000
+    pairs["in_window"] = in_window[q_rows]
+    logger.info("Correlated %d queries with %d events (window %gs, k=%d): %d pairs in %.3f s",
+                len(queries), len(events), window_s, k, len(pairs), time.perf_counter() - start)
+    return pairs
+
+
+def correlate_alexa(matched, store, window_s=DEFAULT_WINDOW_S, k=DEFAULT_K, sources=DEVICE_SOURCES, tz=None):
+    """
+    The k device events nearest each Alexa interaction in `matched`
+    (matched_audio_transcripts.json content), read from the timeline
+    `store` restricted to `sources`; see correlate. Alexa times are wall
+    times of `tz`.
+    """
+    alexa = pd.DataFrame(list(alexa_events(matched, tz)), columns=EVENT_COLUMNS)
+    if alexa.empty:
+        return correlate(alexa, alexa, window_s, k)
+    window_ms = int(window_s * 1000)
+    device = store.query(
+        since=int(alexa["ts_ms"].min()) - window_ms, until=int(alexa["ts_ms"].max()) + window_ms + 1,
+        sources=list(sources),
+    ).drop(columns="time")
+    return correlate(alexa, device, window_s, k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correlate Alexa interactions with device events.")
+    parser.add_argument("matched", help="matched_audio_transcripts.json")
+    parser.add_argument("--db", default=TIMELINE_DB, help="timeline database path")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_S, help="seconds either side")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="nearest events per interaction")
+    parser.add_argument("--source", action="append", help=f"device sources (default {', '.join(DEVICE_SOURCES)})")
+    parser.add_argument("--props", help="device_properties.txt giving the timezone of Alexa times")
+    parser.add_argument("--output", help="write the pairs as CSV instead of printing them")
+    parser.add_argument("--log-level", default=None)
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    tz = None
+    if args.props and os.path.exists(args.props):
+        with open(args.props, "r", encoding="utf-8", errors="ignore") as f:
+            tz = device_timezone(f.read())
+    with open(args.matched, "r", encoding="utf-8") as f:
+        matched = json.load(f)
+    with TimelineStore(args.db) as store:
+        pairs = correlate_alexa(matched, store, args.window, args.k, args.source or DEVICE_SOURCES, tz)
+    if args.output:
+        pairs.to_csv(args.output, index=False)
+        print(f"{len(pairs)} pairs written to {args.output}")
+        return
+    columns = ["query_summary", "rank", "offset_s", "event_source", "event_type", "event_summary"]
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 60):
+        print(pairs[columns].to_string(index=False) if len(pairs) else "No device events within the window.")
+
+
+if __name__ == "__main__":
+    main()
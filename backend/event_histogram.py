@@ -0,0 +1,140 @@
+import re
+import datetime
+import zoneinfo
+import numpy as np
+import pandas as pd
+
+from logcat_parser import DAYS_BEFORE_MONTH, MS_PER_DAY
+from instrumentation import get_logger
+
+# Event-count histograms over logcat timestamps.
+#
+# logcat prints the device's wall-clock time without a year. The yearless
+# `ts` values from logcat_parser are turned into datetime64 once: every
+# entry gets the acquisition year, except entries that would then lie after
+# the acquisition, which must come from the year before (the capture is a
+# ring buffer of what happened up to the moment it was pulled). Wall times
+# are then placed in the device timezone (persist.sys.timezone from
+# device_properties.txt) and counted with np.bincount in minute, hour or
+# day buckets of the display timezone, the device's by default.
+
+GRANULARITY_MS = {"minute": 60_000, "hour": 3_600_000, "day": MS_PER_DAY}
+DEFAULT_MAX_BARS = 240
+# Entries up to this far past the acquisition time are clock skew, not last year
+FUTURE_TOLERANCE_MS = MS_PER_DAY
+
+GETPROP_RE = re.compile(r"^\[([^\]]+)\]:\s*\[(.*)\]\s*$")
+
+logger = get_logger("event_histogram")
+
+
+def parse_getprop(text):
+    """{property: value} from `adb shell getprop` output."""
+    props = {}
+    for line in text.splitlines():
+        m = GETPROP_RE.match(line.strip())
+        if m:
+            props[m.group(1)] = m.group(2)
+    return props
+
+
+def device_timezone(props_text):
+    """The device's ZoneInfo from device_properties.txt text, or None if absent or unknown."""
+    name = parse_getprop(props_text).get("persist.sys.timezone", "").strip()
+    if not name:
+        return None
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown device timezone %r; using wall-clock times as they are", name)
+        return None
+
+
+def _wall_times(ts, years):
+    """datetime64[ms] wall times of yearless `ts` values in the given years."""
+    doy = ts // MS_PER_DAY
+    month0 = np.searchsorted(DAYS_BEFORE_MONTH, doy, side="right") - 1
+    day0 = doy - DAYS_BEFORE_MONTH[month0]
+    months = ((years - 1970) * 12 + month0).astype("datetime64[M]")
+    # Feb 29 in a non-leap year rolls over to Mar 1
+    return (months.astype("datetime64[D]") + day0).astype("datetime64[ms]") + (ts % MS_PER_DAY).astype("timedelta64[ms]")
+
+
+def infer_wall_times(ts, acquired_at):
+    """
+    datetime64[ms] device wall times for yearless logcat `ts` values.
+    `acquired_at` is the device wall time of the acquisition (naive
+    datetime or datetime64); it supplies the year.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    acquired = np.datetime64(acquired_at, "ms")
+    year = acquired.astype("datetime64[Y]").astype(np.int64) + 1970
+    years = np.full(len(ts), year, dtype=np.int64)
+    wall = _wall_times(ts, years)
+    future = wall > acquired + np.timedelta64(FUTURE_TOLERANCE_MS, "ms")
+    if future.any():
+        years[future] -= 1
+        wall[future] = _wall_times(ts[future], years[future])
+    return wall
+
+
+def to_instants(wall, tz):
+    """
+    Device wall times -> UTC datetime64[ms] in timezone `tz` (None: taken
+    as UTC). In the repeated hour when clocks go back, standard time is assumed.
+    """
+    if tz is None:
+        return wall
+    index = pd.DatetimeIndex(wall).tz_localize(tz, ambiguous=np.zeros(len(wall), dtype=bool),
+                                               nonexistent="shift_forward")
+    return index.tz_convert("UTC").tz_localize(None).to_numpy().astype("datetime64[ms]")
+
+
+def choose_granularity(span_ms, max_bars=DEFAULT_MAX_BARS):
+    """The finest granularity whose bucket count over `span_ms` fits in `max_bars`."""
+    for name, size in GRANULARITY_MS.items():
+        if span_ms // size + 1 <= max_bars:
+            return name
+    return "day"
+
+
+def event_histogram(ts, acquired_at, tz=None, granularity="auto", display_tz=None, max_bars=DEFAULT_MAX_BARS):
+    """
+    Counts logcat events per bucket. Returns (counts, granularity) where
+    counts is a Series of event counts indexed by bucket start (tz-aware
+    when a timezone is known), including empty buckets.
+
+    `ts` are yearless logcat_parser timestamps, `tz` the device timezone and
+    `acquired_at` the acquisition time: a tz-aware datetime, or a naive one
+    in device wall time. Buckets follow `display_tz` (default: `tz`).
+    `granularity` is "minute", "hour", "day" or "auto" (the finest that
+    fits in `max_bars` buckets).
+    """
+    if isinstance(acquired_at, datetime.datetime) and acquired_at.tzinfo is not None:
+        acquired_at = acquired_at.astimezone(tz or datetime.timezone.utc).replace(tzinfo=None)
+    display_tz = display_tz or tz
+    instants = to_instants(infer_wall_times(ts, acquired_at), tz)
+    if display_tz is not None:
+        local = pd.DatetimeIndex(instants).tz_localize("UTC").tz_convert(display_tz).tz_localize(None)
+        ms = local.to_numpy().astype("datetime64[ms]").astype(np.int64)
+    else:
+        ms = instants.astype(np.int64)
+    if len(ms) == 0:
+        return pd.Series([], dtype=np.int64), (granularity if granularity != "auto" else "hour")
+
+    if granularity == "auto":
+        granularity = choose_granularity(int(ms.max() - ms.min()), max_bars)
+    size = GRANULARITY_MS[granularity]
+    first = ms.min() // size
+    counts = np.bincount(ms // size - first)
+    starts = pd.DatetimeIndex((np.arange(len(counts)) + first) * size * 1_000_000)
+    if display_tz is not None:
+        starts = starts.tz_localize(display_tz, ambiguous=np.zeros(len(starts), dtype=bool),
+                                    nonexistent="shift_forward")
+    return pd.Series(counts, index=starts, name="events"), granularity
+
+
+def bucket_labels(index, granularity):
+    """Bar labels for histogram bucket starts."""
+    fmt = {"minute": "%m-%d %H:%M", "hour": "%m-%d %H:00", "day": "%Y-%m-%d"}[granularity]
+    return [start.strftime(fmt) for start in index]
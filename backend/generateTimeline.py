@@ -1,105 +1,128 @@
 import os
-import re
+import io
 import json
 import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import docx
 from docx.shared import Pt, Inches
-from collections import defaultdict
+from charts import render_bar_chart
+from logcat_parser import parse_logcat
+from event_histogram import device_timezone, event_histogram, bucket_labels
+from shealth_export import load_health_export, merged_daily_rows
+from shealth_binning import decode_daily_binning, daily_profile
 
 # -----------------------------------------------
 # Graph Generation Functions
 # -----------------------------------------------
-def plot_steps_per_day(filepath, doc):
+def plot_steps_per_day(daily_trend, doc):
     """
-    Reads a CSV file (skipping the first row), processes it to aggregate total steps per day,
-    plots a bar chart, saves the chart as an image, and appends it to the Word document.
+    Aggregates total steps per day from the Samsung Health daily step trend
+    (shealth_export "step_daily_trend" frame), plots a bar chart and
+    appends it to the Word document.
     """
-    # Read CSV, skipping the first row (metadata)
-    df = pd.read_csv(filepath, skiprows=1)
-    
-    # Rename columns for clarity
-    df.columns = ["binning_data", "update_time", "create_time", "source_pkg_name", "source_type",
-                  "count", "speed", "distance", "calorie", "deviceuuid", "pkg_name", "datauuid", "day_time"]
-    
-    # Convert 'datauuid' (milliseconds) to a datetime format
-    df["datauuid"] = pd.to_datetime(df["datauuid"], unit="ms", errors='coerce')
-    df = df.dropna(subset=["datauuid"])
-    
-    # Extract the date part for aggregation
-    df["date"] = df["datauuid"].dt.date
+    # Merged rows only, so steps are not counted once per device as well
+    df = merged_daily_rows(daily_trend.dropna(subset=["day"]))
     
     # Aggregate total steps per day
-    daily_steps = df.groupby("date")["count"].sum()
+    daily_steps = df.groupby(df["day"].dt.date)["count"].sum()
     
     if daily_steps.empty:
         print("No valid data found for plotting steps per day.")
         return
     
-    plt.figure(figsize=(12, 6))
-    plt.bar(daily_steps.index.astype(str), daily_steps.values, color="skyblue")
-    plt.xlabel("Date")
-    plt.ylabel("Total Steps")
-    plt.title("Steps Per Day Trend")
-    plt.xticks(rotation=45)
-    plt.grid(axis="y", linestyle="--", alpha=0.7)
-    
-    steps_image_path = "steps_per_day.png"
-    plt.savefig(steps_image_path, bbox_inches='tight')
-    plt.close()
+    steps_chart = render_bar_chart(
+        daily_steps.index.astype(str), daily_steps.values,
+        title="Steps Per Day Trend",
+        xlabel="Date",
+        ylabel="Total Steps",
+        figsize=(12, 6),
+        grid=True,
+        tight=True,
+        max_labels=48,
+    )
     
     # Append the steps chart to the document
     doc.add_paragraph("Steps Per Day Trend", style="Heading2")
-    doc.add_picture(steps_image_path, width=Inches(6))
+    doc.add_picture(io.BytesIO(steps_chart), width=Inches(6))
     doc.add_paragraph("\n")
 
-def count_events_by_day_hour(filepath):
+def plot_intraday_steps(decoded, doc):
     """
-    Reads a log file and counts the number of log entries per day and per hour.
-    Assumes each log line begins with a timestamp in the format:
-        MM-DD HH:MM:SS.xxx
-    Returns a dictionary with keys as (day, hour) tuples.
+    Plots the average steps in each binning_data interval of the day across
+    all decoded days (shealth_binning) and appends it to the Word document.
     """
-    hour_counts = defaultdict(int)
-    pattern = re.compile(r"^(\d{2}-\d{2})\s+(\d{2}):")
+    profile = daily_profile(decoded, "steps")
+    if not profile.any():
+        print("No intraday step data found for plotting.")
+        return
     
-    with open(filepath, "r", encoding="utf-8", errors="ignore") as file:
-        for line in file:
-            match = pattern.match(line)
-            if match:
-                day = match.group(1)    # e.g., "03-08"
-                hour = match.group(2)   # e.g., "18"
-                key = (day, hour)
-                hour_counts[key] += 1
-    return hour_counts
+    minutes = np.arange(len(profile)) * decoded["bin_minutes"]
+    profile_chart = render_bar_chart(
+        [f"{m // 60:02d}:{m % 60:02d}" for m in minutes], profile,
+        title="Average Intraday Step Profile",
+        xlabel=f"Time of Day ({decoded['bin_minutes']}-minute intervals)",
+        ylabel="Average Steps",
+        figsize=(12, 6),
+        grid=True,
+        tight=True,
+        max_labels=24,
+    )
+    
+    doc.add_paragraph("Average Intraday Step Profile", style="Heading2")
+    doc.add_picture(io.BytesIO(profile_chart), width=Inches(6))
+    doc.add_paragraph("\n")
+
+def count_events_by_day_hour(filepath):
+    """
+    Reads a logcat (threadtime) capture and counts the number of log entries
+    per day and per hour. Returns a dictionary with ("MM-DD", "HH") keys.
+    """
+    return parse_logcat(filepath).count_by_day_hour()
+
+EVENT_CHART_TITLES = {
+    "minute": "Per-Minute Timeline of Event Frequency",
+    "hour": "Hourly Timeline of Event Frequency",
+    "day": "Daily Timeline of Event Frequency",
+}
 
-def plot_log_events(doc, hour_counts):
+def load_log_event_histogram(log_file, props_file=None, granularity="auto"):
     """
-    Generates a bar chart for event frequencies (grouped by day and hour),
+    Parses a logcat capture and counts its events per minute, hour or day
+    (see event_histogram). The year comes from the capture's modification
+    time (when it was pulled) and the timezone from device_properties.txt.
+    Returns (counts, granularity, timezone).
+    """
+    tz = None
+    if props_file and os.path.exists(props_file):
+        with open(props_file, "r", encoding="utf-8", errors="ignore") as f:
+            tz = device_timezone(f.read())
+    acquired_at = datetime.datetime.fromtimestamp(os.path.getmtime(log_file), tz)
+    counts, granularity = event_histogram(parse_logcat(log_file).ts, acquired_at, tz, granularity)
+    return counts, granularity, tz
+
+def plot_log_events(doc, counts, granularity, tz=None):
+    """
+    Generates a bar chart for event frequencies (an event_histogram result),
     saves the chart as an image, and appends it to the Word document.
     """
-    sorted_keys = sorted(hour_counts.keys(), key=lambda k: (int(k[0].split('-')[0]),
-                                                            int(k[0].split('-')[1]),
-                                                            int(k[1])))
-    x_labels = [f"{day} {hour}:00" for (day, hour) in sorted_keys]
-    y_values = [hour_counts[key] for key in sorted_keys]
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(x_labels, y_values, color='skyblue')
-    plt.xlabel("Time (Day and Hour)")
-    plt.ylabel("Number of Events")
-    plt.title("Hourly Timeline of Event Frequency")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    
-    events_image_path = "event_frequency.png"
-    plt.savefig(events_image_path, bbox_inches='tight')
-    plt.close()
+    if counts.empty:
+        print("No log events found for plotting.")
+        return
+    title = EVENT_CHART_TITLES[granularity]
+    events_chart = render_bar_chart(
+        bucket_labels(counts.index, granularity), counts.values,
+        title=title,
+        xlabel=f"Time ({tz.key if tz is not None else 'device clock'})",
+        ylabel="Number of Events",
+        figsize=(12, 6),
+        ha="right",
+        tight=True,
+        max_labels=48,
+    )
     
     # Append the event frequency chart to the document
-    doc.add_paragraph("Hourly Timeline of Event Frequency", style="Heading2")
-    doc.add_picture(events_image_path, width=Inches(6))
+    doc.add_paragraph(title, style="Heading2")
+    doc.add_picture(io.BytesIO(events_chart), width=Inches(6))
     doc.add_paragraph("\n")
 
 # -----------------------------------------------
@@ -126,17 +149,19 @@ def main():
     # Append the log events frequency graph using "logcat_capture.txt"
     log_file = os.path.join(directory, "logcat_capture.txt")
     if os.path.exists(log_file):
-        counts = count_events_by_day_hour(log_file)
-        plot_log_events(doc, counts)
+        counts, granularity, tz = load_log_event_histogram(
+            log_file, os.path.join(directory, "device_properties.txt"))
+        plot_log_events(doc, counts, granularity, tz)
     else:
         print(f"Log file not found: {log_file}")
     
-    # Append the steps per day graph from the CSV file
-    csv_file = os.path.join(directory, "com.samsung.shealth.step_daily_trend.20250308223308.csv.xls")
-    if os.path.exists(csv_file):
-        plot_steps_per_day(csv_file, doc)
+    # Append the steps per day graph from the Samsung Health export CSVs
+    health = load_health_export(directory, kinds=["step_daily_trend"])
+    if "step_daily_trend" in health:
+        plot_steps_per_day(health["step_daily_trend"], doc)
+        plot_intraday_steps(decode_daily_binning(health["step_daily_trend"], directory), doc)
     else:
-        print(f"CSV file not found: {csv_file}")
+        print(f"No Samsung Health step data found in: {directory}")
     
     # Save the updated forensic log report
     doc.save(output_filename)
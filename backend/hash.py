@@ -1,5 +1,127 @@
-import hashlib
+import os
 import sys
+import time
+import hashlib
+import json
+import argparse
+import datetime
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# File hashing for evidence integrity.
+#
+#   python hash.py <file>                          SHA-256 (the report download step)
+#   python hash.py <file> -a md5 -a sha1 -a sha256
+#   python hash.py <file> --all                    MD5, SHA-1 and SHA-256
+#   python hash.py <dir> [--manifest m.json]       manifest of a whole tree
+#   python hash.py <dir> --verify [--update]       check a tree against its manifest
+#   python hash.py <file> --merkle                 chunked Merkle tree of a large file
+#   python hash.py <file> --merkle --verify [--range START:END]
+#
+# Several digests are fed from one pass over the file: each chunk is read
+# into a reused buffer with readinto and every hasher is updated from a
+# memoryview of it, so nothing is copied and the file is read once however
+# many algorithms are asked for. hashlib releases the GIL while hashing
+# large buffers, so on multi-core machines the hashers of a chunk run in
+# parallel threads and the pass costs about as much as the slowest digest.
+# A single digest goes through hashlib.file_digest where available.
+#
+# Directory trees are hashed one file per task in a process pool into a
+# manifest of relative path, size, mtime and digests (by default
+# "<dir>.manifest.json" beside the tree, so the evidence itself is never
+# written to). Verify stats every file and re-hashes only those whose size or
+# mtime differ from the manifest; unchanged entries are taken from it, so an
+# untouched tree verifies at the cost of a directory walk.
+#
+# Large single files are hashed as a Merkle tree: fixed-size chunks are
+# hashed in parallel worker processes (each reading only its own byte range)
+# and the leaf digests combine pairwise into a root, leaves as H(0x00 ||
+# chunk) and nodes as H(0x01 || left || right), an odd node passing up as
+# is. The chunk digests are stored beside the root ("<file>.merkle.json"),
+# so a later verify can re-hash just part of the file and names the byte
+# ranges that differ instead of only saying the file changed.
+
+READ_SIZE = 1 << 20
+EVIDENCE_ALGORITHMS = ("md5", "sha1", "sha256")
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+MERKLE_CHUNK_SIZE = 64 << 20
+MERKLE_SUFFIX = ".merkle.json"
+MERKLE_VERSION = 1
+DISPLAY_NAMES = {"md5": "MD5", "sha1": "SHA-1", "sha224": "SHA-224", "sha256": "SHA-256",
+                 "sha384": "SHA-384", "sha512": "SHA-512"}
+
+
+def display_name(algorithm):
+    return DISPLAY_NAMES.get(algorithm, algorithm.upper())
+
+
+def new_hashers(algorithms):
+    """{algorithm: hashlib object}; raises ValueError for unsupported algorithms."""
+    return {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+
+
+def unsupported_algorithms(algorithms):
+    """The names in `algorithms` hashlib cannot compute."""
+    unsupported = []
+    for algorithm in algorithms:
+        try:
+            hashlib.new(algorithm)
+        except ValueError:
+            unsupported.append(algorithm)
+    return unsupported
+
+
+def update_from_file(f, hashers, buffer_size=READ_SIZE, start=0, length=None, threads=None):
+    """
+    Feeds `length` bytes of binary file `f` from `start` (default: to the
+    end) to every hasher in one pass. Returns the number of bytes read.
+    `threads` (default: several hashers on a multi-core machine) updates
+    the hashers of each chunk concurrently.
+    """
+    if buffer_size <= 0:
+        raise ValueError(f"Buffer size must be positive, got {buffer_size}")
+    hashers = list(hashers)
+    if threads is None:
+        threads = len(hashers) > 1 and (os.cpu_count() or 1) > 1
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    f.seek(start)
+    total = 0
+    with ThreadPoolExecutor(len(hashers)) if threads else contextlib.nullcontext() as pool:
+        while length is None or total < length:
+            want = buffer_size if length is None else min(buffer_size, length - total)
+            n = f.readinto(view[:want])
+            if not n:
+                break
+            chunk = view[:n]
+            if pool is None:
+                for hasher in hashers:
+                    hasher.update(chunk)
+            else:
+                # The buffer is reused, so every update finishes before the next read
+                wait([pool.submit(hasher.update, chunk) for hasher in hashers])
+            total += n
+    return total
+
+
+def hash_file_multi(filepath, algorithms=EVIDENCE_ALGORITHMS, buffer_size=READ_SIZE):
+    """
+    {algorithm: hex digest} for every algorithm in `algorithms`, computed
+    from a single read of the file. Raises ValueError for unsupported
+    algorithms or a non-positive buffer size.
+    """
+    if buffer_size <= 0:
+        raise ValueError(f"Buffer size must be positive, got {buffer_size}")
+    algorithms = list(dict.fromkeys(algorithms))
+    with open(filepath, "rb") as f:
+        if len(algorithms) == 1 and hasattr(hashlib, "file_digest"):
+            return {algorithms[0]: hashlib.file_digest(f, algorithms[0]).hexdigest()}
+        hashers = new_hashers(algorithms)
+        update_from_file(f, hashers.values(), buffer_size)
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
 
 def hash_file(filepath, algorithm="sha256"):
     """
@@ -12,26 +134,355 @@ def hash_file(filepath, algorithm="sha256"):
     Returns:
         str: The hexadecimal hash digest.
     """
-    try:
-        hasher = hashlib.new(algorithm)
-    except ValueError:
+    if unsupported_algorithms([algorithm]):
         print(f"Error: Unsupported hash algorithm: {algorithm}")
         return None
+    return hash_file_multi(filepath, [algorithm])[algorithm]
+
+
+# ---------------- Directory manifests ----------------
+
+def default_manifest_path(root):
+    return os.path.abspath(root).rstrip(os.sep) + MANIFEST_SUFFIX
+
+
+def iter_tree(root, exclude=()):
+    """(relative POSIX path, os.stat_result) for every regular file under `root`, sorted."""
+    exclude = {os.path.abspath(p) for p in exclude}
+    found = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if os.path.abspath(path) in exclude or os.path.islink(path):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            found.append((os.path.relpath(path, root).replace(os.sep, "/"), st))
+    return sorted(found, key=lambda item: item[0])
+
+
+def _hash_entry(path, algorithms):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digests": hash_file_multi(path, algorithms)}
+
+
+def _hash_paths(root, relpaths, algorithms, workers=None):
+    """{relative path: manifest entry} for `relpaths`, hashed in a process pool."""
+    if not relpaths:
+        return {}
+    paths = [os.path.join(root, rel) for rel in relpaths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) == 1:
+        return {rel: _hash_entry(path, algorithms) for rel, path in zip(relpaths, paths)}
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        entries = pool.map(_hash_entry, paths, [algorithms] * len(paths),
+                           chunksize=max(1, min(64, len(paths) // (workers * 8))))
+        return dict(zip(relpaths, entries))
+
+
+def _new_manifest(root, algorithms, files):
+    return {
+        "version": MANIFEST_VERSION,
+        "root": os.path.abspath(root),
+        "algorithms": list(algorithms),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "files": files,
+    }
+
+
+def hash_tree(root, algorithms=EVIDENCE_ALGORITHMS, workers=None, exclude=()):
+    """A manifest of every file under `root` (see the module notes)."""
+    algorithms = list(dict.fromkeys(algorithms))
+    new_hashers(algorithms)  # fail on unsupported algorithms before starting the pool
+    relpaths = [rel for rel, _ in iter_tree(root, exclude)]
+    return _new_manifest(root, algorithms, _hash_paths(root, relpaths, algorithms, workers))
+
+
+def verify_tree(root, manifest, workers=None, exclude=()):
+    """
+    Checks `root` against `manifest`. Files whose size and mtime match
+    their entry are "unchanged" without being read; the rest are re-hashed
+    and come out "verified" (same digests, e.g. only touched) or
+    "modified". Returns (report, refreshed manifest) where report maps
+    unchanged / verified / modified / missing / added to sorted paths.
+    """
+    algorithms = manifest["algorithms"]
+    old = manifest["files"]
+    current = dict(iter_tree(root, exclude))
+    report = {"unchanged": [], "verified": [], "modified": [], "missing": sorted(set(old) - set(current)),
+              "added": []}
+    files, rehash = {}, []
+    for rel, st in current.items():
+        entry = old.get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            report["unchanged"].append(rel)
+            files[rel] = entry
+        else:
+            rehash.append(rel)
+    for rel, entry in _hash_paths(root, rehash, algorithms, workers).items():
+        files[rel] = entry
+        if rel not in old:
+            report["added"].append(rel)
+        elif old[rel]["digests"] == entry["digests"]:
+            report["verified"].append(rel)
+        else:
+            report["modified"].append(rel)
+    return report, _new_manifest(root, algorithms, dict(sorted(files.items())))
+
+
+def write_manifest(manifest, path):
+    """Writes a manifest (or Merkle tree) atomically."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {path}: {manifest.get('version')}")
+    return manifest
+
+
+# ---------------- Merkle trees ----------------
+
+def _hash_chunk(path, start, length, algorithm, buffer_size=READ_SIZE):
+    """Leaf digest (raw bytes) of one chunk of a file."""
+    hasher = hashlib.new(algorithm, b"\x00")
+    with open(path, "rb") as f:
+        update_from_file(f, [hasher], min(buffer_size, max(length, 1)), start, length)
+    return hasher.digest()
+
+
+def merkle_root(leaves, algorithm="sha256"):
+    """Root digest (raw bytes) over leaf digests, as described in the module notes."""
+    level = list(leaves) or [hashlib.new(algorithm, b"\x00").digest()]
+    while len(level) > 1:
+        paired = [hashlib.new(algorithm, b"\x01" + level[i] + level[i + 1]).digest()
+                  for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def _chunk_digests(path, chunks, chunk_size, size, algorithm, workers=None):
+    """Leaf digests (raw bytes) of the given chunk numbers, hashed in a process pool."""
+    starts = [i * chunk_size for i in chunks]
+    lengths = [min(chunk_size, size - start) for start in starts]
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers <= 1:
+        return [_hash_chunk(path, start, length, algorithm) for start, length in zip(starts, lengths)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_hash_chunk, [path] * len(starts), starts, lengths, [algorithm] * len(starts)))
+
+
+def merkle_hash_file(path, chunk_size=MERKLE_CHUNK_SIZE, algorithm="sha256", workers=None):
+    """
+    The Merkle tree of a file as a dict: algorithm, chunk_size, size, the
+    hex root and the hex digest of every chunk.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    size = os.path.getsize(path)
+    count = max(1, -(-size // chunk_size))
+    leaves = _chunk_digests(path, range(count), chunk_size, size, algorithm, workers)
+    return {
+        "version": MERKLE_VERSION,
+        "algorithm": algorithm,
+        "chunk_size": chunk_size,
+        "size": size,
+        "root": merkle_root(leaves, algorithm).hex(),
+        "chunks": [leaf.hex() for leaf in leaves],
+    }
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+def verify_merkle(path, tree, start=0, end=None, workers=None):
+    """
+    Re-hashes the chunks of `path` overlapping bytes [start, end) (default:
+    the whole file) and compares them with `tree`. Returns a dict with
+    "match", the merged byte ranges that "differ" (chunk-aligned, [start,
+    end) pairs, including any range past the end of the shorter version)
+    and, for a full verify of an unchanged size, the recomputed "root".
+    Raises ValueError for an empty range or one outside both versions of
+    the file, which would otherwise verify nothing and report a match.
+    """
+    chunk_size, algorithm, expected = tree["chunk_size"], tree["algorithm"], tree["chunks"]
+    size = os.path.getsize(path)
+    extent = max(size, tree["size"])
+    full = start == 0 and end is None
+    if not full:
+        if start < 0:
+            raise ValueError(f"Byte range cannot start before 0, got {start}")
+        if end is not None and end <= start:
+            raise ValueError(f"Empty or inverted byte range {start}:{'' if end is None else end}")
+        if start >= extent:
+            raise ValueError(f"Byte range starts at {start}, past the end of the file ({extent} bytes)")
+    end = extent if end is None else min(end, extent)
+    common = min(size, tree["size"])
+    first, last = start // chunk_size, -(-min(end, common) // chunk_size)
+    chunks = list(range(first, max(first, last)))
+    leaves = _chunk_digests(path, chunks, chunk_size, size, algorithm, workers) if chunks else []
+
+    differ = []
+    for i, leaf in zip(chunks, leaves):
+        if i >= len(expected) or leaf.hex() != expected[i]:
+            differ.append((i * chunk_size, min((i + 1) * chunk_size, size)))
+    if size != tree["size"] and end > common:
+        differ.append((max(start, common), min(end, max(size, tree["size"]))))
+    result = {"match": not differ, "differ": _merge_ranges(differ)}
+    if full and size == tree["size"]:
+        result["root"] = merkle_root(leaves, algorithm).hex()
+        result["match"] = result["match"] and result["root"] == tree["root"]
+    return result
+
+
+def load_merkle(path):
+    with open(path, "r", encoding="utf-8") as f:
+        tree = json.load(f)
+    if tree.get("version") != MERKLE_VERSION:
+        raise ValueError(f"Unsupported Merkle tree version in {path}: {tree.get('version')}")
+    return tree
+
+
+def format_throughput(size, seconds):
+    return f"{size / 1e6:.1f} MB in {seconds:.3f} s ({size / 1e6 / max(seconds, 1e-9):.1f} MB/s)"
+
+
+def _tree_size(manifest, relpaths):
+    return sum(manifest["files"][rel]["size"] for rel in relpaths)
+
+
+def _main_tree(args, algorithms):
+    manifest_path = args.manifest or default_manifest_path(args.path)
+    start = time.perf_counter()
+    if args.verify:
+        manifest = load_manifest(manifest_path)
+        report, refreshed = verify_tree(args.path, manifest, args.workers, exclude=[manifest_path])
+        elapsed = time.perf_counter() - start
+        for status in ("modified", "missing", "added"):
+            for rel in report[status]:
+                print(f"{status.upper()}: {rel}")
+        print(", ".join(f"{len(paths)} {status}" for status, paths in report.items()))
+        rehashed = report["verified"] + report["modified"] + report["added"]
+        print(f"Re-hashed {len(rehashed)} files: {format_throughput(_tree_size(refreshed, rehashed), elapsed)}")
+        if args.update:
+            write_manifest(refreshed, manifest_path)
+            print(f"Manifest updated: {manifest_path}")
+        return 1 if report["modified"] or report["missing"] or report["added"] else 0
+
+    manifest = hash_tree(args.path, algorithms, args.workers, exclude=[manifest_path])
+    elapsed = time.perf_counter() - start
+    write_manifest(manifest, manifest_path)
+    files = list(manifest["files"])
+    print(f"Hashed {len(files)} files ({', '.join(map(display_name, manifest['algorithms']))}) into {manifest_path}")
+    print(f"Throughput: {format_throughput(_tree_size(manifest, files), elapsed)}")
+    return 0
+
+
+def _parse_range(text):
+    start, _, end = text.partition(":")
+    return int(start or 0), int(end) if end else None
+
+
+def _main_merkle(args):
+    tree_path = args.tree or args.path + MERKLE_SUFFIX
+    start = time.perf_counter()
+    if args.verify:
+        tree = load_merkle(tree_path)
+        first, last = _parse_range(args.range) if args.range else (0, None)
+        result = verify_merkle(args.path, tree, first, last, args.workers)
+        elapsed = time.perf_counter() - start
+        for lo, hi in result["differ"]:
+            print(f"DIFFERS: bytes {lo}-{hi} ({hi - lo} bytes)")
+        print(f"{'Match' if result['match'] else 'MISMATCH'}: {args.path} against {tree_path}")
+        size = os.path.getsize(args.path)
+        verified = (min(last, size) if last is not None else size) - first
+        print(f"Throughput: {format_throughput(max(verified, 0), elapsed)}")
+        return 0 if result["match"] else 1
+
+    chunk_size = MERKLE_CHUNK_SIZE if args.chunk_size is None else args.chunk_size
+    algorithm = (args.algorithms or ["sha256"])[0]
+    tree = merkle_hash_file(args.path, chunk_size, algorithm, args.workers)
+    elapsed = time.perf_counter() - start
+    write_manifest(tree, tree_path)
+    print(f"{display_name(algorithm)} Merkle root of {args.path}:")
+    print(tree["root"])
+    print(f"{len(tree['chunks'])} chunks of {chunk_size} bytes saved to {tree_path}")
+    print(f"Throughput: {format_throughput(tree['size'], elapsed)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hash evidence files or directory trees.")
+    parser.add_argument("path", help="file, or directory to hash into a manifest")
+    parser.add_argument("-a", "--algorithm", action="append", dest="algorithms",
+                        help="digest to compute (repeatable, default sha256 for files, "
+                             f"{', '.join(EVIDENCE_ALGORITHMS)} for directories)")
+    parser.add_argument("--all", action="store_true", help=f"compute {', '.join(EVIDENCE_ALGORITHMS)}")
+    parser.add_argument("--buffer-size", type=int, default=READ_SIZE, help="read size in bytes")
+    parser.add_argument("--manifest", help=f"directory manifest path (default <dir>{MANIFEST_SUFFIX})")
+    parser.add_argument("--verify", action="store_true", help="check a directory (or --merkle file) against its manifest")
+    parser.add_argument("--update", action="store_true", help="with --verify, rewrite the manifest")
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    parser.add_argument("--merkle", action="store_true", help="hash a file as a chunked Merkle tree")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help=f"Merkle chunk size in bytes (default {MERKLE_CHUNK_SIZE})")
+    parser.add_argument("--tree", help=f"Merkle tree path (default <file>{MERKLE_SUFFIX})")
+    parser.add_argument("--range", help="with --merkle --verify, only check bytes START:END")
+    args = parser.parse_args(argv)
+    if args.buffer_size <= 0:
+        parser.error(f"--buffer-size must be positive, got {args.buffer_size}")
+    unsupported = unsupported_algorithms(args.algorithms or [])
+    if unsupported:
+        print(f"Error: Unsupported hash algorithm: {', '.join(unsupported)}")
+        return 1
+
+    if args.merkle:
+        try:
+            return _main_merkle(args)
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}")
+            return 1
+
+    if os.path.isdir(args.path):
+        algorithms = list(EVIDENCE_ALGORITHMS) if args.all or not args.algorithms else args.algorithms
+        try:
+            return _main_tree(args, algorithms)
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}")
+            return 1
+
+    algorithms = list(EVIDENCE_ALGORITHMS) if args.all else args.algorithms or ["sha256"]
+    start = time.perf_counter()
+    try:
+        digests = hash_file_multi(args.path, algorithms, args.buffer_size)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    for algorithm, digest in digests.items():
+        print(f"{display_name(algorithm)} hash of {args.path}:")
+        print(digest)
+    print(f"Throughput: {format_throughput(os.path.getsize(args.path), elapsed)}")
+    return 0
 
-    with open(filepath, "rb") as f:
-        # Read the file in chunks to avoid loading the entire file into memory
-        chunk_size = 8192
-        while chunk := f.read(chunk_size):
-            hasher.update(chunk)
-    return hasher.hexdigest()
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python hash_file.py <file_path>")
-        sys.exit(1)
-    
-    filepath = sys.argv[1]
-    file_hash = hash_file(filepath)
-    if file_hash:
-        print(f"SHA-256 hash of {filepath}:")
-        print(file_hash)
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import logging
+import contextlib
+
+# Logging and per-section metrics for the report pipeline.
+#
+# Modules log through loggers under "cidecode" instead of printing, so the
+# volume is chosen once with REPORT_LOG_LEVEL (DEBUG, INFO, WARNING, ...)
+# and per-line output never reaches server.js unless asked for. Every
+# report section gets a metrics dict (SECTION_METRICS keys) that is filled
+# while it is read, parsed and rendered; report_gen writes them out as a
+# JSON timing summary next to each report.
+
+LOG_LEVEL_ENV = "REPORT_LOG_LEVEL"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+SECTION_METRICS = [
+    "input_bytes", "input_lines", "records", "parse_s", "render_s", "memory_delta_bytes", "cached",
+]
+
+
+def get_logger(name):
+    return logging.getLogger(f"cidecode.{name}")
+
+
+def configure_logging(level=None, stream=None):
+    """
+    Sends "cidecode" log records to `stream`, default stdout (which
+    server.js relays), at `level`, default REPORT_LOG_LEVEL or INFO. Safe
+    to call more than once, e.g. again in every worker process.
+    """
+    level = (level or os.environ.get(LOG_LEVEL_ENV) or "INFO").upper()
+    root = logging.getLogger("cidecode")
+    if not root.handlers:
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.propagate = False
+    root.setLevel(level)
+    return root
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+
+def new_section_metrics():
+    metrics = dict.fromkeys(SECTION_METRICS)
+    metrics.update({"input_bytes": 0, "input_lines": 0, "records": 0, "render_s": {}, "cached": False})
+    return metrics
+
+
+def count_records(blocks):
+    """Rows across a section's table blocks."""
+    return sum(len(payload) for kind, _, payload in blocks if kind == "table")
+
+
+@contextlib.contextmanager
+def measure_parse(metrics):
+    """Times a section build into `metrics`: parse_s and memory_delta_bytes (RSS after - before)."""
+    before = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics["parse_s"] = round(time.perf_counter() - start, 4)
+        after = rss_bytes()
+        if before is not None and after is not None:
+            metrics["memory_delta_bytes"] = after - before
+
+
+def timed_sections(sections, metrics, fmt):
+    """
+    Yields (section, blocks) pairs to a report writer and books the time the
+    writer spends on each section as metrics[section]["render_s"][fmt].
+    """
+    for section, blocks in sections:
+        start = time.perf_counter()
+        yield section, blocks
+        render = metrics[section]["render_s"]
+        render[fmt] = round(render.get(fmt, 0.0) + time.perf_counter() - start, 4)
+
+
+def timing_summary(metrics, total_s, outputs):
+    """Machine-readable summary of one report run."""
+    totals = {
+        "input_bytes": sum(m["input_bytes"] or 0 for m in metrics.values()),
+        "records": sum(m["records"] or 0 for m in metrics.values()),
+        "parse_s": round(sum(m["parse_s"] or 0.0 for m in metrics.values()), 4),
+        "render_s": round(sum(sum(m["render_s"].values()) for m in metrics.values()), 4),
+        "wall_s": round(total_s, 4),
+    }
+    return {"sections": metrics, "totals": totals, "outputs": outputs}
+
+
+def write_timing_summary(summary, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return path
@@ -0,0 +1,162 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Collapses parsed location fixes (location_parser.parse_location_fixes) into
+# stay points and the trips between them.
+#
+# 1. Fixes are walked once in time order; a run of fixes that stays within
+#    `radius_m` of its running centroid for at least `min_dwell_s` is a stay.
+# 2. Stays are merged into places with a uniform grid index (cell size =
+#    `radius_m`): each stay only checks the 3x3 neighbouring cells, so
+#    revisits are found in O(1) per stay instead of comparing all pairs.
+# 3. Fixes between two consecutive stays form a trip segment.
+
+EARTH_RADIUS_M = 6_371_000.0
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+STAY_COLUMNS = ["place_id", "latitude", "longitude", "arrival", "departure", "dwell_minutes", "fix_count"]
+TRIP_COLUMNS = ["from_place", "to_place", "departure", "arrival", "duration_minutes", "distance_km", "fix_count"]
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Vectorised great-circle distance in metres."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def _time_axis(fixes):
+    """Returns (seconds, has_wall_time): wall-clock seconds when fixes carry timestamps, else elapsed realtime."""
+    ts = fixes["timestamp"]
+    if ts.notna().sum() >= fixes["elapsed_ms"].notna().sum() and ts.notna().any():
+        seconds = (ts.astype("datetime64[ms]").astype("int64") / 1000.0).to_numpy()
+        return np.where(ts.notna().to_numpy(), seconds, np.nan), True
+    return fixes["elapsed_ms"].to_numpy(dtype="float64") / 1000.0, False
+
+
+def _to_timestamp(seconds, has_wall_time):
+    if not has_wall_time or np.isnan(seconds):
+        return pd.NaT
+    return pd.Timestamp(seconds, unit="s")
+
+
+def _span(times):
+    """(first, last) time of a slice, NaN when none of its fixes has a time."""
+    times = times[~np.isnan(times)]
+    if times.size == 0:
+        return np.nan, np.nan
+    return times.min(), times.max()
+
+
+def _minutes(seconds):
+    return round(seconds / 60.0, 1) if not np.isnan(seconds) else None
+
+
+def cluster_location_fixes(fixes, radius_m=100.0, min_dwell_s=300.0, min_fixes=2, max_accuracy_m=200.0):
+    """
+    Summarises location fixes as stay points and trip segments.
+
+    Returns (stays_df, trips_df) with STAY_COLUMNS / TRIP_COLUMNS. Fixes less
+    accurate than `max_accuracy_m` are ignored. When fixes have no time at
+    all, a stay only needs `min_fixes` fixes and durations are left empty.
+    """
+    empty = (pd.DataFrame(columns=STAY_COLUMNS), pd.DataFrame(columns=TRIP_COLUMNS))
+    if fixes.empty:
+        return empty
+
+    fixes = fixes[~(fixes["accuracy"] > max_accuracy_m)]
+    t, has_wall_time = _time_axis(fixes)
+    order = np.argsort(t, kind="stable")  # NaN times keep file order at the end
+    lat = fixes["latitude"].to_numpy(dtype="float64")[order]
+    lon = fixes["longitude"].to_numpy(dtype="float64")[order]
+    t = t[order]
+    n = len(lat)
+    if n == 0:
+        return empty
+    timed = not np.isnan(t).all()
+
+    # Local equirectangular projection (metres) around the median latitude
+    cos_lat = math.cos(math.radians(float(np.median(lat))))
+    x = lon * METERS_PER_DEGREE * cos_lat
+    y = lat * METERS_PER_DEGREE
+    radius_sq = radius_m * radius_m
+
+    # --- 1. Stay detection: one pass with a running centroid ---
+    runs = []  # (first_index, last_index) of each stay, in time order
+    start, sum_x, sum_y = 0, x[0], y[0]
+    for i in range(1, n + 1):
+        if i < n:
+            count = i - start
+            dx, dy = x[i] - sum_x / count, y[i] - sum_y / count
+            if dx * dx + dy * dy <= radius_sq:
+                sum_x += x[i]
+                sum_y += y[i]
+                continue
+        count = i - start
+        if count >= min_fixes:
+            first_t, last_t = _span(t[start:i])
+            if not timed or last_t - first_t >= min_dwell_s:
+                runs.append((start, i - 1))
+        if i < n:
+            start, sum_x, sum_y = i, x[i], y[i]
+
+    if not runs:
+        return empty
+
+    # --- 2. Merge stays into places with a grid index ---
+    grid = {}     # (cell_x, cell_y) -> [place ids]
+    places = []   # [sum_x, sum_y, count] per place
+    stays = []
+    for first, last in runs:
+        cx, cy = x[first:last + 1].mean(), y[first:last + 1].mean()
+        cell = (math.floor(cx / radius_m), math.floor(cy / radius_m))
+        place_id = None
+        for gx in (cell[0] - 1, cell[0], cell[0] + 1):
+            for gy in (cell[1] - 1, cell[1], cell[1] + 1):
+                for pid in grid.get((gx, gy), ()):
+                    px, py, pc = places[pid]
+                    if (px / pc - cx) ** 2 + (py / pc - cy) ** 2 <= radius_sq:
+                        place_id = pid
+                        break
+                if place_id is not None:
+                    break
+            if place_id is not None:
+                break
+        if place_id is None:
+            place_id = len(places)
+            places.append([0.0, 0.0, 0])
+            grid.setdefault(cell, []).append(place_id)
+        count = last - first + 1
+        places[place_id][0] += cx * count
+        places[place_id][1] += cy * count
+        places[place_id][2] += count
+
+        arrival, departure = _span(t[first:last + 1])
+        stays.append({
+            "place_id": place_id + 1,
+            "latitude": round(float(lat[first:last + 1].mean()), 6),
+            "longitude": round(float(lon[first:last + 1].mean()), 6),
+            "arrival": _to_timestamp(arrival, has_wall_time),
+            "departure": _to_timestamp(departure, has_wall_time),
+            "dwell_minutes": _minutes(departure - arrival),
+            "fix_count": count,
+        })
+
+    # --- 3. Trips between consecutive stays ---
+    step_m = np.concatenate([[0.0], haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:])])
+    cumulative_m = np.cumsum(step_m)
+    trips = []
+    for (prev_first, prev_last), (next_first, _), prev, nxt in zip(runs, runs[1:], stays, stays[1:]):
+        departure, arrival = t[prev_last], t[next_first]
+        trips.append({
+            "from_place": prev["place_id"],
+            "to_place": nxt["place_id"],
+            "departure": _to_timestamp(departure, has_wall_time),
+            "arrival": _to_timestamp(arrival, has_wall_time),
+            "duration_minutes": _minutes(arrival - departure),
+            "distance_km": round(float(cumulative_m[next_first] - cumulative_m[prev_last]) / 1000.0, 3),
+            "fix_count": int(next_first - prev_last - 1),
+        })
+
+    return pd.DataFrame(stays, columns=STAY_COLUMNS), pd.DataFrame(trips, columns=TRIP_COLUMNS)
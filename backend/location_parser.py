@@ -0,0 +1,153 @@
+import re
+import datetime
+import pandas as pd
+
+# Single-pass extractor for Location[...] records in `dumpsys location` output.
+# Every record is bounded to its own line, ending at its closing "]" or the
+# next Location[ on the same line, so field lookups never scan ahead into
+# other records.
+
+LOCATION_COLUMNS = ["timestamp", "time_source", "provider", "latitude", "longitude", "accuracy", "altitude",
+                    "elapsed_ms"]
+# time_source values: the fix's own UTC time, or the device wall-clock log stamp
+TIME_SOURCE_FIX = "fix"
+TIME_SOURCE_LINE = "line"
+# Columns identifying a repeated fix
+LOCATION_KEY_COLUMNS = ["timestamp", "provider", "latitude", "longitude", "elapsed_ms"]
+
+RECORD_START = "Location["
+PROVIDER_RE = re.compile(r'^(?:m?[Pp]rovider=)?(?P<provider>[A-Za-z][\w\-]*)')
+COORDS_RE = re.compile(r'(?P<lat>-?\d+\.\d+)\s*,\s*(?P<lon>-?\d+\.\d+)')
+MEMBER_COORDS_RE = re.compile(r'mLatitude=(?P<lat>-?\d+\.\d+).*?mLongitude=(?P<lon>-?\d+\.\d+)')
+# All key=value fields of interest are picked up in one scan of the record
+FIELD_RE = re.compile(r'\b(?P<key>hAcc|acc|mAccuracy|alt|mAltitude|time|mTime|et)=(?P<value>[^\s,\]{}]+)')
+FIELD_NAMES = {
+    "hAcc": "accuracy", "acc": "accuracy", "mAccuracy": "accuracy",
+    "alt": "altitude", "mAltitude": "altitude",
+    "time": "time", "mTime": "time",
+    "et": "elapsed",
+}
+ELAPSED_RE = re.compile(
+    r'^\+?(?:(?P<d>\d+)d)?(?:(?P<h>\d+)h)?(?:(?P<m>\d+)m(?!s))?(?:(?P<s>\d+)s)?(?:(?P<ms>\d+)ms)?$'
+)
+LINE_TIME_RE = re.compile(
+    r'^\s*(?:(?P<date>\d{4}-\d{2}-\d{2})|(?P<md>\d{2}-\d{2}))[ T](?P<time>\d{2}:\d{2}:\d{2}(?:\.\d+)?)'
+)
+
+
+def _elapsed_ms(value):
+    m = ELAPSED_RE.match(value)
+    if not m or not any(m.groupdict().values()):
+        return None
+    parts = m.groupdict()
+    return (
+        int(parts["d"] or 0) * 86_400_000 + int(parts["h"] or 0) * 3_600_000
+        + int(parts["m"] or 0) * 60_000 + int(parts["s"] or 0) * 1000 + int(parts["ms"] or 0)
+    )
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _line_timestamp(line, year):
+    m = LINE_TIME_RE.match(line)
+    if not m:
+        return None
+    date = m.group("date") or f"{year}-{m.group('md')}"
+    try:
+        return datetime.datetime.fromisoformat(f"{date} {m.group('time')}")
+    except ValueError:
+        return None
+
+
+def _record_end(line, body_start):
+    """Index of the "]" closing a record (Bundle[...] may nest), the next record start, or end of line."""
+    depth = 1
+    pos = body_start
+    limit = line.find(RECORD_START, body_start)
+    if limit < 0:
+        limit = len(line)
+    while pos < limit:
+        opening = line.find("[", pos, limit)
+        closing = line.find("]", pos, limit)
+        if closing < 0:
+            break
+        if 0 <= opening < closing:
+            depth += 1
+            pos = opening + 1
+            continue
+        depth -= 1
+        if depth == 0:
+            return closing
+        pos = closing + 1
+    return limit
+
+
+def _parse_record(record, line_time, default_provider="unknown"):
+    """Extracts one fix from a bounded Location[...] record, or None if it has no coordinates."""
+    coords = COORDS_RE.search(record) or MEMBER_COORDS_RE.search(record)
+    if not coords:
+        return None
+
+    fields = {}
+    for m in FIELD_RE.finditer(record):
+        fields.setdefault(FIELD_NAMES[m.group("key")], m.group("value"))
+
+    timestamp = line_time
+    time_source = TIME_SOURCE_LINE if line_time is not None else None
+    fix_time = fields.get("time", "")
+    if fix_time.isdigit() and len(fix_time) in (10, 13):
+        seconds = int(fix_time) / (1000 if len(fix_time) == 13 else 1)
+        timestamp = datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc).replace(tzinfo=None)
+        time_source = TIME_SOURCE_FIX
+
+    provider = PROVIDER_RE.match(record)
+    return (
+        timestamp,
+        time_source,
+        provider.group("provider") if provider else default_provider,
+        float(coords.group("lat")),
+        float(coords.group("lon")),
+        _to_float(fields.get("accuracy")),
+        _to_float(fields.get("altitude")),
+        _elapsed_ms(fields["elapsed"]) if "elapsed" in fields else None,
+    )
+
+
+def parse_location_fixes(source, year=None, default_provider="unknown"):
+    """
+    Parses every Location[...] fix in `dumpsys location` output in one pass.
+
+    `source` is the dump text or an iterable of its lines. Returns a DataFrame
+    with LOCATION_COLUMNS: the real fix time (time=/mTime= epoch values as
+    UTC, else the line's log timestamp in device wall time, else NaT;
+    `MM-DD` stamps get `year`, default current year), where that time came
+    from (time_source: TIME_SOURCE_FIX, TIME_SOURCE_LINE or None), provider,
+    latitude, longitude, horizontal accuracy, altitude and elapsed-realtime ms. Records that do not name a
+    provider get `default_provider`. Repeated fixes are dropped.
+    """
+    year = year or datetime.datetime.now().year
+    lines = source.splitlines() if isinstance(source, str) else source
+
+    rows = []
+    for line in lines:
+        start = line.find(RECORD_START)
+        if start < 0:
+            continue
+        line_time = _line_timestamp(line, year)
+        while start >= 0:
+            body_start = start + len(RECORD_START)
+            row = _parse_record(line[body_start:_record_end(line, body_start)], line_time, default_provider)
+            if row:
+                rows.append(row)
+            start = line.find(RECORD_START, body_start)
+
+    df = pd.DataFrame(rows, columns=LOCATION_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"]).astype("datetime64[ms]")
+    for col in ("latitude", "longitude", "accuracy", "altitude", "elapsed_ms"):
+        df[col] = df[col].astype("float64")
+    return df.drop_duplicates(subset=LOCATION_KEY_COLUMNS).reset_index(drop=True)
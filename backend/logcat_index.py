@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+
+from logcat_parser import LEVELS, STAMP_WIDTH, LogcatColumns, parse_logcat, stamps_to_ms
+from instrumentation import get_logger, configure_logging
+
+# Persistent query index over a logcat capture.
+#
+#   python logcat_index.py logcat_capture.txt --tag ActivityManager --level W
+#   python logcat_index.py logcat_capture.txt --pid 1234 --since "03-08 18:00" --until "03-08 19:00"
+#
+# The index is built once per capture (parse_logcat) and saved beside it in
+# "<capture>.index/" as plain .npy arrays that are memory-mapped on open:
+#
+#   columns     the parsed LogcatColumns arrays (offsets, ts, pid, level, tag)
+#   by_time     row numbers sorted by timestamp (+ ts_sorted for searchsorted)
+#   tag_rows    row numbers grouped by tag, tag_ptr[code]:tag_ptr[code + 1]
+#   pid_rows    likewise per PID (pid_values holds the PIDs, sorted)
+#   level_bits  one packed bitmap per level, LEVELS order
+#
+# PIDs get posting lists rather than bitmaps: a capture has hundreds of
+# PIDs and a bitmap each would outweigh the capture itself, while there
+# are only seven levels. A query narrows the rows with whichever of these
+# apply and reads just the matching lines from the capture by offset. The
+# index records the capture's size and mtime and is rebuilt when they
+# change.
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index"
+
+logger = get_logger("logcat_index")
+
+
+def index_dir_for(path):
+    return os.path.abspath(path) + INDEX_SUFFIX
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _postings(keys, values=None):
+    """Row numbers grouped by key: (values, ptr, rows) with rows[ptr[i]:ptr[i + 1]] for values[i]."""
+    rows = np.argsort(keys, kind="stable")
+    if values is None:
+        values, counts = np.unique(keys, return_counts=True)
+    else:
+        counts = np.bincount(keys, minlength=len(values))
+    ptr = np.concatenate(([0], np.cumsum(counts)))
+    return values, ptr, rows
+
+
+def to_ts(value):
+    """
+    Yearless `ts` milliseconds for a time bound: an int (already `ts`) or
+    "MM-DD HH:MM[:SS[.mmm]]", missing fields counting as zero.
+    """
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    text = str(value).strip()
+    full = text + "00-00 00:00:00.000"[len(text):]
+    if len(full) != STAMP_WIDTH:
+        raise ValueError(f"Bad logcat time {value!r}; expected MM-DD HH:MM[:SS[.mmm]]")
+    return int(stamps_to_ms(np.frombuffer(full.encode(), dtype=np.uint8).reshape(1, -1))[0])
+
+
+def build_logcat_index(path, index_dir=None, max_workers=None):
+    """Parses `path` and writes its index directory. Returns the LogcatIndex."""
+    path = os.path.abspath(path)
+    index_dir = index_dir or index_dir_for(path)
+    start = time.perf_counter()
+    columns = parse_logcat(path, max_workers=max_workers)
+    parsed_s = time.perf_counter() - start
+
+    by_time = np.argsort(columns.ts, kind="stable")
+    _, tag_ptr, tag_rows = _postings(columns.tag, np.arange(len(columns.tags)))
+    pid_values, pid_ptr, pid_rows = _postings(columns.pid)
+    level_bits = np.stack([np.packbits(columns.level == code) for code in range(len(LEVELS))])
+    arrays = dict(
+        columns.columns,
+        by_time=by_time, ts_sorted=columns.ts[by_time],
+        tag_ptr=tag_ptr, tag_rows=tag_rows,
+        pid_values=pid_values, pid_ptr=pid_ptr, pid_rows=pid_rows,
+        level_bits=level_bits,
+    )
+
+    # Write to a scratch directory and swap it in, so readers never see half an index
+    scratch = index_dir + ".tmp"
+    shutil.rmtree(scratch, ignore_errors=True)
+    os.makedirs(scratch)
+    for name, array in arrays.items():
+        np.save(os.path.join(scratch, f"{name}.npy"), array)
+    meta = {
+        "version": INDEX_VERSION,
+        "source": path,
+        "source_stamp": _source_stamp(path),
+        "rows": len(columns),
+        "skipped": columns.skipped,
+        "tags": columns.tags,
+    }
+    with open(os.path.join(scratch, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(scratch, index_dir)
+    logger.info("Indexed %s: %d lines, %d tags, %d PIDs in %.2f s (parse %.2f s)", path, len(columns),
+                len(columns.tags), len(pid_values), time.perf_counter() - start, parsed_s)
+    return LogcatIndex(path, index_dir)
+
+
+def open_logcat_index(path, index_dir=None, rebuild=False, max_workers=None):
+    """The capture's index, (re)built first if missing, stale or of an older version."""
+    path = os.path.abspath(path)
+    index_dir = index_dir or index_dir_for(path)
+    if not rebuild:
+        try:
+            with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") == INDEX_VERSION and meta.get("source_stamp") == _source_stamp(path):
+                return LogcatIndex(path, index_dir, meta)
+            logger.info("Index for %s is stale; rebuilding", path)
+        except (OSError, ValueError):
+            pass
+    return build_logcat_index(path, index_dir, max_workers)
+
+
+class LogcatIndex:
+    """A capture's saved index, memory-mapped. Use open_logcat_index() to get one."""
+
+    def __init__(self, path, index_dir, meta=None):
+        self.path = path
+        self.index_dir = index_dir
+        if meta is None:
+            with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        self.meta = meta
+        self.tags = meta["tags"]
+        self._tag_codes = {tag: code for code, tag in enumerate(self.tags)}
+        load = lambda name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+        self.columns = LogcatColumns(
+            path,
+            {name: load(name) for name in ("ts", "pid", "tid", "level", "tag", "line_start", "msg_start", "line_end")},
+            self.tags,
+            meta["skipped"],
+        )
+        self.by_time, self.ts_sorted = load("by_time"), load("ts_sorted")
+        self.tag_ptr, self.tag_rows = load("tag_ptr"), load("tag_rows")
+        self.pid_values, self.pid_ptr, self.pid_rows = load("pid_values"), load("pid_ptr"), load("pid_rows")
+        self.level_bits = load("level_bits")
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def __repr__(self):
+        return f"LogcatIndex({self.path!r}, {len(self)} lines)"
+
+    @staticmethod
+    def _as_list(value):
+        return [value] if isinstance(value, (str, int, np.integer)) else list(value)
+
+    def _tag_rows(self, tags):
+        parts = []
+        for tag in self._as_list(tags):
+            code = self._tag_codes.get(tag)
+            if code is not None:
+                parts.append(self.tag_rows[self.tag_ptr[code]:self.tag_ptr[code + 1]])
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def _pid_rows(self, pids):
+        parts = []
+        for pid in self._as_list(pids):
+            i = np.searchsorted(self.pid_values, pid)
+            if i < len(self.pid_values) and self.pid_values[i] == pid:
+                parts.append(self.pid_rows[self.pid_ptr[i]:self.pid_ptr[i + 1]])
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def _time_rows(self, since, until):
+        lo = 0 if since is None else np.searchsorted(self.ts_sorted, to_ts(since), side="left")
+        hi = len(self) if until is None else np.searchsorted(self.ts_sorted, to_ts(until), side="left")
+        return np.sort(self.by_time[lo:hi])
+
+    def _level_bits(self, levels):
+        codes = [LEVELS.index(level.upper()) for level in levels]
+        return np.bitwise_or.reduce(self.level_bits[codes], axis=0)
+
+    def query(self, tag=None, pid=None, level=None, min_level=None, since=None, until=None, limit=None):
+        """
+        Row numbers (in capture order) of lines matching every given filter:
+        `tag` and `pid` take one value or several, `level` one or more of
+        LEVELS, `min_level` that level and above, and [since, until) bounds
+        the time (see to_ts). `limit` keeps the first rows only.
+        """
+        rows = None
+        for candidate in (
+            self._tag_rows(tag) if tag is not None else None,
+            self._pid_rows(pid) if pid is not None else None,
+            self._time_rows(since, until) if since is not None or until is not None else None,
+        ):
+            if candidate is not None:
+                rows = candidate if rows is None else np.intersect1d(rows, candidate, assume_unique=True)
+
+        levels = set(self._as_list(level)) if level is not None else set(LEVELS)
+        if min_level is not None:
+            levels &= set(LEVELS[LEVELS.index(min_level.upper()):])
+        if levels != set(LEVELS):
+            bits = self._level_bits(sorted(levels))
+            if rows is None:
+                rows = np.flatnonzero(np.unpackbits(bits, count=len(self)))
+            else:
+                rows = rows[(bits[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1 == 1]
+        if rows is None:
+            rows = np.arange(len(self))
+        return rows[:limit] if limit is not None else rows
+
+    def lines(self, limit=None, **filters):
+        """Text of the matching lines, read from the capture by offset."""
+        return self.columns.lines(self.query(limit=limit, **filters))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a logcat capture through its persistent index.")
+    parser.add_argument("capture", help="logcat -v threadtime capture, e.g. logcat_capture.txt")
+    parser.add_argument("--tag", nargs="+")
+    parser.add_argument("--pid", type=int, nargs="+")
+    parser.add_argument("--level", nargs="+", choices=list(LEVELS))
+    parser.add_argument("--min-level", choices=list(LEVELS))
+    parser.add_argument("--since", help='"MM-DD HH:MM[:SS[.mmm]]", inclusive')
+    parser.add_argument("--until", help='"MM-DD HH:MM[:SS[.mmm]]", exclusive')
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--count", action="store_true", help="print the number of matches only")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index even if it is current")
+    parser.add_argument("--workers", type=int, help="parser processes when (re)building")
+    args = parser.parse_args(argv)
+
+    # Results go to stdout, diagnostics to stderr, so the output pipes cleanly
+    configure_logging(stream=sys.stderr)
+    index = open_logcat_index(args.capture, rebuild=args.rebuild, max_workers=args.workers)
+    start = time.perf_counter()
+    rows = index.query(tag=args.tag, pid=args.pid, level=args.level, min_level=args.min_level,
+                       since=args.since, until=args.until, limit=args.limit)
+    query_s = time.perf_counter() - start
+    if args.count:
+        print(len(rows))
+    else:
+        for line in index.columns.lines(rows):
+            print(line)
+    logger.info("%d matching lines; query %.1f ms, read %.1f ms", len(rows), query_s * 1000,
+                (time.perf_counter() - start - query_s) * 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+import os
+import re
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Columnar parser for `adb logcat -v threadtime` captures:
+#
+#   03-08 18:01:02.345  1234  5678 I ActivityManager: Start proc 4321:com.example/u0a12
+#
+# The capture is memory-mapped and cut into newline-aligned byte ranges that
+# are parsed in a process pool; each worker maps the file itself, so no line
+# data crosses process boundaries, only the resulting arrays. Every parsed
+# line becomes one row of flat NumPy columns:
+#
+#   ts          int64   milliseconds since Jan 1 00:00 of a leap year (logcat
+#                       prints no year; see the note below)
+#   pid, tid    int32
+#   level       uint8   index into LEVELS
+#   tag         int32   code into LogcatColumns.tags
+#   line_start  int64   byte offset of the line in the file
+#   msg_start   int64   byte offset of the message text
+#   line_end    int64   byte offset of the line's end (before "\n")
+#
+# Messages are not copied; LogcatColumns.message(i) reads them back by
+# offset. Lines that are not log entries ("--------- beginning of main",
+# wrapped output) are skipped and counted.
+#
+# Within a range, lines with logcat's usual fixed-width header ("%5d %5d")
+# are checked and decoded with array operations over the raw bytes; only
+# the remaining lines (wider PIDs, other layouts) go through LINE_RE one by
+# one. A leap year base keeps Feb 29 representable, and `ts` still sorts in
+# capture order unless the capture crosses New Year.
+
+LEVELS = "VDIWEFS"
+CHUNK_SIZE = 32 << 20
+
+LINE_RE = re.compile(rb"(\d\d-\d\d \d\d:\d\d:\d\d\.\d{3})\d* +(\d+) +(\d+) ([VDIWEFS]) (.*?) *:(?: |(?=\r?$))")
+
+MS_PER_HOUR = 3_600_000
+MS_PER_DAY = 24 * MS_PER_HOUR
+# Days before each month in a leap year
+_MONTH_DAYS = np.array([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+DAYS_BEFORE_MONTH = np.cumsum(_MONTH_DAYS)[:-1]
+
+# Fixed-width header: "MM-DD HH:MM:SS.mmm PPPPP TTTTT L " then the tag
+STAMP_WIDTH = 18
+HEADER_WIDTH = 33
+_STAMP_DIGITS = [0, 1, 3, 4, 6, 7, 9, 10, 12, 13, 15, 16, 17]
+_HEADER_SEPARATORS = {2: b"-", 5: b" ", 8: b":", 11: b":", 14: b".", 18: b" ", 24: b" ", 30: b" ", 32: b" "}
+_PID_FIELD = slice(19, 24)
+_TID_FIELD = slice(25, 30)
+_LEVEL_POS = 31
+
+_LEVEL_CODES = np.zeros(256, dtype=np.uint8)
+_IS_LEVEL = np.zeros(256, dtype=bool)
+for _code, _level in enumerate(LEVELS.encode()):
+    _LEVEL_CODES[_level] = _code
+    _IS_LEVEL[_level] = True
+
+_INT_COLUMNS = ("pid", "tid", "tag", "line_start", "msg_start", "line_end")
+
+
+def _digits(rows, *positions):
+    """Integer value of the decimal digits at `positions` of fixed-width byte rows."""
+    value = np.zeros(len(rows), dtype=np.int64)
+    for pos in positions:
+        value = value * 10 + (rows[:, pos].astype(np.int64) - ord("0"))
+    return value
+
+
+def stamps_to_ms(rows):
+    """Vectorised yearless `ts` milliseconds of "MM-DD HH:MM:SS.mmm" rows (n x 18 uint8)."""
+    month = np.clip(_digits(rows, 0, 1), 1, 12)
+    days = DAYS_BEFORE_MONTH[month - 1] + _digits(rows, 3, 4) - 1
+    return (
+        days * MS_PER_DAY
+        + _digits(rows, 6, 7) * MS_PER_HOUR
+        + _digits(rows, 9, 10) * 60_000
+        + _digits(rows, 12, 13) * 1000
+        + _digits(rows, 15, 16, 17)
+    )
+
+
+def _right_aligned_number(field):
+    """(values, ok) for a right-aligned, space-padded decimal field (n x width uint8)."""
+    is_digit = (field >= 48) & (field <= 57)
+    ok = is_digit[:, -1] & np.all(is_digit | (field == 32), axis=1)
+    # No space may follow a digit
+    ok &= np.all(is_digit[:, :-1] <= is_digit[:, 1:], axis=1)
+    value = np.zeros(len(field), dtype=np.int64)
+    for col in range(field.shape[1]):
+        value = np.where(is_digit[:, col], value * 10 + field[:, col] - 48, value)
+    return value, ok
+
+
+def chunk_ranges(buf, chunk_size=CHUNK_SIZE):
+    """Splits a buffer into (start, end) ranges that each end after a newline (or at EOF)."""
+    size = len(buf)
+    ranges = []
+    start = 0
+    while start < size:
+        end = buf.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end < 0 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _empty_columns():
+    return {
+        "ts": np.zeros(0, dtype=np.int64),
+        "pid": np.zeros(0, dtype=np.int32),
+        "tid": np.zeros(0, dtype=np.int32),
+        "level": np.zeros(0, dtype=np.uint8),
+        "tag": np.zeros(0, dtype=np.int32),
+        "line_start": np.zeros(0, dtype=np.int64),
+        "msg_start": np.zeros(0, dtype=np.int64),
+        "line_end": np.zeros(0, dtype=np.int64),
+    }
+
+
+def _encode_tags(raw, tag_start, tag_end):
+    """
+    Dictionary-encodes the tags raw[tag_start:tag_end] (trailing padding
+    stripped). Tags of each padded length are compared as fixed-width byte
+    strings, so the work is per distinct length, not per line.
+    """
+    lengths = tag_end - tag_start
+    codes = np.empty(len(lengths), dtype=np.int64)
+    tags, index = [], {}
+    for length in np.unique(lengths).tolist():
+        sel = np.flatnonzero(lengths == length)
+        block = raw[tag_start[sel, None] + np.arange(length)]
+        keys = np.ascontiguousarray(block).view(f"S{max(length, 1)}").ravel() if length else np.zeros(len(sel), "S1")
+        uniques, inverse = np.unique(keys, return_inverse=True)
+        remap = np.empty(len(uniques), dtype=np.int64)
+        for local, tag in enumerate(uniques.tolist()):
+            tag = tag.rstrip(b" ")
+            code = index.get(tag)
+            if code is None:
+                code = index[tag] = len(tags)
+                tags.append(tag)
+            remap[local] = code
+        codes[sel] = remap[inverse.ravel()]
+    return codes, tags
+
+
+def _parse_fixed(raw, starts, ends):
+    """
+    Decodes the lines (offsets into `raw`) that have the fixed-width header.
+    Returns (rows, columns, tag codes, tag byte strings) for the lines that do.
+    """
+    rows = np.flatnonzero(ends - starts > HEADER_WIDTH)
+    header = raw[starts[rows, None] + np.arange(HEADER_WIDTH)]
+    ok = np.all(header[:, _STAMP_DIGITS] - 48 < 10, axis=1)  # uint8 wraps below "0"
+    for pos, char in _HEADER_SEPARATORS.items():
+        ok &= header[:, pos] == char[0]
+    ok &= _IS_LEVEL[header[:, _LEVEL_POS]]
+    pid, pid_ok = _right_aligned_number(header[:, _PID_FIELD])
+    tid, tid_ok = _right_aligned_number(header[:, _TID_FIELD])
+    ok &= pid_ok & tid_ok
+
+    # The tag runs to the first ": " (or ":" at the end of the line) after the header
+    colon = np.flatnonzero(raw == 58)
+    after = raw[np.minimum(colon + 1, len(raw) - 1)]
+    colon = colon[(after == 32) | (after == 10) | (after == 13) | (colon + 1 == len(raw))]
+    tag_start = starts[rows] + HEADER_WIDTH
+    found = np.searchsorted(colon, tag_start)
+    tag_end = colon[np.minimum(found, len(colon) - 1)] if len(colon) else tag_start
+    ok &= (found < len(colon)) & (tag_end < ends[rows])
+
+    rows, header, tag_start, tag_end = rows[ok], header[ok], tag_start[ok], tag_end[ok]
+    tag_codes, tags = _encode_tags(raw, tag_start, tag_end)
+    columns = {
+        "ts": stamps_to_ms(header[:, :STAMP_WIDTH]),
+        "pid": pid[ok],
+        "tid": tid[ok],
+        "level": header[:, _LEVEL_POS],
+        "msg_start": np.minimum(tag_end + 2, ends[rows]),
+    }
+    return rows, columns, tag_codes, tags
+
+
+def _parse_irregular(buf, base, starts, ends, rows):
+    """Regex fallback for the lines `rows` that the fixed-width pass rejected."""
+    matched, values, tags = [], {"ts": [], "pid": [], "tid": [], "level": [], "msg_start": []}, []
+    for row in rows.tolist():
+        end = int(ends[row]) + base
+        m = LINE_RE.match(buf, int(starts[row]) + base, end)
+        if m is None:
+            continue
+        stamp, pid, tid, level, tag = m.groups()
+        matched.append(row)
+        values["ts"].append(stamp)
+        values["pid"].append(int(pid))
+        values["tid"].append(int(tid))
+        values["level"].append(level[0])
+        values["msg_start"].append(min(m.end(), end) - base)
+        tags.append(tag)
+    stamps = np.frombuffer(b"".join(values["ts"]), dtype=np.uint8).reshape(-1, STAMP_WIDTH)
+    columns = {
+        "ts": stamps_to_ms(stamps),
+        "pid": np.array(values["pid"], dtype=np.int64),
+        "tid": np.array(values["tid"], dtype=np.int64),
+        "level": np.array(values["level"], dtype=np.uint8),
+        "msg_start": np.array(values["msg_start"], dtype=np.int64),
+    }
+    return np.array(matched, dtype=np.int64), columns, tags
+
+
+def _parse_buffer(buf, start, end):
+    """Parses buf[start:end]; returns (columns dict, local tag list, skipped line count)."""
+    raw = np.frombuffer(buf, dtype=np.uint8, count=end - start, offset=start)
+    # Line spans relative to `start`, "\r" of CRLF endings excluded
+    ends = np.flatnonzero(raw == 10)
+    starts = np.concatenate(([0], ends + 1))
+    if starts[-1] >= len(raw):
+        starts = starts[:-1]
+    else:
+        ends = np.append(ends, len(raw))
+    ends = ends - ((ends > starts) & (raw[np.maximum(ends - 1, 0)] == 13))
+
+    fixed_rows, fixed, tag_codes, tags = _parse_fixed(raw, starts, ends)
+    rest = np.setdiff1d(np.arange(len(starts)), fixed_rows, assume_unique=True)
+    del raw  # release the buffer export so an mmap can be closed
+    other_rows, other, other_tags = _parse_irregular(buf, start, starts, ends, rest)
+
+    index = {tag: code for code, tag in enumerate(tags)}
+    other_codes = []
+    for tag in other_tags:
+        code = index.get(tag)
+        if code is None:
+            code = index[tag] = len(tags)
+            tags.append(tag)
+        other_codes.append(code)
+
+    rows = np.concatenate((fixed_rows, other_rows))
+    order = np.argsort(rows, kind="stable")
+    rows = rows[order]
+    columns = {name: np.concatenate((fixed[name], other[name]))[order] for name in fixed}
+    columns = {
+        "ts": columns["ts"],
+        "pid": columns["pid"].astype(np.int32),
+        "tid": columns["tid"].astype(np.int32),
+        "level": _LEVEL_CODES[columns["level"]],
+        "tag": np.concatenate((tag_codes, np.array(other_codes, dtype=np.int64)))[order].astype(np.int32),
+        "line_start": starts[rows] + start,
+        "msg_start": columns["msg_start"] + start,
+        "line_end": ends[rows] + start,
+    }
+    tags = [tag.decode("utf-8", errors="replace") for tag in tags]
+    return columns, tags, len(starts) - len(rows)
+
+
+def _parse_range(path, start, end):
+    """Worker entry point: maps the file and parses one range of it."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return _parse_buffer(buf, start, end)
+
+
+class LogcatColumns:
+    """Parsed logcat capture as NumPy columns (see the module notes)."""
+
+    def __init__(self, path, columns, tags, skipped=0):
+        self.path = path
+        self.tags = tags
+        self.skipped = skipped
+        self.ts = columns["ts"]
+        self.pid = columns["pid"]
+        self.tid = columns["tid"]
+        self.level = columns["level"]
+        self.tag = columns["tag"]
+        self.line_start = columns["line_start"]
+        self.msg_start = columns["msg_start"]
+        self.line_end = columns["line_end"]
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __repr__(self):
+        return f"LogcatColumns({self.path!r}, {len(self)} lines, {len(self.tags)} tags)"
+
+    @property
+    def columns(self):
+        return {
+            "ts": self.ts, "pid": self.pid, "tid": self.tid, "level": self.level, "tag": self.tag,
+            "line_start": self.line_start, "msg_start": self.msg_start, "line_end": self.line_end,
+        }
+
+    def _read(self, starts, ends):
+        with open(self.path, "rb") as f:
+            out = []
+            for start, end in zip(starts, ends):
+                f.seek(int(start))
+                out.append(f.read(int(end - start)).decode("utf-8", errors="replace"))
+            return out
+
+    def _rows(self, rows):
+        if isinstance(rows, slice):
+            return np.arange(len(self))[rows]
+        rows = np.asarray(rows)
+        return np.flatnonzero(rows) if rows.dtype == bool else rows
+
+    def message(self, i):
+        return self._read([self.msg_start[i]], [self.line_end[i]])[0]
+
+    def messages(self, rows):
+        """Message text of `rows` (indexes, a slice or a boolean mask), read by offset."""
+        rows = self._rows(rows)
+        return self._read(self.msg_start[rows], self.line_end[rows])
+
+    def lines(self, rows):
+        """Full log lines of `rows` (indexes, a slice or a boolean mask), read by offset."""
+        rows = self._rows(rows)
+        return self._read(self.line_start[rows], self.line_end[rows])
+
+    def tag_code(self, tag):
+        """Code of `tag` in self.tag, or -1 if the capture never uses it."""
+        try:
+            return self.tags.index(tag)
+        except ValueError:
+            return -1
+
+    def hour_counts(self):
+        """(hour index, count) arrays for every yearless hour (ts // 1h) with events."""
+        return np.unique(self.ts // MS_PER_HOUR, return_counts=True)
+
+    def count_by_day_hour(self):
+        """{("MM-DD", "HH"): count}, the shape count_events_by_day_hour returns."""
+        hours, counts = self.hour_counts()
+        dates = np.datetime64("2000-01-01") + (hours // 24).astype("timedelta64[D]")
+        return {
+            (str(date)[5:], f"{hour:02d}"): int(count)
+            for date, hour, count in zip(dates, hours % 24, counts)
+        }
+
+    def to_frame(self):
+        """The columns as a DataFrame, with tag and level as categoricals (messages stay on disk)."""
+        return pd.DataFrame({
+            "ts": self.ts,
+            "pid": self.pid,
+            "tid": self.tid,
+            "level": pd.Categorical.from_codes(self.level, categories=list(LEVELS)),
+            "tag": pd.Categorical.from_codes(self.tag, categories=self.tags),
+            "line_start": self.line_start,
+            "msg_start": self.msg_start,
+            "line_end": self.line_end,
+        })
+
+
+def merge_parts(path, parts):
+    """Concatenates per-chunk results, re-coding each chunk's tags into one dictionary."""
+    tags, tag_index = [], {}
+    columns = {name: [] for name in ("ts", "level") + _INT_COLUMNS}
+    skipped = 0
+    for part_columns, part_tags, part_skipped in parts:
+        remap = np.empty(len(part_tags), dtype=np.int32)
+        for local, tag in enumerate(part_tags):
+            code = tag_index.get(tag)
+            if code is None:
+                code = tag_index[tag] = len(tags)
+                tags.append(tag)
+            remap[local] = code
+        part_columns = dict(part_columns, tag=remap[part_columns["tag"]])
+        for name, values in part_columns.items():
+            columns[name].append(values)
+        skipped += part_skipped
+    merged = _empty_columns()
+    merged.update({name: np.concatenate(values) for name, values in columns.items() if values})
+    return LogcatColumns(path, merged, tags, skipped)
+
+
+def parse_logcat(path, max_workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Parses a threadtime logcat capture into LogcatColumns. Files larger than
+    one chunk are parsed in `max_workers` processes (default: CPU count);
+    `max_workers=1` parses in this process.
+    """
+    path = os.path.abspath(path)
+    if os.path.getsize(path) == 0:
+        return merge_parts(path, [])
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        ranges = chunk_ranges(buf, chunk_size)
+        if max_workers == 1 or len(ranges) == 1:
+            return merge_parts(path, [_parse_buffer(buf, start, end) for start, end in ranges])
+
+    workers = min(max_workers or os.cpu_count() or 1, len(ranges))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        parts = pool.map(_parse_range, [path] * len(ranges), *zip(*ranges))
+        return merge_parts(path, list(parts))
@@ -3,38 +3,220 @@ import gridfs
 import pandas as pd
 import docx
 import re
-from collections import Counter
-import tempfile
-import matplotlib.pyplot as plt
-from fastapi.responses import FileResponse
-from flask import Flask
+import io
+import csv
+import itertools
+import numpy as np
 import datetime
 import os
 import json
-
-app = Flask(__name__)
+import time
+import logging
+import mmap
+import hashlib
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from charts import render_bar_chart, render_line_chart
+from location_parser import LOCATION_KEY_COLUMNS, parse_location_fixes
+from location_clusters import cluster_location_fixes
+from bluetooth_sessions import parse_bluetooth_sessions
+from timeseries import summarize_frame
+from dumpsys_tree import SectionTree, as_section_tree
+from instrumentation import (
+    get_logger, configure_logging, new_section_metrics, count_records, measure_parse,
+    timed_sections, timing_summary, write_timing_summary,
+)
+from report_html import write_html_report, write_json_report
+from section_cache import SECTION_CACHE_DIR, artifact_digest, section_cache_key, load_section, store_section
+
+logger = get_logger("report")
 
 # ---------------- MongoDB Setup ----------------
 client = MongoClient("mongodb://localhost:27017/")
 db = client["forensic_evidence"]
 fs = gridfs.GridFS(db)
 
+# Artifacts are streamed from GridFS in chunks of this many bytes
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+def open_gridfs_artifact(filename, file_id=None):
+    """
+    The GridFS file of an artifact: the version pinned by `file_id` when
+    given (gridfs.errors.NoFile if it has been replaced since), else the
+    current one (None if missing).
+    """
+    if file_id is not None:
+        return fs.get(file_id)
+    return fs.find_one({"filename": filename})
+
 
-def get_file_from_mongo(filename):
-    """Fetch a file from MongoDB GridFS and return content as text."""
-    file_doc = fs.find_one({"filename": filename})
+def get_file_from_mongo(filename, metrics=None, file_id=None):
+    """
+    Fetch a file from MongoDB GridFS and return content as text.
+    Input bytes and lines are added to `metrics` when given. With
+    `file_id`, that pinned version is read and read errors are raised.
+    """
+    file_doc = open_gridfs_artifact(filename, file_id)
     if not file_doc:
-        print(f"[-] File '{filename}' not found in MongoDB.")
+        logger.warning("File '%s' not found in MongoDB.", filename)
         return ""
     try:
-        print(f"File {filename} Found")
+        logger.debug("File %s found", filename)
         data = file_doc.read()
+        if metrics is not None:
+            metrics["input_bytes"] += len(data)
+            metrics["input_lines"] += data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
         # Decode text files; binary files can be handled separately if needed
         return data.decode("utf-8", errors="ignore")
     except Exception as e:
-        print(f"[!] Error reading {filename} from MongoDB: {e}")
+        if file_id is not None:
+            raise
+        logger.error("Error reading %s from MongoDB: %s", filename, e)
         return ""
 
+def iter_stream_lines(stream, chunk_size=STREAM_CHUNK_SIZE, line_filter=None, metrics=None):
+    """
+    Yields decoded text lines from a binary stream (GridFS file or open file).
+
+    The stream is read chunk by chunk and split on b"\\n" before decoding, so
+    an incomplete line, including a multibyte UTF-8 sequence cut by a chunk
+    boundary, is carried over to the next chunk. `line_filter` receives the
+    raw bytes of each line and can drop lines before they are decoded.
+    Bytes and lines read (before filtering) are added to `metrics` when given.
+    """
+    tail = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        raw_lines = (tail + chunk).split(b"\n")
+        tail = raw_lines.pop()
+        if metrics is not None:
+            metrics["input_bytes"] += len(chunk)
+            metrics["input_lines"] += len(raw_lines)
+        for raw in raw_lines:
+            if line_filter is None or line_filter(raw):
+                yield raw.rstrip(b"\r").decode("utf-8", errors="ignore")
+    if tail and metrics is not None:
+        metrics["input_lines"] += 1
+    if tail and (line_filter is None or line_filter(tail)):
+        yield tail.rstrip(b"\r").decode("utf-8", errors="ignore")
+
+
+def iter_gridfs_lines(filename, chunk_size=STREAM_CHUNK_SIZE, line_filter=None, metrics=None, file_id=None):
+    """
+    Streams a GridFS artifact line by line in bounded memory (the version
+    pinned by `file_id` when given, see get_file_from_mongo).
+    """
+    file_doc = open_gridfs_artifact(filename, file_id)
+    if not file_doc:
+        logger.warning("File '%s' not found in MongoDB.", filename)
+        return
+    try:
+        yield from iter_stream_lines(file_doc, chunk_size, line_filter, metrics)
+    except Exception as e:
+        if file_id is not None:
+            raise
+        logger.error("Error reading %s from MongoDB: %s", filename, e)
+
+
+def contains_any(*needles):
+    """Builds a line filter keeping raw lines that contain any of the byte strings."""
+    return lambda raw: any(needle in raw for needle in needles)
+
+
+def _stream_digest(stream):
+    hasher = hashlib.sha256()
+    while chunk := stream.read(STREAM_CHUNK_SIZE):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_artifact_digest(filename, artifact_dir=None):
+    """
+    Returns the sha256 of a GridFS artifact. Uses the digest recorded at
+    acquisition time when present; otherwise hashes the file chunk by chunk.
+    With `artifact_dir`, the copy saved in that folder is hashed instead.
+    """
+    if artifact_dir is not None:
+        path = os.path.join(artifact_dir, filename)
+        if not os.path.isfile(path):
+            return artifact_digest(b"")
+        with open(path, "rb") as f:
+            return _stream_digest(f)
+    return _gridfs_digest(fs.find_one({"filename": filename}))
+
+
+def _gridfs_digest(file_doc):
+    if not file_doc:
+        return artifact_digest(b"")
+    stored = getattr(file_doc, "sha256", None)
+    if stored:
+        return stored
+    return _stream_digest(file_doc)
+
+
+def iter_artifact_file_lines(path, chunk_size=STREAM_CHUNK_SIZE, line_filter=None, metrics=None):
+    """Streams a saved artifact file line by line, like iter_gridfs_lines."""
+    if not os.path.isfile(path):
+        logger.warning("File '%s' not found.", path)
+        return
+    with open(path, "rb") as f:
+        yield from iter_stream_lines(f, chunk_size, line_filter, metrics)
+
+
+def _count_into(metrics, data):
+    metrics["input_bytes"] += len(data)
+    metrics["input_lines"] += data.count(b"\n")
+    return data[-1:]
+
+
+@contextlib.contextmanager
+def map_artifact(filename, path=None, file_id=None, metrics=None):
+    """
+    Yields an artifact as a read-only mmap (b"" if missing or empty): the
+    saved file at `path` is mapped directly, a GridFS artifact is first
+    spooled to a temporary file chunk by chunk. Only pages the parser
+    touches are resident, so a large dump is never held as a Python str.
+    Bytes and lines are added to `metrics` when given.
+    """
+    metrics = metrics if metrics is not None else new_section_metrics()
+    last = b""
+    with contextlib.ExitStack() as stack:
+        if path is not None:
+            if not os.path.isfile(path):
+                logger.warning("File '%s' not found.", path)
+                yield b""
+                return
+            f = stack.enter_context(open(path, "rb"))
+            while chunk := f.read(STREAM_CHUNK_SIZE):
+                last = _count_into(metrics, chunk)
+        else:
+            file_doc = open_gridfs_artifact(filename, file_id)
+            if not file_doc:
+                logger.warning("File '%s' not found in MongoDB.", filename)
+                yield b""
+                return
+            f = stack.enter_context(tempfile.TemporaryFile())
+            while chunk := file_doc.read(STREAM_CHUNK_SIZE):
+                last = _count_into(metrics, chunk)
+                f.write(chunk)
+            f.flush()
+        if not last:
+            yield b""
+            return
+        if last != b"\n":
+            metrics["input_lines"] += 1  # unterminated last line
+        yield stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _iter_lines(source):
+    """Accepts artifact text or an iterable of its lines and yields lines."""
+    return source.splitlines() if isinstance(source, str) else source
+
 def extract_logs_from_file(filepath):
     """Reads up to 20 lines from the given file."""
     parsed_data = []
@@ -46,7 +228,7 @@ def extract_logs_from_file(filepath):
                 raw_lines.append(line.rstrip('\n'))
                 parsed_data.append(line.strip().split())
     except PermissionError as e:
-        print(f"Permission denied when accessing {filepath}: {e}")
+        logger.error("Permission denied when accessing %s: %s", filepath, e)
     return parsed_data, raw_lines
 
 
@@ -70,17 +252,29 @@ def parse_sensor_line(line):
         return [""] * 5
 
 
+# dumpsys section paths (see dumpsys_tree) holding each parser's records.
+# When none of a parser's paths exist in a dump, it scans the whole dump.
+ACCOUNT_SECTIONS = ["User* > Accounts", "User* > RegisteredServicesCache"]
+WIFI_STATE_SECTIONS = ["*ClientModeImpl*", "WifiStateMachine*", "SupplicantStateTracker*"]
+WIFI_SCORE_SECTIONS = ["WifiScoreReport*"]
+WIFI_MLINK_SECTIONS = ["*ClientModeImpl*", "WifiInfo*"]
+BLUETOOTH_BONDED_SECTIONS = ["Bonded devices"]
+LOCATION_PROVIDER_SECTIONS = ["* provider"]
+
+
 def parse_account_info(log_text):
     """
-    Parses Android account-related forensic dump text into two DataFrames:
+    Parses Android account-related forensic dump text (lines or SectionTree) into two DataFrames:
       - Accounts table
       - Registered Services table
+    Only the Accounts / RegisteredServicesCache sections are scanned.
     """
     accounts = []
     services = []
+    tree = as_section_tree(log_text, "account")
 
     # --- Parse accounts ---
-    for line in log_text.splitlines():
+    for line in tree.select_lines(*ACCOUNT_SECTIONS):
         line = line.strip()
         # Match Account {name=..., type=...}
         acc_match = re.match(r'Account\s*\{name=([^,]+),\s*type=([^}]+)\}', line)
@@ -128,7 +322,6 @@ def extract_sensor_timestamps(raw_lines):
 
     for line in raw_lines:
         match = pattern.search(line)
-        print(line)
         if match:
             timestamp = match.group("timestamp")
             sensor_id = match.group("sensor_id")
@@ -208,112 +401,146 @@ column_headers = {
 
 
 # =============================================================== DEBUG =================================================================
-def extract_sensor_data(log_text):
-    sensors = {}
-    current_sensor = None
-    records = []
+# `dumpsys sensorservice` recent-event sections look like:
+#   LSM6DSO Accelerometer: last 50 events
+#   1 (ts=123.456, wall=12:34:56.789) 1.00, 0.00,
+SENSOR_HEADER_RE = r'^(?P<sensor>.*?):.*events$'
+# Turns "1 (ts=123.456, wall=12:34:56.789) 1.00, 0.00," into comma-separated
+# columns: index, "ts", ts, "wall", wall_time, value_1, value_2, ...
+SENSOR_EVENT_TRANS = str.maketrans("()=", ",,,")
+SENSOR_VALUE_OFFSET = 5
 
-    for line in log_text.splitlines():
-        line = line.strip()
 
-        # --- Detect start of a new sensor section ---
-        match_sensor = re.match(r'^(.*?):.*events$', line)
-        print(line)
-        if match_sensor:
-            # Save previous sensor’s records
-            if current_sensor and records:
-                sensors[current_sensor] = pd.DataFrame(records)
-                records = []
-            current_sensor = match_sensor.group(1).strip()
-            continue
+SENSOR_BATCH_LINES = 200_000
 
-        # --- Match event lines ---
-        # Flexible regex for formats like:
-        # 1 (ts=123.456, wall=12:34:56.789) 1.00, 0.00,
-        match_event = re.match(
-            r'^\d+\s*\(ts=([\d.]+),\s*wall=([\d:.]+)\)\s*(.*)', line
-        )
-        if match_event:
-            ts = float(match_event.group(1))
-            wall = match_event.group(2).strip()
-            values_str = match_event.group(3).strip()
-
-            # --- Handle value formats ---
-            if "[value masked]" in values_str:
-                record = {"ts": ts, "wall_time": wall, "values": "[value masked]"}
-            elif values_str:
-                # Extract all numeric values, even if followed by commas
-                nums = [float(x) for x in re.findall(r'[-+]?\d*\.\d+|\d+', values_str)]
-                record = {"ts": ts, "wall_time": wall}
-                for i, val in enumerate(nums, start=1):
-                    record[f"value_{i}"] = val
-            else:
-                record = {"ts": ts, "wall_time": wall}
 
-            records.append(record)
+def sensor_line_filter(raw):
+    """GridFS line filter keeping only sensor section headers and event lines."""
+    return b"(ts=" in raw or raw.rstrip().endswith(b"events")
 
-    # Save last sensor’s data
-    if current_sensor and records:
-        sensors[current_sensor] = pd.DataFrame(records)
 
-    return sensors
+def _parse_sensor_batch(batch, section_offset):
+    """
+    Parses one batch of sensorservice lines.
+    Returns (frame, section_ids, header_names); section ids continue from
+    `section_offset`, and events before the batch's first header belong to
+    the section that was open when the previous batch ended.
+    """
+    lines = pd.Series(batch, dtype=object).str.strip()
+
+    # --- Split the batch into sensor sections ---
+    header_mask = lines.str.endswith("events")
+    headers = lines[header_mask].str.extract(SENSOR_HEADER_RE, expand=False).dropna()
+    header_names = headers.str.strip().tolist()
+    event_mask = lines.str.contains("(ts=", regex=False) & ~lines.index.isin(headers.index)
+    events = lines[event_mask]
+    if events.empty:
+        return None, None, header_names
+
+    # Section of each event = number of headers above it
+    section = np.searchsorted(headers.index.to_numpy(), events.index.to_numpy()) + section_offset
+    in_section = section > 0
+    events, section = events[in_section], section[in_section]
+    if events.empty:
+        return None, None, header_names
+
+    # --- Extract ts / wall time / value columns in a single pass ---
+    masked = events.str.contains("[value masked]", regex=False).to_numpy()
+    joined = "\n".join(events).replace("[value masked]", "").translate(SENSOR_EVENT_TRANS)
+    width = max(map(str.count, joined.split("\n"), itertools.repeat(","))) + 1
+    table = pd.read_csv(
+        io.StringIO(joined), header=None, names=range(width),
+        skipinitialspace=True, quoting=csv.QUOTE_NONE,
+        dtype={1: str, 3: str, 4: str}
+    )
 
+    valid = (
+        pd.to_numeric(table[0], errors="coerce").notna()
+        & (table[1] == "ts") & (table[3] == "wall")
+    ).to_numpy()
+
+    frame = pd.DataFrame({
+        "ts": pd.to_numeric(table[2], errors="coerce").to_numpy(dtype="float64"),
+        "wall_time": table[4].str.strip().to_numpy(dtype=object),
+    })
+    for col in range(SENSOR_VALUE_OFFSET, width):
+        frame[f"value_{col - SENSOR_VALUE_OFFSET + 1}"] = (
+            pd.to_numeric(table[col], errors="coerce").to_numpy(dtype="float64")
+        )
+    if masked.any():
+        frame["values"] = np.where(masked, "[value masked]", None)
 
-def parse_bluetooth_log(doc, text):
-    """Extracts Bluetooth connection and bonded device info."""
-
-    # 1⃣ Connection / Disconnection events
-    print(text)
-    dates = re.findall(r"(\d{2}-\d{2})\s\d{2}:\d{2}:\d{2}\.\d{3}", text)
-
-    print(dates)
-    # Count number of events per day
-    counter = Counter(dates)
-
-    # Convert to pandas Series for plotting
-    df = pd.Series(counter).sort_index()
-    title = "Bluetooth Events Per Day"
-    # Plot bar graph
-    plt.figure(figsize=(10,6))
-    df.plot(kind='bar', color='skyblue')
-    plt.xlabel("Date (MM - DD)")
-    plt.ylabel("Number of Bluetooth Events")
-    plt.title("Bluetooth Events per Day")
-    plt.xticks(rotation=45)
-
-    # Save plot to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-        plt.savefig(tmpfile.name, format='png')
-        plt.close()
-        doc.add_paragraph(title, style='Heading3')
-        doc.add_picture(tmpfile.name, width=docx.shared.Inches(6))
-
-    # 2⃣ Bonded devices
-    bonded_pattern = r"\s*\(Connected\)\s*([0-9A-F:]{17}) \[.*?\] ([^\(]+)"
-
-    bonded_match = re.findall(bonded_pattern, text)
-    bonded_devices = []
-    if bonded_match:
-        for match in bonded_match:
-            bonded_devices.append({
-                    "Device Name": match[1],
-                    "MAC Address": match[0]
-                })
+    return frame[valid], section[valid], header_names
+
+
+def extract_sensor_data(log_text):
+    """
+    Parses `dumpsys sensorservice` event sections into one DataFrame per sensor.
+
+    `log_text` may be the dump text or an iterable of its lines; lines are
+    consumed in batches of SENSOR_BATCH_LINES. Within a batch, sections are
+    located with pandas string methods and all event lines are read in one
+    C-level `read_csv` pass, so no per-event Python objects are built. Each
+    frame has float64 `ts` and `value_1..value_n` columns, the `wall_time`
+    string and, only for sensors with masked events, `values`.
+    """
+    section_names = []
+    frames = []
+    sections = []
+    lines = iter(_iter_lines(log_text))
+    while batch := list(itertools.islice(lines, SENSOR_BATCH_LINES)):
+        frame, section, header_names = _parse_sensor_batch(batch, len(section_names))
+        section_names.extend(header_names)
+        if frame is not None and not frame.empty:
+            frames.append(frame)
+            sections.append(section)
+
+    if not frames:
+        return {}
+    frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+    section = np.concatenate(sections)
+
+    # --- One frame per sensor; keep only the columns that sensor filled ---
+    sensors = {}
+    for section_id, df in frame.groupby(section, sort=False):
+        sensor_name = section_names[section_id - 1]
+        sensors[sensor_name] = df.dropna(axis=1, how="all").reset_index(drop=True)
+
+    return sensors
 
-    df_bonded = pd.DataFrame(bonded_devices)
 
-    return df_bonded
+def parse_bluetooth_log(text):
+    """
+    Reconstructs Bluetooth connection sessions and bonded devices.
+    Returns (events_per_day_png, tables) where tables is the dict from
+    bluetooth_sessions.parse_bluetooth_sessions; the chart is PNG bytes so it
+    can be produced in a worker process and added to the report later.
+    """
+    tree = as_section_tree(text, "bluetooth_manager")
+    bonded = tree.select(*BLUETOOTH_BONDED_SECTIONS)
+    tables = parse_bluetooth_sessions(
+        tree.root.lines(exclude=bonded),
+        bonded_lines=(line for section in bonded for line in section.lines()) if bonded else None,
+    )
+    daily = tables["daily"]
+    events_chart = render_bar_chart(
+        daily["Date"], daily["Connections"] + daily["Disconnections"],
+        title="Bluetooth Events per Day",
+        xlabel="Date (MM - DD)",
+        ylabel="Number of Bluetooth Events",
+    )
+    return events_chart, tables
 
 
 def extract_ip_info(output_text):
     """
-    Parse ADB `ip addr` output and return a pandas DataFrame
+    Parse ADB `ip addr` output (text or lines) and return a pandas DataFrame
     with columns: Interface, Status, MTU, IPv4, Broadcast, IPv6, MAC, Notes
     mapped to value_1, value_2, ..., value_8 for consistency.
     """
     interfaces = []
     current_iface = {}
-    for line in output_text.splitlines():
+    for line in _iter_lines(output_text):
         line = line.strip()
         if re.match(r'^\d+:', line):
             # New interface line
@@ -366,38 +593,22 @@ def extract_ip_info(output_text):
     return df
 
 def get_location(location_file):
-    with open(location_file,'r', encoding = 'utf-8') as f:
-        location_text = f.read()
-        regex = re.compile(
-            r'Location\[(?:provider=)?(?P<provider>[\w\-]+)?\s*(?P<lat>-?\d+\.\d+)[, ]+(?P<lon>-?\d+\.\d+).*?(?:hAcc=(?P<acc>\d+\.?\d*))?',
-            re.IGNORECASE | re.DOTALL
-        )
-
-        matches = list(regex.finditer(location_text))
-        records = []
-        for m in matches:
-            records.append({
-                "provider": m.group("provider"),
-                "latitude": float(m.group("lat")),
-                "longitude": float(m.group("lon")),
-                "accuracy": float(m.group("acc")) if m.group("acc") else None
-            })
+    """Parse location fixes from a saved `dumpsys location` file."""
+    with open(location_file, 'r', encoding='utf-8', errors='ignore') as f:
+        return parse_location_fixes(f)
 
-        # Convert to DataFrame
-        df = pd.DataFrame(records)
-
-    return df
 
-
-def parse_wifi_log_extended(log_text: str):
+def parse_wifi_log_extended(log_text):
     """
-    Parse ADB Wi-Fi diagnostic logs including:
+    Parse ADB Wi-Fi diagnostic logs (text, lines or SectionTree) including:
       - SSID/BSSID connection info
       - Connection metrics
       - Supplicant state transitions
       - Multi-Link (Mlink) info
+    Each record type is read from its own dumpsys sections (WIFI_*_SECTIONS).
     Returns a dict of DataFrames.
     """
+    tree = as_section_tree(log_text, "wifi")
     dfs = {}
 
     # 1⃣ ---- Wi-Fi SSID/BSSID Info ----
@@ -416,15 +627,6 @@ def parse_wifi_log_extended(log_text: str):
         r'state:\s*COMPLETED', 
         re.IGNORECASE
     )
-    ssid_records = []
-    for line in log_text.splitlines():
-        m = ssid_pattern.search(line)
-        if m:
-            ssid_records.append({
-                "timestamp": m.group('timestamp'),
-                "ssid": m.group('ssid'),
-                "bssid": m.group('bssid')
-            })
 
     # 2⃣ ---- Wi-Fi Metrics ----
     wifi_pattern = re.compile(
@@ -435,51 +637,59 @@ def parse_wifi_log_extended(log_text: str):
         r".*?filtered_rssi=(?P<filtered_rssi>[^,]+),?"
         r".*?freq=(?P<freq>[^,]+),?"
         r".*?txLinkSpeed=(?P<txLinkSpeed>[^,]+),?"
-        r".*?rxLinkSpeed=(?P<rxLinkSpeed>[^,]+),?",
-        re.DOTALL
+        r".*?rxLinkSpeed=(?P<rxLinkSpeed>[^,]+),?"
     )
-    wifi_records = []
-    for line in log_text.splitlines():
-        if "rssi=" in line and "txLinkSpeed=" in line:
-            m = wifi_pattern.search(line)
-            if m:
-                wifi_records.append(m.groupdict())
 
     # 3⃣ ---- Supplicant State Tracker ----
     supplicant_pattern = re.compile(
         r"rec\[\d+\]: time=(?P<time>[\d\-:\.\s]+).*?"
         r"org=(?P<org_state>\S+).*?"
         r"dest=(?P<dest_state>\S*).*?"  # allow empty dest
-        r"what=(?P<what>[0-9xXA-F]+)",
-        re.DOTALL
+        r"what=(?P<what>[0-9xXA-F]+)"
     )
-    supplicant_records = [m.groupdict() for m in supplicant_pattern.finditer(log_text)]
-
-    # Filter out rows where dest_state is empty
-    supplicant_records = [r for r in supplicant_records if r["dest_state"].strip() != "<null>"]
-
-    # Convert to DataFrame
-    if supplicant_records:
-        dfs["supplicant_states"] = pd.DataFrame(supplicant_records)
 
     # 4⃣ ---- Mlink / Multi-Link Operation ----
     mlink_pattern = re.compile(
         r"\{linkId=(?P<linkId>\d+),linkRssi=(?P<linkRssi>[^,]+),linkFreq=(?P<linkFreq>[^,]+),"
-        r"txLinkSpeed=(?P<txLinkSpeed>[^,]+),rxLinkSpeed=(?P<rxLinkSpeed>[^,]+).*?\}",
-        re.DOTALL
+        r"txLinkSpeed=(?P<txLinkSpeed>[^,]+),rxLinkSpeed=(?P<rxLinkSpeed>[^,]+).*?\}"
     )
 
+    # Every record is matched within its own line, inside its own sections
+    ssid_records = []
+    wifi_records = []
+    supplicant_records = []
+    mlink_records = []
+    for line in tree.select_lines(*WIFI_STATE_SECTIONS):
+        if "rec[" in line:
+            m = ssid_pattern.search(line)
+            if m:
+                ssid_records.append({
+                    "timestamp": m.group('timestamp'),
+                    "ssid": m.group('ssid'),
+                    "bssid": m.group('bssid')
+                })
+            m = supplicant_pattern.search(line)
+            # Filter out rows where dest_state is empty
+            if m and m.group("dest_state").strip() != "<null>":
+                supplicant_records.append(m.groupdict())
 
+    for line in tree.select_lines(*WIFI_SCORE_SECTIONS):
+        if "rssi=" in line and "txLinkSpeed=" in line:
+            m = wifi_pattern.search(line)
+            if m:
+                wifi_records.append(m.groupdict())
 
-    mlink_records = [m.groupdict() for m in mlink_pattern.finditer(log_text)]
+    for line in tree.select_lines(*WIFI_MLINK_SECTIONS):
+        if "{linkId=" in line:
+            mlink_records.extend(m.groupdict() for m in mlink_pattern.finditer(line))
 
     # Convert to DataFrames
+    if supplicant_records:
+        dfs["supplicant_states"] = pd.DataFrame(supplicant_records)
     if ssid_records:
         dfs["wifi_networks"] = pd.DataFrame(ssid_records)
     if wifi_records:
         dfs["wifi_metrics"] = pd.DataFrame(wifi_records)
-    if supplicant_records:
-        dfs["supplicant_states"] = pd.DataFrame(supplicant_records)
     if mlink_records:
         dfs["mlink_info"] = pd.DataFrame(mlink_records)
 
@@ -487,39 +697,14 @@ def parse_wifi_log_extended(log_text: str):
 
 
 def parse_location_data(loc_path):
-    with open(loc_path, 'r', encoding="utf-8") as f:
-        log_text = f.read()
-    
-    regex = re.compile(
-        r'Location\[(?:provider=)?(?P<provider>[\w\-]+)?\s*'
-        r'(?P<lat>-?\d+\.\d+)[, ]+(?P<lon>-?\d+\.\d+).*?'
-        r'(?:hAcc=(?P<acc>\d+\.?\d*))?',
-        re.IGNORECASE | re.DOTALL
-    )
-
-    matches = list(regex.finditer(log_text))
-    if not matches:
-        print("[-] No coordinate patterns found in dumpsys output.")
-        df = pd.DataFrame(columns=["timestamp", "provider", "lat", "lon", "accuracy"])
+    """Parse location fixes from a saved `dumpsys location` file and print a summary."""
+    df = get_location(loc_path)
+    if df.empty:
+        logger.warning("No coordinate patterns found in dumpsys output.")
     else:
-        rows = []
-        for m in matches:
-            provider = m.group('provider') or 'unknown'
-            lat = float(m.group('lat'))
-            lon = float(m.group('lon'))
-            acc = m.group('acc')
-            ts = datetime.datetime.now().isoformat()
-            rows.append({
-                "timestamp": ts,
-                "provider": provider,
-                "lat": lat,
-                "lon": lon,
-                "accuracy": float(acc) if acc else None
-            })
-
-        df = pd.DataFrame(rows)
-        print(f" Parsed {len(df)} location entries.")
-        print(df)
+        logger.info("Parsed %d location entries.", len(df))
+        logger.debug("%s", df)
+    return df
 
 log_files = {
     "Account Information": "account_information.txt",
@@ -549,87 +734,361 @@ log_files = {
     "Location Information": "dumpsys_location.txt"
 }
 
-# ---------------- Forensic Report Generation ----------------
-def generate_forensic_report(output_dir="downloads"):
-    """Generates the forensic .docx report using MongoDB data."""
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, "Preliminary_Forensic_Report.docx")
-
-    doc = docx.Document()
-    doc.add_paragraph("Preliminary Forensic Report", style='Title')
-    
-    
-    # --- Account Info ---
-    acc_text = get_file_from_mongo(log_files["Account Information"])
+# ---------------- Report Sections ----------------
+# Raw fixes beyond this are summarised by the stay/trip tables instead
+MAX_RAW_LOCATION_ROWS = 200
+MAX_BLUETOOTH_SESSION_ROWS = 200
+# Numeric series (sensor axes, Wi-Fi RSSI / link speed) are summarised and
+# charted in full; only this many raw samples are listed per table
+MAX_RAW_METRIC_ROWS = 200
+MAX_CHART_POINTS = 1000
+WIFI_METRIC_COLUMNS = ["rssi", "filtered_rssi", "txLinkSpeed", "rxLinkSpeed"]
+
+# Each section builder turns one artifact's text into an ordered list of
+# blocks: ("table", title, DataFrame) or ("image", title, png_bytes).
+# Builders are module-level so they can run in worker processes.
+
+def build_account_section(acc_text):
     acc_df, service_df = parse_account_info(acc_text)
-    add_dataframe_to_doc(doc, acc_df, "Account Information")
-    add_dataframe_to_doc(doc, service_df, "Service Information")
+    return [
+        ("table", "Account Information", acc_df),
+        ("table", "Service Information", service_df),
+    ]
+
+
+def _wifi_metric_times(times, year=None):
+    """Seconds since the epoch for WifiScoreReport `MM-DD hh:mm:ss` stamps (NaN if unparsable)."""
+    year = year or datetime.datetime.now().year
+    stamps = pd.to_datetime(f"{year}-" + times.astype(str).str.strip(), format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    return (stamps - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+
 
-    # --- Wi-Fi Info ---
-    wifi_text = get_file_from_mongo(log_files["WiFi Information"])
+def build_wifi_metric_blocks(metrics_df):
+    """Summary table and RSSI / link-speed charts for the wifi_metrics frame."""
+    t = _wifi_metric_times(metrics_df["time"])
+    summary, lines = summarize_frame(
+        t, metrics_df, WIFI_METRIC_COLUMNS, prefix="Wi-Fi ", max_points=MAX_CHART_POINTS
+    )
+    for col in ("Start", "End"):
+        summary[col] = pd.to_datetime(summary[col], unit="s")
+    blocks = [("table", "Wi-Fi Metric Summary", summary)]
+    for title, ylabel, cols in (
+        ("Wi-Fi RSSI", "dBm", ("rssi", "filtered_rssi")),
+        ("Wi-Fi Link Speed", "Mbps", ("txLinkSpeed", "rxLinkSpeed")),
+    ):
+        chart_lines = {
+            col: (pd.to_datetime(lines[col][0], unit="s").to_numpy(), lines[col][1])
+            for col in cols if col in lines
+        }
+        if chart_lines:
+            blocks.append(("image", title, render_line_chart(chart_lines, title=title, xlabel="Time", ylabel=ylabel)))
+    return blocks
+
+
+def build_wifi_section(wifi_text):
     wifi_df_dict = parse_wifi_log_extended(wifi_text)
+    blocks = []
     for section_name, df in wifi_df_dict.items():
-        add_dataframe_to_doc(doc, df, f"Wi-Fi: {section_name.replace('_', ' ').title()}")
+        title = f"Wi-Fi: {section_name.replace('_', ' ').title()}"
+        if section_name == "wifi_metrics":
+            blocks.extend(build_wifi_metric_blocks(df))
+            if len(df) > MAX_RAW_METRIC_ROWS:
+                title = f"{title} (first {MAX_RAW_METRIC_ROWS} of {len(df)} samples)"
+                df = df.head(MAX_RAW_METRIC_ROWS)
+        blocks.append(("table", title, df))
+    return blocks
+
+
+def build_bluetooth_section(bt_text):
+    events_chart, tables = parse_bluetooth_log(bt_text)
+    sessions = tables["sessions"]
+    if len(sessions) > MAX_BLUETOOTH_SESSION_ROWS:
+        sessions_title = f"Bluetooth Connection Sessions (last {MAX_BLUETOOTH_SESSION_ROWS} of {len(sessions)})"
+        sessions = sessions.tail(MAX_BLUETOOTH_SESSION_ROWS)
+    else:
+        sessions_title = "Bluetooth Connection Sessions"
+    return [
+        ("image", "Bluetooth Events Per Day", events_chart),
+        ("table", "Bluetooth Connections Per Day", tables["daily"]),
+        ("table", "Bluetooth Devices", tables["devices"]),
+        ("table", sessions_title, sessions),
+        ("table", "Bonded Bluetooth Devices", tables["bonded"]),
+    ]
 
-    # --- Bluetooth Info ---
-    bt_text = get_file_from_mongo(log_files["Bluetooth Information"])
-    df_bonded = parse_bluetooth_log(doc, bt_text)
-    add_dataframe_to_doc(doc, df_bonded, "Bonded Bluetooth Devices")
 
-    # --- Location Info ---
-    loc_text = get_file_from_mongo(log_files["Location Information"])
+def build_location_section(loc_text):
     loc_df = get_location_text(loc_text)
-    add_dataframe_to_doc(doc, loc_df, "Location Information")
+    stays_df, trips_df = cluster_location_fixes(loc_df)
+    if len(loc_df) > MAX_RAW_LOCATION_ROWS:
+        fixes_title = f"Location Information (first {MAX_RAW_LOCATION_ROWS} of {len(loc_df)} fixes)"
+        loc_df = loc_df.head(MAX_RAW_LOCATION_ROWS)
+    else:
+        fixes_title = "Location Information"
+    return [
+        ("table", "Location Stay Points", stays_df),
+        ("table", "Location Trips", trips_df),
+        ("table", fixes_title, loc_df),
+    ]
+
 
-    # --- Sensor Data ---
-    sensor_text = get_file_from_mongo(log_files["Sensor Data"])
+def build_sensor_section(sensor_text):
     sensor_dataframes = extract_sensor_data(sensor_text)
+    summaries = []
+    blocks = []
     for sensor_name, df in sensor_dataframes.items():
-        add_dataframe_to_doc(doc, df, sensor_name)
+        value_cols = [col for col in df.columns if col.startswith("value_")]
+        summary, lines = summarize_frame(
+            df["ts"], df, value_cols, prefix=f"{sensor_name} ", max_points=MAX_CHART_POINTS
+        )
+        summaries.append(summary)
+        if lines:
+            blocks.append(("image", sensor_name, render_line_chart(
+                lines, title=f"{sensor_name} ({len(df)} events)", xlabel="Timestamp (s)", ylabel="Value"
+            )))
+        if len(df) > MAX_RAW_METRIC_ROWS:
+            blocks.append(("table", f"{sensor_name} (first {MAX_RAW_METRIC_ROWS} of {len(df)} events)",
+                           df.head(MAX_RAW_METRIC_ROWS)))
+        else:
+            blocks.append(("table", sensor_name, df))
+    if summaries:
+        blocks.insert(0, ("table", "Sensor Summary", pd.concat(summaries, ignore_index=True)))
+    return blocks
+
 
-    # --- IP Info ---
-    ip_text = get_file_from_mongo(log_files["Ip information"])
+def build_ip_section(ip_text):
     ip_df = extract_ip_info(ip_text)
-    add_dataframe_to_doc(doc, ip_df, "IP Address Information")
+    return [("table", "IP Address Information", ip_df)]
+
+
+# Sections in the order they appear in the report, keyed by log_files entry.
+# Bump a section's parser version whenever its builder output changes so
+# cached results for that section are recomputed.
+report_sections = [
+    ("Account Information", build_account_section, 2),
+    ("WiFi Information", build_wifi_section, 4),
+    ("Bluetooth Information", build_bluetooth_section, 3),
+    ("Location Information", build_location_section, 5),
+    ("Sensor Data", build_sensor_section, 2),
+    ("Ip information", build_ip_section, 1),
+]
+
+
+# Raw-byte filters applied to an artifact's lines before decoding, whether
+# streamed or read from a section tree
+section_line_filters = {
+    "Sensor Data": sensor_line_filter,
+    "Location Information": contains_any(b"Location["),
+}
+
+# Sections whose parsers query a dumpsys SectionTree; their builders get the
+# artifact indexed once over an mmap (see map_artifact) instead of a line
+# stream. Values name the dumpsys service so paths may start with it.
+section_tree_roots = {
+    "Account Information": "account",
+    "WiFi Information": "wifi",
+    "Bluetooth Information": "bluetooth_manager",
+    "Location Information": "location",
+}
+
+
+def build_section(section, artifact_dir=None, file_id=None):
+    """
+    Loads one section's artifact from GridFS (the version pinned by
+    `file_id` when given), or from `artifact_dir`, and builds its blocks
+    (runs in a worker). Returns (blocks, metrics) with the section's input
+    and parse metrics (instrumentation.SECTION_METRICS).
+    """
+    builder = {name: builder for name, builder, _ in report_sections}[section]
+    filename = log_files[section]
+    path = os.path.join(artifact_dir, filename) if artifact_dir is not None else None
+    metrics = new_section_metrics()
+    with measure_parse(metrics):
+        line_filter = section_line_filters.get(section)
+        if section in section_tree_roots:
+            with map_artifact(filename, path, file_id, metrics) as buf:
+                blocks = builder(SectionTree(buf, section_tree_roots[section], line_filter))
+        else:
+            if path:
+                lines = iter_artifact_file_lines(path, line_filter=line_filter, metrics=metrics)
+            else:
+                lines = iter_gridfs_lines(filename, line_filter=line_filter, metrics=metrics, file_id=file_id)
+            blocks = builder(lines)
+    metrics["records"] = count_records(blocks)
+    logger.info(
+        "%s: parsed %d bytes / %d lines into %d records in %.3f s",
+        section, metrics["input_bytes"], metrics["input_lines"], metrics["records"], metrics["parse_s"],
+    )
+    return blocks, metrics
+
+
+def add_blocks_to_doc(doc, blocks):
+    """Writes section blocks (tables and PNG images) into the Word doc in order."""
+    for kind, title, payload in blocks:
+        if kind == "table":
+            add_dataframe_to_doc(doc, payload, title)
+        elif kind == "image":
+            doc.add_paragraph(title, style='Heading3')
+            doc.add_picture(io.BytesIO(payload), width=docx.shared.Inches(6))
+
+
+# ---------------- Forensic Report Generation ----------------
+def get_section_digests(artifact_dir=None):
+    """Returns {section: artifact sha256} for every report section."""
+    return {section: get_artifact_digest(log_files[section], artifact_dir) for section, _, _ in report_sections}
 
-    # Save to DOCX
+
+def pin_artifacts(artifact_dir=None):
+    """
+    ({section: artifact sha256}, {section: GridFS file id}) for the current
+    artifacts. Building with those ids reads exactly the versions the
+    digests describe, even if an artifact is replaced meanwhile. Saved
+    artifacts in `artifact_dir` have no ids.
+    """
+    if artifact_dir is not None:
+        return get_section_digests(artifact_dir), {}
+    digests, file_ids = {}, {}
+    for section, _, _ in report_sections:
+        file_doc = fs.find_one({"filename": log_files[section]})
+        digests[section] = _gridfs_digest(file_doc)
+        if file_doc:
+            file_ids[section] = file_doc._id
+    return digests, file_ids
+
+
+def report_input_key(digests=None, artifact_dir=None):
+    """Key identifying a report by its section inputs and parser versions."""
+    digests = digests or get_section_digests(artifact_dir)
+    return artifact_digest("\n".join(
+        section_cache_key(section, version, digests[section])
+        for section, _, version in report_sections
+    ))
+
+
+def generate_forensic_report(output_dir="downloads", max_workers=None, cache_dir=SECTION_CACHE_DIR,
+                             digests=None, progress=None, formats=("docx",), artifact_dir=None,
+                             file_ids=None):
+    """
+    Generates the forensic report using MongoDB data, or from the artifact
+    files saved in `artifact_dir` (same names as `log_files`) when given.
+
+    Each section is cached under the digest of its input artifact and its
+    parser version; only sections whose inputs changed are rebuilt. Those
+    are streamed from GridFS line by line and parsed and rendered in worker
+    processes, and blocks are written in the fixed `report_sections` order,
+    so the output does not depend on which worker finishes first.
+    `formats` picks the renderers from REPORT_FORMATS ("docx", "html",
+    "json"); all of them share the same section blocks. Returns
+    {format: output path}.
+
+    `max_workers=1` builds all sections in-process; `cache_dir=None`
+    disables the cache. `digests` may carry precomputed section digests,
+    with `file_ids` pinning the GridFS versions they were computed from
+    (see pin_artifacts; without digests both are pinned here), and `progress(section, state)` is called as each section becomes
+    "cached", "running" or "done".
+
+    Per-section input size, records, parse/render time and memory delta are
+    logged and written to Preliminary_Forensic_Report.timings.json.
+    """
+    started = time.perf_counter()
+    progress = progress or (lambda section, state: None)
+    if not digests:
+        digests, file_ids = pin_artifacts(artifact_dir)
+    file_ids = file_ids or {}
+    unknown = set(formats) - set(REPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported report format(s): {', '.join(sorted(unknown))}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    section_blocks = {}
+    metrics = {}
+    pending = {}
+    for section, _, version in report_sections:
+        key = section_cache_key(section, version, digests[section])
+        cached = load_section(key, cache_dir)
+        if cached is not None:
+            logger.info("%s unchanged, using cached section.", section)
+            section_blocks[section] = cached
+            metrics[section] = new_section_metrics()
+            metrics[section].update(cached=True, records=count_records(cached))
+            progress(section, "cached")
+        else:
+            pending[section] = key
+
+    if max_workers == 1 or len(pending) <= 1:
+        for section in pending:
+            progress(section, "running")
+            section_blocks[section], metrics[section] = build_section(section, artifact_dir, file_ids.get(section))
+            progress(section, "done")
+    elif pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        # "spawn" gives each worker its own MongoClient instead of a forked copy
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=configure_logging,
+                                 initargs=(logging.getLevelName(logger.getEffectiveLevel()),)) as pool:
+            futures = {}
+            for section in pending:
+                futures[pool.submit(build_section, section, artifact_dir, file_ids.get(section))] = section
+                progress(section, "running")
+            for future in as_completed(futures):
+                section_blocks[futures[future]], metrics[futures[future]] = future.result()
+                progress(futures[future], "done")
+
+    for section, key in pending.items():
+        store_section(key, section_blocks[section], cache_dir)
+
+    ordered = [(section, section_blocks[section]) for section, _, _ in report_sections]
+    output_paths = {}
+    for fmt in formats:
+        output_path = os.path.join(output_dir, f"Preliminary_Forensic_Report.{fmt}")
+        REPORT_FORMATS[fmt](timed_sections(ordered, metrics, fmt), output_path)
+        logger.info("Forensic report saved to: %s", output_path)
+        output_paths[fmt] = output_path
+
+    summary = timing_summary(
+        {section: metrics[section] for section, _, _ in report_sections},
+        time.perf_counter() - started, list(output_paths.values()),
+    )
+    write_timing_summary(summary, os.path.join(output_dir, "Preliminary_Forensic_Report.timings.json"))
+    logger.info("Report timing summary: %s", json.dumps(summary["totals"]))
+    return output_paths
+
+
+def write_docx_report(sections, output_path):
+    """Writes ordered (section, blocks) pairs into a Word document."""
+    doc = docx.Document()
+    doc.add_paragraph("Preliminary Forensic Report", style='Title')
+    for _, blocks in sections:
+        add_blocks_to_doc(doc, blocks)
     doc.save(output_path)
-    print(f"Forensic report saved to: {output_path}")
     return output_path
 
-# ---------------- Flask Route ----------------
-@app.get("/download_report")
-def download_report():
-    report_path = "downloads/Preliminary_Forensic_Report.docx"
-    if os.path.exists(report_path):
-        return FileResponse(
-            path=report_path,
-            filename="Preliminary_Forensic_report.docx",
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-    return {"error": "Report not found"}
+
+# Output renderers by file extension; all of them consume the same blocks
+REPORT_FORMATS = {
+    "docx": write_docx_report,
+    "html": write_html_report,
+    "json": write_json_report,
+}
 
 
 # ---------------- Helper for location text ----------------
-def get_location_text(location_text):
-    """Parse location text from MongoDB (previously from file)."""
-    regex = re.compile(
-        r'Location\[(?:provider=)?(?P<provider>[\w\-]+)?\s*'
-        r'(?P<lat>-?\d+\.\d+)[, ]+(?P<lon>-?\d+\.\d+).*?'
-        r'(?:hAcc=(?P<acc>\d+\.?\d*))?',
-        re.IGNORECASE | re.DOTALL
-    )
-    matches = list(regex.finditer(location_text))
-    records = []
-    for m in matches:
-        records.append({
-            "provider": m.group("provider") or "unknown",
-            "latitude": float(m.group("lat")),
-            "longitude": float(m.group("lon")),
-            "accuracy": float(m.group("acc")) if m.group("acc") else None
-        })
-    return pd.DataFrame(records)
+def get_location_text(location_text, year=None):
+    """
+    Parse location fixes from `dumpsys location` text, lines or SectionTree.
+    Records inside a "<name> provider" section default to that provider.
+    `year` is passed on to parse_location_fixes for `MM-DD` log stamps.
+    """
+    tree = as_section_tree(location_text, "location")
+    providers = tree.select(*LOCATION_PROVIDER_SECTIONS)
+    frames = [parse_location_fixes(tree.root.lines(exclude=providers), year)]
+    for section in providers:
+        frames.append(parse_location_fixes(section.lines(), year, default_provider=section.name.rsplit(" ", 1)[0]))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset=LOCATION_KEY_COLUMNS).reset_index(drop=True)
 
 # ---------------- Main ----------------
 if __name__ == "__main__":
+    configure_logging()
     generate_forensic_report()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import json
+import gzip
+import base64
+import html
+import datetime
+
+# Lightweight renderers for the preliminary report that reuse the section
+# blocks built for the DOCX: ("table", title, DataFrame) / ("image", title, png).
+#
+# The HTML report is written section by section. Each table is embedded as
+# gzip-compressed JSON and only decoded and drawn (with sortable columns)
+# when the analyst expands it, so large acquisitions still open quickly.
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+  body {{ font-family: -apple-system, "Segoe UI", Roboto, Arial, sans-serif; margin: 24px; color: #222; }}
+  h1 {{ border-bottom: 2px solid #444; padding-bottom: 6px; }}
+  h2 {{ margin-top: 32px; color: #333; }}
+  details {{ margin: 10px 0; }}
+  summary {{ cursor: pointer; font-weight: 600; }}
+  table {{ border-collapse: collapse; margin-top: 8px; font-size: 13px; }}
+  th, td {{ border: 1px solid #ccc; padding: 3px 8px; text-align: left; }}
+  th {{ background: #f0f0f0; cursor: pointer; user-select: none; position: sticky; top: 0; }}
+  th.asc::after {{ content: " \\25B2"; }}
+  th.desc::after {{ content: " \\25BC"; }}
+  .empty {{ color: #888; font-style: italic; }}
+  .meta {{ color: #666; font-size: 13px; }}
+  img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p class="meta">Generated {generated_at}</p>
+"""
+
+HTML_TAIL = """<script>
+async function loadTable(details) {
+  if (details.dataset.loaded) return;
+  details.dataset.loaded = "1";
+  const payload = document.getElementById(details.dataset.table).textContent.trim();
+  const bytes = Uint8Array.from(atob(payload), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  const data = JSON.parse(await new Response(stream).text());
+  const table = details.querySelector("table");
+  const head = table.createTHead().insertRow();
+  data.columns.forEach((name, i) => {
+    const th = document.createElement("th");
+    th.textContent = name;
+    th.onclick = () => sortTable(table, data, i, th);
+    head.appendChild(th);
+  });
+  renderRows(table, data.data);
+}
+function renderRows(table, rows) {
+  const old = table.tBodies[0];
+  if (old) old.remove();
+  const body = table.createTBody();
+  const frag = document.createDocumentFragment();
+  for (const row of rows) {
+    const tr = document.createElement("tr");
+    for (const value of row) {
+      const td = document.createElement("td");
+      td.textContent = value === null ? "" : value;
+      tr.appendChild(td);
+    }
+    frag.appendChild(tr);
+  }
+  body.appendChild(frag);
+}
+function sortTable(table, data, col, th) {
+  const desc = th.classList.contains("asc");
+  table.querySelectorAll("th").forEach(h => h.classList.remove("asc", "desc"));
+  th.classList.add(desc ? "desc" : "asc");
+  data.data.sort((a, b) => {
+    const x = a[col], y = b[col];
+    if (x === y) return 0;
+    if (x === null) return 1;
+    if (y === null) return -1;
+    const r = (typeof x === "number" && typeof y === "number") ? x - y : String(x).localeCompare(String(y), undefined, {numeric: true});
+    return desc ? -r : r;
+  });
+  renderRows(table, data.data);
+}
+document.querySelectorAll("details[data-table]").forEach(d =>
+  d.addEventListener("toggle", () => { if (d.open) loadTable(d); }));
+</script>
+</body>
+</html>
+"""
+
+
+def _table_json(df):
+    """Serialises a DataFrame as {"columns": [...], "data": [[...]]} JSON text."""
+    return df.to_json(orient="split", index=False, date_format="iso", default_handler=str)
+
+
+def write_html_report(sections, output_path, title="Preliminary Forensic Report"):
+    """
+    Streams a self-contained HTML report.
+    `sections` is an ordered iterable of (section_name, blocks).
+    """
+    table_id = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write(HTML_HEAD.format(
+            title=html.escape(title),
+            generated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+        for section, blocks in sections:
+            out.write(f"<section>\n<h2>{html.escape(section)}</h2>\n")
+            for kind, block_title, payload in blocks:
+                if kind == "image":
+                    out.write(f"<h3>{html.escape(block_title)}</h3>\n<img alt=\"{html.escape(block_title)}\" src=\"data:image/png;base64,")
+                    out.write(base64.b64encode(payload).decode("ascii"))
+                    out.write("\">\n")
+                elif payload.empty:
+                    out.write(f"<p class=\"empty\">{html.escape(block_title)} - No data found.</p>\n")
+                else:
+                    table_id += 1
+                    packed = base64.b64encode(gzip.compress(_table_json(payload).encode("utf-8"), compresslevel=6))
+                    out.write(
+                        f"<details data-table=\"t{table_id}\"><summary>{html.escape(block_title)} "
+                        f"({len(payload)} rows)</summary><table></table></details>\n"
+                        f"<script type=\"application/octet-stream\" id=\"t{table_id}\">"
+                    )
+                    out.write(packed.decode("ascii"))
+                    out.write("</script>\n")
+            out.write("</section>\n")
+        out.write(HTML_TAIL)
+    return output_path
+
+
+def write_json_report(sections, output_path, title="Preliminary Forensic Report"):
+    """
+    Streams a machine-readable JSON export of the section tables.
+    Charts are listed by title only; their images are in the HTML/DOCX reports.
+    """
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write("{")
+        out.write(f"\"title\": {json.dumps(title)}, ")
+        out.write(f"\"generated_at\": {json.dumps(datetime.datetime.now().isoformat(timespec='seconds'))}, ")
+        out.write("\"sections\": [")
+        for s_index, (section, blocks) in enumerate(sections):
+            out.write(("," if s_index else "") + f"\n{{\"name\": {json.dumps(section)}, \"blocks\": [")
+            for b_index, (kind, block_title, payload) in enumerate(blocks):
+                out.write(("," if b_index else "") + f"\n{{\"type\": \"{kind}\", \"title\": {json.dumps(block_title)}")
+                if kind == "table":
+                    out.write(", \"table\": ")
+                    out.write(_table_json(payload))
+                out.write("}")
+            out.write("]}")
+        out.write("\n]}\n")
+    return output_path
@@ -0,0 +1,232 @@
+import os
+import uuid
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, jsonify, request, send_file, abort, stream_with_context
+
+import report_gen
+from timeline_store import TIMELINE_DB, TimelineStore
+from instrumentation import get_logger, configure_logging
+
+logger = get_logger("report_service")
+
+# Small HTTP service around report_gen.generate_forensic_report:
+#   POST /reports                -> start (or join) a report job
+#   GET  /reports/<id>           -> job status and per-section progress
+#   GET  /reports/<id>/download  -> finished report (?format=docx|html|json),
+#                                   with HTTP Range support
+#   GET  /timeline               -> timeline_store events as NDJSON, streamed
+#                                   (?since=&until=&source=&type=&actor=&limit=)
+# Jobs run in background threads; each one still fans its sections out to
+# report_gen's process pool. Requests for identical inputs (same artifact
+# digests and parser versions) share one job.
+
+app = Flask(__name__)
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "downloads", "reports")
+MIMETYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "html": "text/html",
+    "json": "application/json",
+}
+
+executor = ThreadPoolExecutor(max_workers=2)
+jobs_lock = threading.Lock()
+jobs = {}          # job_id -> job dict
+jobs_by_key = {}   # report input key -> job_id
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _job_view(job):
+    """Public JSON view of a job."""
+    view = {k: v for k, v in job.items() if k not in ("key", "outputs", "digests")}
+    if job["status"] == "completed":
+        view["download_urls"] = {
+            fmt: f"/reports/{job['id']}/download?format={fmt}" for fmt in job["formats"]
+        }
+    return view
+
+
+def _outputs_exist(job):
+    return bool(job["outputs"]) and all(os.path.exists(p) for p in job["outputs"].values())
+
+
+def _run_job(job_id):
+    job = jobs[job_id]
+
+    def on_progress(section, state):
+        with jobs_lock:
+            job["sections"][section] = state
+
+    with jobs_lock:
+        job["status"] = "running"
+        job["started_at"] = _now()
+    try:
+        # Pin the artifact versions now: one replaced while the job was queued
+        # is built, cached and keyed as the new version it is
+        digests, file_ids = report_gen.pin_artifacts()
+        with jobs_lock:
+            if digests != job["digests"]:
+                if jobs_by_key.get(job["key"]) == job_id:
+                    del jobs_by_key[job["key"]]
+                job["digests"] = digests
+                job["key"] = _job_key(digests, job["formats"])
+                jobs_by_key.setdefault(job["key"], job_id)
+        output_dir = os.path.join(REPORTS_DIR, job["key"][:16])
+        outputs = report_gen.generate_forensic_report(
+            output_dir=output_dir, digests=digests, file_ids=file_ids, progress=on_progress,
+            formats=job["formats"]
+        )
+        with jobs_lock:
+            job["outputs"] = outputs
+            # Set with the status so no completed job is ever seen without it
+            job["finished_at"] = _now()
+            job["status"] = "completed"
+    except Exception as e:
+        logger.exception("Report job %s failed: %s", job_id, e)
+        with jobs_lock:
+            job["finished_at"] = _now()
+            job["status"] = "error"
+            job["error"] = str(e)
+
+
+def _job_key(digests, formats):
+    return report_gen.artifact_digest(f"{report_gen.report_input_key(digests)}\0{','.join(formats)}")
+
+
+def submit_report_job(formats=("docx",)):
+    """Starts a report job for the current artifacts, or returns the job already covering them."""
+    formats = tuple(sorted(set(formats)))
+    unknown = set(formats) - set(report_gen.REPORT_FORMATS)
+    if not formats or unknown:
+        raise ValueError(f"Unsupported report format(s): {', '.join(sorted(unknown)) or 'none given'}")
+    digests = report_gen.get_section_digests()
+    key = _job_key(digests, formats)
+    with jobs_lock:
+        existing = jobs.get(jobs_by_key.get(key))
+        if existing and (
+            existing["status"] in ("queued", "running")
+            or (existing["status"] == "completed" and _outputs_exist(existing))
+        ):
+            return existing, False
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "key": key,
+            "digests": digests,
+            "formats": list(formats),
+            "status": "queued",
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "outputs": {},
+            "sections": {section: "queued" for section, _, _ in report_gen.report_sections},
+        }
+        jobs[job_id] = job
+        jobs_by_key[key] = job_id
+    executor.submit(_run_job, job_id)
+    return job, True
+
+
+@app.post("/reports")
+def create_report():
+    body = request.get_json(silent=True) or {}
+    try:
+        job, created = submit_report_job(body.get("formats") or ["docx"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with jobs_lock:
+        body = _job_view(job)
+    return jsonify(body), 202 if created else 200
+
+
+@app.get("/reports/<job_id>")
+def report_status(job_id):
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if not job:
+            abort(404)
+        return jsonify(_job_view(job))
+
+
+def _send_report(path, fmt):
+    # conditional=True makes Werkzeug answer Range / If-Range requests with 206
+    return send_file(
+        path,
+        mimetype=MIMETYPES[fmt],
+        as_attachment=True,
+        download_name=f"Preliminary_Forensic_Report.{fmt}",
+        conditional=True,
+    )
+
+
+@app.get("/reports/<job_id>/download")
+def download_report_job(job_id):
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if not job:
+            abort(404)
+        if job["status"] != "completed":
+            return jsonify({"error": "Report not ready", "status": job["status"]}), 409
+        fmt = request.args.get("format", job["formats"][0])
+        path = job["outputs"].get(fmt)
+    if not path or not os.path.exists(path):
+        return jsonify({"error": "Report not found"}), 404
+    return _send_report(path, fmt)
+
+
+@app.get("/download_report")
+def download_report():
+    """Latest completed DOCX report, kept for clients of the old route."""
+    with jobs_lock:
+        finished = [
+            j for j in jobs.values()
+            if j["status"] == "completed" and os.path.exists(j["outputs"].get("docx", ""))
+        ]
+        path = max(finished, key=lambda j: j["finished_at"])["outputs"]["docx"] if finished else None
+    if not path:
+        return jsonify({"error": "Report not found"}), 404
+    return _send_report(path, "docx")
+
+
+@app.get("/timeline")
+def timeline():
+    """Streams timeline events in time order, one JSON object per line."""
+    args = request.args
+    try:
+        limit = int(args["limit"]) if args.get("limit") else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    store = TimelineStore(TIMELINE_DB)
+    lines = store.iter_ndjson(
+        since=args.get("since"), until=args.get("until"),
+        sources=args.getlist("source"), types=args.getlist("type"),
+        actor=args.get("actor"), limit=limit,
+    )
+    try:
+        # Bad since/until values fail on the first row, before any output
+        first = next(lines, "")
+    except ValueError as e:
+        store.close()
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        try:
+            if first:
+                yield first
+                yield from lines
+        finally:
+            store.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    app.run(host="127.0.0.1", port=int(os.environ.get("REPORT_SERVICE_PORT", 5001)), threaded=True)
@@ -41,10 +41,12 @@ def save_to_file(filename, data, binary=False):
         if existing:
             fs.delete(existing["_id"])
 
-        if binary:
-            file_id = fs.put(data, filename=filename, binary=True, uploadDate=datetime.datetime.now())
-        else:
-            file_id = fs.put(data.encode("utf-8", "ignore"), filename=filename, binary=False, uploadDate=datetime.datetime.now())
+        payload = data if binary else data.encode("utf-8", "ignore")
+        # Digest is stored with the file so report_gen can tell unchanged
+        # artifacts apart without reading them back
+        file_id = fs.put(payload, filename=filename, binary=binary,
+                         sha256=hashlib.sha256(payload).hexdigest(),
+                         uploadDate=datetime.datetime.now())
 
         print(f"[+] Saved '{filename}' to MongoDB with ID: {file_id}")
         return file_id
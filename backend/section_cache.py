@@ -0,0 +1,54 @@
+import os
+import hashlib
+import pickle
+from instrumentation import get_logger
+
+# Parsed report sections (ordered table/image blocks) are cached on disk,
+# keyed by the section name, its parser version and the sha256 of the input
+# artifact. A section is only recomputed when one of those changes.
+
+SECTION_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".section_cache")
+
+logger = get_logger("section_cache")
+
+
+def artifact_digest(data):
+    """Returns the sha256 hex digest of an artifact's text or bytes."""
+    if isinstance(data, str):
+        data = data.encode("utf-8", "ignore")
+    return hashlib.sha256(data).hexdigest()
+
+
+def section_cache_key(section, version, digest):
+    """Builds the cache key for one section from its name, parser version and input digest."""
+    return hashlib.sha256(f"{section}\0{version}\0{digest}".encode("utf-8")).hexdigest()
+
+
+def load_section(key, cache_dir=SECTION_CACHE_DIR):
+    """Returns the cached blocks for a key, or None when missing or unreadable."""
+    if not cache_dir:
+        return None
+    path = os.path.join(cache_dir, f"{key}.pkl")
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable section cache %s: %s", path, e)
+        return None
+
+
+def store_section(key, blocks, cache_dir=SECTION_CACHE_DIR):
+    """Stores section blocks atomically under the given key."""
+    if not cache_dir:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f"{key}.pkl")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(blocks, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache section %s: %s", key, e)
@@ -0,0 +1,145 @@
+import os
+import gzip
+import zlib
+import json
+import time
+import base64
+import binascii
+import numpy as np
+
+from shealth_export import merged_daily_rows
+from instrumentation import get_logger
+
+# Decodes the binning_data of Samsung Health's daily step trend into
+# intraday series.
+#
+# Each daily trend row carries the day's activity in fixed bins, by default
+# 144 bins of 10 minutes starting at local midnight:
+#
+#   [{"mStepCount": 12, "mDistance": 8.4, "mCalorie": 0.41, "mSpeed": 1.1}, ...]
+#
+# Depending on the export version the column holds that JSON inline, the
+# JSON gzip/zlib-compressed (raw or base64), or the name of a file under the
+# export's "jsons/" folder ("<datauuid>.binning_data.json"), which may be
+# compressed in turn. decode_daily_binning reads every day, flattens all
+# bins into one list and fills (days x bins) NumPy arrays per field with
+# a single scatter, so each day is a contiguous row.
+
+BINNING_FIELDS = {"steps": "mStepCount", "distance": "mDistance", "calorie": "mCalorie", "speed": "mSpeed"}
+BINS_PER_DAY = 144
+JSON_FOLDER = "jsons"
+
+logger = get_logger("shealth_binning")
+
+
+def _json_file_index(export_dir):
+    """{file name: path} for everything under the export's jsons/ folder."""
+    index = {}
+    for root, _, files in os.walk(os.path.join(export_dir, JSON_FOLDER)):
+        for name in files:
+            index.setdefault(name, os.path.join(root, name))
+    return index
+
+
+def decode_binning_value(value, _depth=0):
+    """The list of bin dicts held by a binning_data value (text or bytes), or None."""
+    if value is None or _depth > 2:
+        return None
+    if isinstance(value, str):
+        value = value.strip().encode("utf-8", "ignore")
+    if not value:
+        return None
+    if value[:2] == b"\x1f\x8b":
+        return decode_binning_value(gzip.decompress(value), _depth + 1)
+    if value[:1] == b"\x78":  # zlib header
+        try:
+            return decode_binning_value(zlib.decompress(value), _depth + 1)
+        except zlib.error:
+            pass
+    if value[:1] in (b"[", b"{"):
+        data = json.loads(value)
+        if isinstance(data, dict):
+            # Some versions wrap the bins: {"binning_data": [...]}
+            data = next((v for v in data.values() if isinstance(v, list)), None)
+        return data if isinstance(data, list) else None
+    try:
+        return decode_binning_value(base64.b64decode(value, validate=True), _depth + 1)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _read_reference(name, json_files):
+    path = json_files.get(os.path.basename(name))
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def decode_daily_binning(daily_trend, export_dir=None, bins_per_day=BINS_PER_DAY, fields=BINNING_FIELDS):
+    """
+    Intraday bins for a shealth_export "step_daily_trend" frame (merged
+    rows only, one per day, see merged_daily_rows). `export_dir` locates
+    file-referenced bins. Returns
+
+      {"days": datetime64[D] (n,), "bin_minutes": int,
+       <field>: float64 (n, bins_per_day) for each of `fields`}
+
+    with NaN for days or bins the export lacks.
+    """
+    start = time.perf_counter()
+    rows = merged_daily_rows(daily_trend.dropna(subset=["day"])).sort_values("day")
+    rows = rows.drop_duplicates(subset="day", keep="last")
+    days = rows["day"].to_numpy().astype("datetime64[D]")
+    json_files = _json_file_index(export_dir) if export_dir else {}
+
+    day_bins, undecoded = [], 0
+    for value in rows["binning_data"].tolist() if "binning_data" in rows else [None] * len(rows):
+        bins = None
+        if not isinstance(value, (str, bytes)):
+            value = None  # missing (pd.NA)
+        elif isinstance(value, str) and value.strip().endswith(".json"):
+            value = _read_reference(value.strip(), json_files)
+        try:
+            bins = decode_binning_value(value)
+        except (OSError, EOFError, ValueError, zlib.error) as e:
+            logger.debug("Undecodable binning_data: %s", e)
+        if bins is None:
+            undecoded += 1
+            bins = []
+        day_bins.append(bins[:bins_per_day])
+
+    counts = np.fromiter(map(len, day_bins), dtype=np.int64, count=len(day_bins))
+    flat = [b if isinstance(b, dict) else {} for bins in day_bins for b in bins]
+    row_index = np.repeat(np.arange(len(day_bins)), counts)
+    col_index = np.arange(len(flat)) - np.repeat(np.cumsum(counts) - counts, counts)
+    result = {"days": days, "bin_minutes": 24 * 60 // bins_per_day}
+    for name, key in fields.items():
+        values = np.fromiter((b.get(key, np.nan) for b in flat), dtype=np.float64, count=len(flat))
+        grid = np.full((len(day_bins), bins_per_day), np.nan)
+        grid[row_index, col_index] = values
+        result[name] = grid
+    logger.info("Decoded binning_data for %d days (%d bins, %d undecodable) in %.3f s",
+                len(day_bins), len(flat), undecoded, time.perf_counter() - start)
+    return result
+
+
+def intraday_series(decoded, field="steps"):
+    """
+    One contiguous (times, values) series over all decoded days: times are
+    datetime64[m] bin starts in device local time.
+    """
+    days, grid = decoded["days"], decoded[field]
+    offsets = (np.arange(grid.shape[1]) * decoded["bin_minutes"]).astype("timedelta64[m]")
+    times = days.astype("datetime64[m]")[:, None] + offsets
+    return times.ravel(), grid.ravel()
+
+
+def daily_profile(decoded, field="steps"):
+    """Mean value per bin of the day across all decoded days, ignoring missing bins."""
+    grid = decoded[field]
+    profile = np.zeros(grid.shape[1])
+    observed = ~np.isnan(grid)
+    seen = observed.sum(axis=0)
+    np.divide(np.nansum(grid, axis=0), seen, out=profile, where=seen > 0)
+    return profile
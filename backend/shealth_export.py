@@ -0,0 +1,249 @@
+import os
+import re
+import csv
+import time
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+from instrumentation import get_logger
+
+# Samsung Health export ingestion.
+#
+# An export folder holds one CSV per data type, named
+#
+#   com.samsung.shealth.<data type>.<YYYYMMDDhhmmss>.csv   (sometimes ".csv.xls")
+#
+# whose first line is metadata ("<data type>,<version>,<rows>") and second
+# line the header. Newer exports qualify most columns with a namespace
+# ("com.samsung.health.heart_rate.start_time"); the namespace is stripped
+# so every data type is read through one short-name column map (HEALTH_TYPES)
+# with explicit dtypes, and only the mapped columns are parsed at all.
+#
+# Times in the export are UTC. start_time/end_time are "YYYY-MM-DD
+# hh:mm:ss.fff" strings (epoch milliseconds in some versions) and
+# time_offset ("UTC+0530") gives the device's offset, which is applied to
+# produce start_local/end_local wall times. The daily step trend's day_time
+# is epoch milliseconds of the local calendar day at 00:00 UTC.
+#
+# Parsed frames are pickled per CSV in HEALTH_CACHE_DIR, keyed by path,
+# size, mtime and HEALTH_CACHE_VERSION, so repeated runs skip CSV parsing.
+
+HEALTH_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".health_cache")
+# Bump when HEALTH_TYPES or the conversions change so cached frames are re-read
+HEALTH_CACHE_VERSION = 1
+
+EXPORT_NAME_RE = re.compile(r"^com\.samsung\.shealth\.(?P<data_type>.+?)\.(?P<stamp>\d{14})\.csv(?:\.xls)?$")
+NAMESPACE = "com.samsung.health."
+TIME_OFFSET_RE = re.compile(r"^UTC([+-])(\d{2}):?(\d{2})$")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+_DEVICE = {"deviceuuid": "category", "pkg_name": "category", "datauuid": "string"}
+
+# kind -> export data type and {short column name: dtype}
+HEALTH_TYPES = {
+    "step_daily_trend": {
+        "data_type": "step_daily_trend",
+        "columns": {
+            "day_time": "float64", "count": "float64", "distance": "float64", "calorie": "float64",
+            "speed": "float64", "source_type": "float64", "binning_data": "string", **_DEVICE,
+        },
+    },
+    "steps": {
+        "data_type": "tracker.pedometer_step_count",
+        "columns": {
+            "start_time": "string", "end_time": "string", "time_offset": "category", "count": "float64",
+            "walk_step": "float64", "run_step": "float64", "distance": "float64", "calorie": "float64",
+            "speed": "float64", **_DEVICE,
+        },
+    },
+    "heart_rate": {
+        "data_type": "tracker.heart_rate",
+        "columns": {
+            "start_time": "string", "end_time": "string", "time_offset": "category", "heart_rate": "float64",
+            "min": "float64", "max": "float64", "binning_data": "string", **_DEVICE,
+        },
+    },
+    "sleep": {
+        "data_type": "sleep",
+        "columns": {
+            "start_time": "string", "end_time": "string", "time_offset": "category", "efficiency": "float64",
+            "sleep_score": "float64", "sleep_duration": "float64", **_DEVICE,
+        },
+    },
+    "exercise": {
+        "data_type": "exercise",
+        "columns": {
+            "start_time": "string", "end_time": "string", "time_offset": "category", "exercise_type": "float64",
+            "duration": "float64", "distance": "float64", "calorie": "float64", "count": "float64",
+            "mean_heart_rate": "float64", "max_heart_rate": "float64", **_DEVICE,
+        },
+    },
+}
+_KIND_BY_DATA_TYPE = {spec["data_type"]: kind for kind, spec in HEALTH_TYPES.items()}
+
+logger = get_logger("shealth")
+
+
+def short_column_name(name):
+    """'com.samsung.health.heart_rate.start_time' -> 'start_time'; other names unchanged."""
+    name = name.strip()
+    return name.rsplit(".", 1)[-1] if name.startswith(NAMESPACE) else name
+
+
+def discover_health_csvs(folder, recursive=False):
+    """
+    Every Samsung Health CSV in `folder` (and its subfolders if
+    `recursive`), as (kind, data type, path) sorted by path; kind is None
+    for data types HEALTH_TYPES does not map.
+    """
+    found = []
+    for root, dirs, files in os.walk(folder):
+        if not recursive:
+            dirs.clear()
+        for name in files:
+            m = EXPORT_NAME_RE.match(name)
+            if m:
+                data_type = m.group("data_type")
+                found.append((_KIND_BY_DATA_TYPE.get(data_type), data_type, os.path.join(root, name)))
+    return sorted(found, key=lambda item: item[2])
+
+
+def _read_header(path):
+    """The export's column names (second line)."""
+    with open(path, "r", encoding="utf-8-sig", errors="ignore", newline="") as f:
+        f.readline()
+        return next(csv.reader([f.readline()]), [])
+
+
+def _parse_times(values):
+    """UTC datetime64 values from export time strings (or epoch-millisecond strings)."""
+    parsed = pd.to_datetime(values, format=TIME_FORMAT, errors="coerce")
+    if parsed.isna().all() and values.notna().any():
+        parsed = pd.to_datetime(pd.to_numeric(values, errors="coerce"), unit="ms", errors="coerce")
+    return parsed
+
+
+def _offset_minutes(offsets):
+    """Minutes east of UTC for a categorical "UTC+0530" column (0 where missing)."""
+    minutes = []
+    for label in offsets.cat.categories:
+        m = TIME_OFFSET_RE.match(str(label).strip())
+        value = int(m.group(2)) * 60 + int(m.group(3)) if m else 0
+        minutes.append(-value if m and m.group(1) == "-" else value)
+    lookup = np.append(np.array(minutes, dtype=np.int16), np.int16(0))
+    # Missing values have code -1, which picks the trailing 0
+    return lookup[offsets.cat.codes.to_numpy()]
+
+
+def read_health_csv(path, kind):
+    """Reads one export CSV of a HEALTH_TYPES kind into a typed DataFrame with converted times."""
+    spec = HEALTH_TYPES[kind]["columns"]
+    header = _read_header(path)
+    names = [short_column_name(name) for name in header]
+    wanted = {i: name for i, name in enumerate(names) if name in spec}
+    df = pd.read_csv(
+        path,
+        skiprows=2,
+        header=None,
+        names=list(range(len(header))) if header else None,
+        usecols=list(wanted),
+        dtype={i: spec[name] for i, name in wanted.items()},
+        index_col=False,
+        encoding="utf-8",
+        encoding_errors="ignore",
+        on_bad_lines="skip",
+    ).rename(columns=wanted)
+
+    if "day_time" in df:
+        df["day"] = pd.to_datetime(df["day_time"], unit="ms", errors="coerce")
+        df = df.drop(columns="day_time")
+    if "time_offset" in df:
+        df["time_offset_min"] = _offset_minutes(df["time_offset"])
+        offset = pd.to_timedelta(df["time_offset_min"], unit="min")
+        df = df.drop(columns="time_offset")
+    else:
+        offset = None
+    for column in ("start_time", "end_time"):
+        if column in df:
+            df[column] = _parse_times(df[column])
+            if offset is not None:
+                df[column.replace("_time", "_local")] = df[column] + offset
+    return df
+
+
+def merged_daily_rows(daily_trend):
+    """
+    The daily step trend rows to use per day: Samsung Health's merged total
+    across devices (source_type -2) when the export has it, else all rows.
+    """
+    if "source_type" in daily_trend and (daily_trend["source_type"] == -2).any():
+        return daily_trend[daily_trend["source_type"] == -2]
+    return daily_trend
+
+
+def _cache_key(path, kind):
+    st = os.stat(path)
+    ident = f"{HEALTH_CACHE_VERSION}\0{kind}\0{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+def load_health_csv(path, kind, cache_dir=HEALTH_CACHE_DIR):
+    """read_health_csv through the on-disk frame cache."""
+    key = _cache_key(path, kind)
+    cache_path = os.path.join(cache_dir, f"{key}.pkl") if cache_dir else None
+    if cache_path:
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Ignoring unreadable health cache %s: %s", cache_path, e)
+
+    df = read_health_csv(path, kind)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not cache health frame %s: %s", path, e)
+    return df
+
+
+def load_health_export(folder, kinds=None, cache_dir=HEALTH_CACHE_DIR, recursive=False):
+    """
+    {kind: DataFrame} for every mapped data type found in `folder`
+    (restricted to `kinds` when given). Several CSVs of one kind, e.g. from
+    repeated exports, are concatenated and deduplicated on datauuid.
+    """
+    start = time.perf_counter()
+    parts = {}
+    for kind, data_type, path in discover_health_csvs(folder, recursive):
+        if kind is None:
+            logger.debug("Skipping unmapped Samsung Health data type %s", data_type)
+            continue
+        if kinds is not None and kind not in kinds:
+            continue
+        parts.setdefault(kind, []).append(load_health_csv(path, kind, cache_dir))
+
+    frames = {}
+    for kind, dfs in parts.items():
+        df = dfs[0]
+        if len(dfs) > 1:
+            df = pd.concat(dfs, ignore_index=True)
+            # Differing categories concatenate as object; restore the compact dtype
+            for column, dtype in dfs[0].dtypes.items():
+                if isinstance(dtype, pd.CategoricalDtype) and column in df:
+                    df[column] = df[column].astype("category")
+            if "datauuid" in df:
+                df = df.drop_duplicates(subset="datauuid", keep="last", ignore_index=True)
+        frames[kind] = df
+    logger.info("Loaded Samsung Health export %s: %s in %.3f s", folder,
+                ", ".join(f"{kind} {len(df)} rows" for kind, df in frames.items()) or "nothing",
+                time.perf_counter() - start)
+    return frames
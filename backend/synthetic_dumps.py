@@ -0,0 +1,278 @@
+import random
+import datetime
+
+# Deterministic generators of realistic acquisition artifacts, used by
+# bench_parsers.py to measure the report parsers at any input size.
+#
+# Every generator takes a target size in bytes and a seed and returns text
+# of about that size laid out like the real command output (`dumpsys
+# account`, `dumpsys wifi`, `dumpsys sensorservice`, `ip addr`, `dumpsys
+# location`, `dumpsys bluetooth_manager`, `logcat -v threadtime`). The same (size, seed) always
+# produces the same text.
+
+BASE_TIME = datetime.datetime(2025, 3, 8, 8, 0, 0)
+BASE_LAT, BASE_LON = 12.971599, 77.594566
+
+ACCOUNT_TYPES = ["com.google", "com.whatsapp", "com.samsung.android.mobileservice", "com.microsoft.office.outlook",
+                 "com.facebook.auth.login", "org.telegram.messenger", "com.linkedin.android"]
+WIFI_STATES = ["ConnectedState", "L2ConnectedState", "ObtainingIpState", "DisconnectedState", "ConnectModeState"]
+SSIDS = ["HomeNet", "Office-5G", "CafeWiFi", "AirportFree", "Hotel_Guest", "AndroidAP"]
+SENSORS = [("LSM6DSO Accelerometer", 3), ("LSM6DSO Gyroscope", 3), ("AK09918 Magnetometer", 3),
+           ("TMD4910 Light", 1), ("Pressure Sensor", 1), ("Step Counter", 1)]
+BT_PROFILES = ["A2dpService", "HeadsetService", "HidHostService", "LeAudioService", "GattService"]
+LOGCAT_TAGS = ["ActivityManager", "WifiStateMachine", "BluetoothAdapter", "chatty", "GnssLocationProvider",
+               "SurfaceFlinger", "PackageManager", "NetworkController.MobileSignalController(1)", "SensorService",
+               "AlarmManager", "ConnectivityService", "libc"]
+BT_DEVICES = ["Galaxy Buds2 Pro", "Galaxy Watch5", "JBL Flip 6", "Car Multimedia", "Pixel Buds", "MX Keys"]
+
+
+class _Writer:
+    """Collects lines until the target size is reached."""
+
+    def __init__(self, target_bytes):
+        self.target = target_bytes
+        self.size = 0
+        self.lines = []
+
+    @property
+    def full(self):
+        return self.size >= self.target
+
+    def add(self, line):
+        self.lines.append(line)
+        self.size += len(line) + 1
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def _mac(rng):
+    return ":".join(f"{rng.randrange(256):02X}" for _ in range(6))
+
+
+def _stamp(when, millis=True):
+    return when.strftime("%m-%d %H:%M:%S.%f")[:-3] if millis else when.strftime("%m-%d %H:%M:%S")
+
+
+def generate_account_dump(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    out.add("ACCOUNT MANAGER STATE (dumpsys account)")
+    user = 0
+    while not out.full:
+        out.add(f"User UserInfo{{{user}:{'Owner' if user == 0 else f'User{user}'}:13}}:")
+        accounts = rng.randint(5, 60)
+        out.add(f"  Accounts: {accounts}")
+        for i in range(accounts):
+            out.add(f"    Account {{name=user{user}_{i}@example{i % 7}.com, type={rng.choice(ACCOUNT_TYPES)}}}")
+        out.add("")
+        out.add("  Active Sessions: 0")
+        services = rng.randint(5, 30)
+        out.add(f"  RegisteredServicesCache: {services} services")
+        for i in range(services):
+            acc_type = rng.choice(ACCOUNT_TYPES)
+            out.add(f"    ServiceInfo: AuthenticatorDescription {{type={acc_type}}}, "
+                    f"ComponentInfo{{{acc_type}/{acc_type}.auth.Authenticator{i}}}, uid {10000 + rng.randrange(500)}")
+        out.add("  Account history:")
+        when = BASE_TIME
+        for _ in range(rng.randint(20, 200)):
+            when += datetime.timedelta(seconds=rng.randint(1, 3600))
+            out.add(f"    {when:%Y-%m-%d %H:%M:%S},action_account_add,accounts,{rng.randrange(100)},{rng.randrange(50)}")
+        user += 1
+    return out.text()
+
+
+def generate_wifi_dump(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    out.add("Wi-Fi is enabled")
+    out.add("Verbose logging is off")
+    when = BASE_TIME
+    rec = 0
+    block = 0
+    while not out.full:
+        out.add("WifiClientModeImpl:")
+        out.add(f" total records={rec + 200}")
+        for _ in range(200):
+            when += datetime.timedelta(milliseconds=rng.randint(50, 60_000))
+            org = rng.choice(WIFI_STATES)
+            if rng.random() < 0.3:
+                out.add(f" rec[{rec}]: time={_stamp(when)} processed={org} org={org} dest=<null> what=0x2005f "
+                        f"screen=on {rng.randrange(10)} {rng.randrange(10)} ssid: \"{rng.choice(SSIDS)}\" "
+                        f"bssid: {_mac(rng).lower()} nid: {rng.randrange(20)} frequencyMhz: "
+                        f"{rng.choice([2412, 2437, 5180, 5745])} state: COMPLETED")
+            else:
+                out.add(f" rec[{rec}]: time={_stamp(when)} processed={org} org={org} "
+                        f"dest={rng.choice(WIFI_STATES + ['<null>'])} what=0x{rng.randrange(0x20000, 0x20100):x}")
+            rec += 1
+        out.add(f" WifiInfo: SSID: \"{rng.choice(SSIDS)}\", RSSI: {-rng.randint(40, 90)}, MLO Info: [" + ",".join(
+            f"{{linkId={i},linkRssi={-rng.randint(40, 90)},linkFreq={rng.choice([2437, 5180, 6115])},"
+            f"txLinkSpeed={rng.randint(50, 2400)},rxLinkSpeed={rng.randint(50, 2400)},state=ACTIVE}}"
+            for i in range(rng.randint(1, 3))) + "]")
+        out.add("WifiScoreReport:")
+        for _ in range(300):
+            when += datetime.timedelta(seconds=rng.randint(1, 5))
+            rssi = -rng.randint(40, 90)
+            out.add(f" time={_stamp(when, millis=False)} session={block}, netid={rng.randrange(20)}, rssi={rssi}, "
+                    f"filtered_rssi={rssi - rng.randint(0, 3)}, freq={rng.choice([2437, 5180])}, "
+                    f"txLinkSpeed={rng.randint(6, 1200)}, rxLinkSpeed={rng.randint(6, 1200)}, s0=0.0, s1=0.0")
+        out.add("WifiConfigManager - Log Begin ----")
+        out.add("  Configured networks:")
+        for nid in range(10):
+            out.add(f"    ID: {nid} SSID: \"{SSIDS[nid % len(SSIDS)]}\" PROVIDER-NAME: null BSSID: null "
+                    f"FQDN: null HOME-PROVIDER-NETWORK: false PRIO: 0 HIDDEN: false")
+        block += 1
+    return out.text()
+
+
+def generate_sensor_dump(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    out.add("Sensor List:")
+    for i, (name, _) in enumerate(SENSORS):
+        out.add(f"0x{i + 1:08x}) {name} | STMicro | ver: 1 | type: android.sensor.x | continuous | 200Hz")
+    out.add("Recent Sensor events:")
+    # Each sensor appears once, as in a real dump; events are shared out
+    # from an estimate of the event line length
+    events = max(1, target_bytes // (len(SENSORS) * 62))
+    ts = 1000.0
+    for name, axes in SENSORS:
+        out.add(f"{name}: last {events} events")
+        for i in range(events):
+            ts += 0.02 if rng.random() < 0.95 else rng.uniform(1, 30)
+            wall = BASE_TIME + datetime.timedelta(seconds=ts)
+            values = ", ".join(f"{rng.gauss(0, 5):.2f}" for _ in range(axes))
+            out.add(f"\t {i + 1} (ts={ts:.9f}, wall={wall:%H:%M:%S}.{wall.microsecond // 1000:03d}) {values},")
+    return out.text()
+
+
+def generate_ip_dump(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    out.add("1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN group default qlen 1000")
+    out.add("    link/loopback 00:00:00:00:00:00 brd 00:00:00:00:00:00")
+    out.add("    inet 127.0.0.1/8 scope host lo")
+    out.add("       valid_lft forever preferred_lft forever")
+    out.add("    inet6 ::1/128 scope host")
+    out.add("       valid_lft forever preferred_lft forever")
+    index = 2
+    while not out.full:
+        name = rng.choice(["wlan", "rmnet_data", "dummy", "p2p", "ip6tnl", "bond", "swlan"]) + str(index)
+        up = rng.random() < 0.6
+        flags = "BROADCAST,MULTICAST,UP,LOWER_UP" if up else "BROADCAST,MULTICAST"
+        out.add(f"{index}: {name}: <{flags}> mtu {rng.choice([1500, 1280, 1440])} qdisc mq state "
+                f"{'UP' if up else 'DOWN'} group default qlen 3000")
+        out.add(f"    link/ether {_mac(rng).lower()} brd ff:ff:ff:ff:ff:ff")
+        if up:
+            a, b = rng.randrange(256), rng.randrange(1, 255)
+            out.add(f"    inet 192.168.{a}.{b}/24 brd 192.168.{a}.255 scope global {name}")
+            out.add("       valid_lft forever preferred_lft forever")
+            out.add(f"    inet6 fe80::{rng.randrange(0xffff):x}:{rng.randrange(0xffff):x}/64 scope link")
+            out.add("       valid_lft forever preferred_lft forever")
+        index += 1
+    return out.text()
+
+
+def generate_location_dump(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    out.add("Location Manager State:")
+    out.add("  User Info:")
+    out.add("    current user: [0] ")
+    out.add("  Location Settings:")
+    out.add("    [u0] Location Enabled: true")
+    out.add("  Location Providers:")
+    for provider in ("network", "gps", "fused", "passive"):
+        out.add(f"    {provider} provider:")
+        out.add("      service: ProviderRequest[ON interval=+1s0ms]")
+        lat, lon = BASE_LAT + rng.uniform(-0.01, 0.01), BASE_LON + rng.uniform(-0.01, 0.01)
+        out.add(f"      last location=Location[{lat:.6f},{lon:.6f} hAcc={rng.uniform(3, 40):.1f} "
+                f"et=+1d2h{rng.randrange(60)}m alt={rng.uniform(880, 940):.1f} vAcc=4 {{Bundle[{{}}]}}]")
+    out.add("  Event Log:")
+    when = BASE_TIME
+    lat, lon = BASE_LAT, BASE_LON
+    elapsed_ms = 90_000_000
+    while not out.full:
+        # Alternate dwelling near one spot with travelling to the next
+        moving = rng.random() < 0.3
+        for _ in range(rng.randint(20, 120)):
+            step = rng.randint(5, 60)
+            when += datetime.timedelta(seconds=step)
+            elapsed_ms += step * 1000
+            if moving:
+                lat += rng.uniform(-0.0008, 0.0008)
+                lon += rng.uniform(-0.0008, 0.0008)
+            provider = rng.choice(["gps", "network", "fused"])
+            jitter = 0.00005 if provider == "gps" else 0.0003
+            out.add(f"    {_stamp(when)}: {provider} provider received Location[{provider} "
+                    f"{lat + rng.uniform(-jitter, jitter):.6f},{lon + rng.uniform(-jitter, jitter):.6f} "
+                    f"hAcc={rng.uniform(3, 60):.1f} et=+{elapsed_ms // 3_600_000}h{elapsed_ms // 60_000 % 60}m"
+                    f"{elapsed_ms // 1000 % 60}s{elapsed_ms % 1000}ms alt={rng.uniform(880, 940):.1f} vAcc=5]")
+            if rng.random() < 0.2:
+                out.add(f"    {_stamp(when)}: {provider} provider request +{rng.randint(1, 60)}s0ms to "
+                        f"com.example.app{rng.randrange(30)}")
+    return out.text()
+
+
+def generate_bluetooth_dump(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    devices = [(_mac(rng), name) for name in BT_DEVICES]
+    out.add("Bluetooth Status")
+    out.add("  enabled: true")
+    out.add("  state: ON")
+    out.add(f"  address: XX:XX:XX:XX:{rng.randrange(256):02X}:{rng.randrange(256):02X}")
+    out.add("  name: Galaxy S23")
+    out.add("Bonded devices:")
+    for i, (mac, name) in enumerate(devices):
+        kind = rng.choice(["DUAL", "  LE  ", "BR/EDR"])
+        out.add(f"  {'(Connected) ' if i == 0 else ''}{mac} [ {kind} ][ 0x{rng.randrange(0xffffff):06x} ] {name}")
+    when = BASE_TIME
+    connected = {}
+    while not out.full:
+        profile = rng.choice(BT_PROFILES)
+        out.add(f"{profile}:")
+        out.add(f"  mMaxConnectedAudioDevices: {rng.randint(1, 3)}")
+        for _ in range(200):
+            when += datetime.timedelta(seconds=rng.randint(1, 900))
+            mac, _ = rng.choice(devices)
+            if rng.random() < 0.6:
+                state = "DISCONNECTED" if connected.get((mac, profile)) else "CONNECTED"
+                connected[(mac, profile)] = state == "CONNECTED"
+                out.add(f"  {_stamp(when)} {profile.replace('Service', 'StateMachine')}: Connection state "
+                        f"{mac}: {'CONNECTED->' if state == 'DISCONNECTED' else 'DISCONNECTED->'}{state}")
+            else:
+                out.add(f"  {_stamp(when)} BluetoothAdapterService: discovery "
+                        f"{rng.choice(['started', 'finished'])} by uid {10000 + rng.randrange(300)}")
+    return out.text()
+
+
+def generate_logcat_capture(target_bytes, seed=0):
+    rng = random.Random(seed)
+    out = _Writer(target_bytes)
+    processes = [(rng.randint(300, 30000), rng.choice(LOGCAT_TAGS)) for _ in range(60)]
+    when = BASE_TIME
+    out.add("--------- beginning of main")
+    while not out.full:
+        when += datetime.timedelta(milliseconds=rng.randint(0, 400))
+        pid, tag = rng.choice(processes)
+        if rng.random() < 0.3:
+            tag = rng.choice(LOGCAT_TAGS)
+        tid = pid if rng.random() < 0.5 else pid + rng.randint(1, 60)
+        level = rng.choices("VDIWEF", weights=[5, 30, 40, 15, 9, 1])[0]
+        out.add(f"{_stamp(when)} {pid:5d} {tid:5d} {level} {tag:<8}: "
+                f"event {rng.randrange(10 ** 6)} state={rng.choice(WIFI_STATES)} uid={10000 + rng.randrange(300)}")
+        if rng.random() < 0.001:
+            out.add(f"--------- beginning of {rng.choice(['system', 'crash', 'events'])}")
+    return out.text()
+
+
+GENERATORS = {
+    "account": generate_account_dump,
+    "wifi": generate_wifi_dump,
+    "sensor": generate_sensor_dump,
+    "ip": generate_ip_dump,
+    "location": generate_location_dump,
+    "bluetooth": generate_bluetooth_dump,
+    "logcat": generate_logcat_capture,
+}
@@ -0,0 +1,398 @@
+import os
+import re
+import mmap
+import json
+import time
+import sqlite3
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+from logcat_parser import LEVELS, parse_logcat
+from event_histogram import device_timezone, infer_wall_times, to_instants
+from bluetooth_sessions import parse_bluetooth_sessions
+from location_parser import TIME_SOURCE_LINE
+from generateAudioReport import parse_timestamp
+from instrumentation import get_logger, configure_logging
+
+# Cross-artifact timeline.
+#
+#   python timeline_store.py ingest /path/to/acquisition
+#   python timeline_store.py query --since 2025-10-20T08:00 --until 2025-10-20T09:00 --source bluetooth
+#
+# Every artifact parser's output is normalised to one event schema
+#
+#   (ts_ms, source, type, actor, summary, artifact, ref)
+#
+# ts_ms is UTC epoch milliseconds, source the artifact family ("logcat",
+# "bluetooth", "wifi", "location", "alexa"), type the kind of event within it,
+# actor who or what it concerns (tag, device, SSID, provider, speaker),
+# summary a one-line description, artifact the file it came from and ref
+# where in that file (byte offset, audio URL, ...).
+#
+# Events live in one SQLite database (WAL mode) indexed on time and on
+# (source, time), so window and source-filtered queries are index range
+# scans. Each artifact is appended in one transaction with executemany and
+# replaces the events previously ingested from the same artifact. Device wall
+# times get their year and timezone the way event_histogram does: from the
+# acquisition time and persist.sys.timezone.
+
+TIMELINE_DB = os.environ.get(
+    "TIMELINE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "timeline.sqlite3")
+)
+# Bump when the schema changes; older databases are rebuilt empty
+SCHEMA_VERSION = 1
+EVENT_COLUMNS = ["ts_ms", "source", "type", "actor", "summary", "artifact", "ref"]
+SOURCES = ("logcat", "bluetooth", "wifi", "location", "alexa")
+INSERT_BATCH = 50_000
+FETCH_BATCH = 5_000
+SUMMARY_MAX = 240
+
+ARTIFACT_FILES = {
+    "logcat": "logcat_capture.txt",
+    "bluetooth": "bluetooth_information.txt",
+    "wifi": "wifi_information.txt",
+    "location": "dumpsys_location.txt",
+    "alexa": "matched_audio_transcripts.json",
+}
+PROPERTIES_FILE = "device_properties.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts_ms INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    type TEXT NOT NULL,
+    actor TEXT,
+    summary TEXT,
+    artifact TEXT,
+    ref TEXT
+);
+CREATE INDEX IF NOT EXISTS events_time ON events (ts_ms);
+CREATE INDEX IF NOT EXISTS events_source_time ON events (source, ts_ms);
+CREATE INDEX IF NOT EXISTS events_artifact ON events (artifact);
+"""
+
+WIFI_STAMP_RE = re.compile(r"^\s*(?:(?P<year>\d{4})-)?(?P<md>\d{2}-\d{2})\s+(?P<time>\d{2}:\d{2}:\d{2}(?:\.\d+)?)")
+
+logger = get_logger("timeline")
+
+
+def to_ms(value):
+    """UTC epoch ms for None, ms ints, datetimes (naive = UTC) or ISO strings."""
+    if value is None or isinstance(value, (int, np.integer)):
+        return None if value is None else int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    return int(stamp.value // 1_000_000)
+
+
+def _summary(text):
+    text = " ".join(str(text).split())
+    return text if len(text) <= SUMMARY_MAX else text[:SUMMARY_MAX - 1] + "…"
+
+
+class TimelineStore:
+    """The event database at `path` (see the module notes)."""
+
+    def __init__(self, path=TIMELINE_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS events")
+                self.conn.executescript(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def append(self, events, artifact=None):
+        """
+        Inserts event tuples (EVENT_COLUMNS order) in one transaction and
+        returns how many. With `artifact`, events previously ingested from
+        that artifact are replaced.
+        """
+        start = time.perf_counter()
+        count = 0
+        insert = f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})"
+        events = iter(events)
+        with self.conn:
+            if artifact is not None:
+                self.conn.execute("DELETE FROM events WHERE artifact = ?", (artifact,))
+            while True:
+                batch = [event for _, event in zip(range(INSERT_BATCH), events)]
+                if not batch:
+                    break
+                self.conn.executemany(insert, batch)
+                count += len(batch)
+        logger.info("Appended %d timeline events%s in %.3f s", count,
+                    f" from {artifact}" if artifact else "", time.perf_counter() - start)
+        return count
+
+    def _select(self, since=None, until=None, sources=None, types=None, actor=None, limit=None, columns="*"):
+        where, params = [], []
+        if since is not None:
+            where.append("ts_ms >= ?")
+            params.append(to_ms(since))
+        if until is not None:
+            where.append("ts_ms < ?")
+            params.append(to_ms(until))
+        for name, values in (("source", sources), ("type", types)):
+            if values:
+                values = [values] if isinstance(values, str) else list(values)
+                where.append(f"{name} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if actor is not None:
+            where.append("actor = ?")
+            params.append(actor)
+        sql = f"SELECT {columns} FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts_ms, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self.conn.execute(sql, params)
+
+    def iter_events(self, since=None, until=None, sources=None, types=None, actor=None, limit=None):
+        """
+        Events with since <= time < until, optionally restricted to sources,
+        types and an actor, in time order as dicts. Rows are fetched in
+        batches, so large windows are never held in memory at once.
+        """
+        cursor = self._select(since, until, sources, types, actor, limit, ", ".join(EVENT_COLUMNS))
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(EVENT_COLUMNS, row))
+
+    def query(self, since=None, until=None, sources=None, types=None, actor=None, limit=None):
+        """iter_events as a DataFrame with a UTC `time` column."""
+        df = pd.DataFrame(list(self.iter_events(since, until, sources, types, actor, limit)), columns=EVENT_COLUMNS)
+        df.insert(0, "time", pd.to_datetime(df["ts_ms"].astype("int64"), unit="ms", utc=True))
+        return df
+
+    def iter_ndjson(self, since=None, until=None, sources=None, types=None, actor=None, limit=None):
+        """iter_events as newline-delimited JSON lines, with an ISO-8601 UTC `time` added."""
+        for event in self.iter_events(since, until, sources, types, actor, limit):
+            event["time"] = datetime.datetime.fromtimestamp(
+                event["ts_ms"] / 1000, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    def sources(self):
+        """{source: (events, first ts_ms, last ts_ms)} over the whole store."""
+        rows = self.conn.execute(
+            "SELECT source, COUNT(*), MIN(ts_ms), MAX(ts_ms) FROM events GROUP BY source"
+        ).fetchall()
+        return {source: (count, first, last) for source, count, first, last in rows}
+
+
+# ---------------- Artifact adapters ----------------
+# Each yields event tuples for TimelineStore.append.
+
+def _wall_ms(values, tz):
+    """UTC epoch ms (int64, NaT dropped later) for naive device wall times."""
+    wall = pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[ms]")
+    return to_instants(wall, tz).astype(np.int64)
+
+
+def _valid(ms):
+    return ms != np.iinfo(np.int64).min
+
+
+def logcat_events(log_file, acquired_at, tz=None, artifact=None):
+    """One event per logcat line: type is the level, actor the tag, ref the line's byte offset."""
+    artifact = artifact or os.path.basename(log_file)
+    cols = parse_logcat(log_file)
+    if not len(cols):
+        return
+    ms = to_instants(infer_wall_times(cols.ts, acquired_at), tz).astype(np.int64)
+    order = np.argsort(ms, kind="stable")
+    levels = list(LEVELS)
+    with open(log_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        for i in order.tolist():
+            yield (
+                int(ms[i]), "logcat", levels[cols.level[i]], cols.tags[cols.tag[i]],
+                _summary(buf[cols.msg_start[i]:cols.line_end[i]].decode("utf-8", errors="replace")),
+                artifact, str(int(cols.line_start[i])),
+            )
+
+
+def bluetooth_events(text, acquired_at, tz=None, artifact=ARTIFACT_FILES["bluetooth"]):
+    """Connect and disconnect events of every rebuilt Bluetooth session."""
+    sessions = parse_bluetooth_sessions(text, year=acquired_at.year)["sessions"]
+    for column, kind in (("Start", "connect"), ("End", "disconnect")):
+        ms = _wall_ms(sessions[column], tz)
+        for t, mac, name, profile, valid in zip(
+            ms.tolist(), sessions["MAC Address"], sessions["Device Name"], sessions["Profile"], _valid(ms)
+        ):
+            if valid:
+                yield (t, "bluetooth", kind, name or mac, f"{profile} {kind}ed: {name or mac} ({mac})",
+                       artifact, f"{mac}/{profile}")
+
+
+def _wifi_wall_times(stamps, acquired_at):
+    """Wall datetimes for WifiStateMachine `[YYYY-]MM-DD hh:mm:ss.fff` stamps; yearless ones use the acquisition year."""
+    out = []
+    for stamp in stamps:
+        m = WIFI_STAMP_RE.match(str(stamp))
+        if not m:
+            out.append(None)
+            continue
+        year = int(m.group("year") or acquired_at.year)
+        when = pd.Timestamp(f"{year}-{m.group('md')} {m.group('time')}")
+        if not m.group("year") and when > pd.Timestamp(acquired_at) + pd.Timedelta(days=1):
+            when = when.replace(year=year - 1)
+        out.append(when)
+    return out
+
+
+def wifi_events(text, acquired_at, tz=None, artifact=ARTIFACT_FILES["wifi"]):
+    """Network connections and supplicant state changes from the Wi-Fi dump."""
+    from report_gen import parse_wifi_log_extended
+
+    frames = parse_wifi_log_extended(text)
+    networks = frames.get("wifi_networks")
+    if networks is not None:
+        ms = _wall_ms(_wifi_wall_times(networks["timestamp"], acquired_at), tz)
+        for t, ssid, bssid, valid in zip(ms.tolist(), networks["ssid"], networks["bssid"], _valid(ms)):
+            if valid:
+                yield (t, "wifi", "connected", ssid, f"Connected to {ssid} ({bssid})", artifact, bssid)
+    states = frames.get("supplicant_states")
+    if states is not None:
+        ms = _wall_ms(_wifi_wall_times(states["time"], acquired_at), tz)
+        for t, org, dest, valid in zip(ms.tolist(), states["org_state"], states["dest_state"], _valid(ms)):
+            if valid:
+                yield (t, "wifi", "supplicant_state", dest, f"{org} -> {dest}", artifact, None)
+
+
+def location_events(text, acquired_at, tz=None, artifact=ARTIFACT_FILES["location"]):
+    """
+    One event per location fix. Fix times from time=/mTime= are UTC
+    already; fixes timed by their log line's stamp are device wall times.
+    """
+    from report_gen import get_location_text
+
+    fixes = get_location_text(text, year=acquired_at.year)
+    ms = fixes["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+    wall = (fixes["time_source"] == TIME_SOURCE_LINE).to_numpy()
+    if wall.any():
+        ms[wall] = _wall_ms(fixes["timestamp"][wall], tz)
+    for t, provider, lat, lon, acc, valid in zip(
+        ms.tolist(), fixes["provider"], fixes["latitude"], fixes["longitude"], fixes["accuracy"], _valid(ms)
+    ):
+        if valid:
+            accuracy = f" ±{acc:g} m" if pd.notna(acc) else ""
+            yield (t, "location", "fix", provider, f"{lat:.6f}, {lon:.6f}{accuracy}", artifact, f"{lat},{lon}")
+
+
+def alexa_events(matched, tz=None, artifact=ARTIFACT_FILES["alexa"]):
+    """
+    One event per matched Alexa interaction (matched_audio_transcripts.json
+    content). Alexa activity times are wall times of `tz`.
+    """
+    rows = []
+    for audio_url, data in matched.items():
+        info = data.get("transcript_data", {})
+        when = parse_timestamp(info.get("timestamp", ""))
+        if when != datetime.datetime.min:
+            rows.append((when, info.get("device") or "Unknown Device", info.get("speaker") or "",
+                         info.get("transcript") or "", audio_url))
+    if not rows:
+        return
+    ms = _wall_ms([row[0] for row in rows], tz)
+    for t, (_, device, speaker, transcript, audio_url) in zip(ms.tolist(), rows):
+        summary = f"{speaker}: {transcript}" if speaker else transcript
+        yield (t, "alexa", "voice", device, _summary(summary), artifact, audio_url)
+
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def ingest_acquisition(store, folder, sources=SOURCES, acquired_at=None):
+    """
+    Appends every ARTIFACT_FILES artifact present in `folder` to `store`.
+    The acquisition time defaults to the newest artifact's mtime and the
+    timezone comes from device_properties.txt. Returns {source: events}.
+    """
+    props = os.path.join(folder, PROPERTIES_FILE)
+    tz = device_timezone(_read_text(props)) if os.path.exists(props) else None
+    paths = {
+        source: os.path.join(folder, ARTIFACT_FILES[source]) for source in sources
+        if os.path.exists(os.path.join(folder, ARTIFACT_FILES[source]))
+    }
+    if acquired_at is None and paths:
+        acquired_at = datetime.datetime.fromtimestamp(max(os.path.getmtime(p) for p in paths.values()), tz)
+    acquired_at = acquired_at or datetime.datetime.now(tz)
+    if acquired_at.tzinfo is not None:
+        acquired_at = acquired_at.astimezone(tz or datetime.timezone.utc).replace(tzinfo=None)
+
+    counts = {}
+    for source, path in paths.items():
+        artifact = os.path.abspath(path)
+        try:
+            if source == "logcat":
+                events = logcat_events(path, acquired_at, tz, artifact)
+            elif source == "alexa":
+                with open(path, "r", encoding="utf-8") as f:
+                    events = alexa_events(json.load(f), tz, artifact)
+            else:
+                adapter = {"bluetooth": bluetooth_events, "wifi": wifi_events, "location": location_events}[source]
+                events = adapter(_read_text(path), acquired_at, tz, artifact)
+            counts[source] = store.append(events, artifact=artifact)
+        except Exception as e:
+            logger.exception("Could not ingest %s: %s", path, e)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the cross-artifact timeline.")
+    parser.add_argument("--db", default=TIMELINE_DB, help="timeline database path")
+    parser.add_argument("--log-level", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="append an acquisition folder's artifacts")
+    ingest.add_argument("folders", nargs="+")
+    ingest.add_argument("--source", action="append", choices=SOURCES, help="only these sources")
+    query = commands.add_parser("query", help="print events as NDJSON")
+    query.add_argument("--since")
+    query.add_argument("--until")
+    query.add_argument("--source", action="append", choices=SOURCES)
+    query.add_argument("--type", action="append")
+    query.add_argument("--actor")
+    query.add_argument("--limit", type=int)
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    with TimelineStore(args.db) as store:
+        if args.command == "ingest":
+            for folder in args.folders:
+                counts = ingest_acquisition(store, folder, args.source or SOURCES)
+                print(f"{folder}: " + (", ".join(f"{s} {n}" for s, n in counts.items()) or "no artifacts"))
+        else:
+            for line in store.iter_ndjson(args.since, args.until, args.source, args.type, args.actor, args.limit):
+                print(line, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+# Time-series helpers for numeric report data (sensor axes, Wi-Fi RSSI and
+# link speeds). Everything works on float64 NumPy arrays: `t` is a time axis
+# in seconds, `v` the sample values. Series of millions of points are
+# reduced to one summary row each and an LTTB-downsampled line for charts.
+
+SUMMARY_COLUMNS = [
+    "Series", "Samples", "Start", "End", "Min", "Max", "Mean", "Std", "P5", "Median", "P95",
+    "Median Interval (s)", "Gaps", "Longest Gap (s)", "Rate Changes",
+]
+
+
+def as_series(t, v):
+    """float64 (t, v) sorted by time, without rows where either is missing."""
+    t = np.asarray(t, dtype="float64")
+    v = np.asarray(v, dtype="float64")
+    keep = np.isfinite(t) & np.isfinite(v)
+    t, v = t[keep], v[keep]
+    if t.size > 1 and np.any(t[1:] < t[:-1]):
+        order = np.argsort(t, kind="stable")
+        t, v = t[order], v[order]
+    return t, v
+
+
+def median_interval(t):
+    """Typical sampling interval: median of the positive time steps (NaN if unknown)."""
+    dt = np.diff(t)
+    dt = dt[dt > 0]
+    return float(np.median(dt)) if dt.size else np.nan
+
+
+def find_gaps(t, gap_factor=5.0, min_gap_s=0.0):
+    """
+    Returns (gap_starts, gap_ends) where consecutive samples are further apart
+    than `gap_factor` times the median interval (and at least `min_gap_s`).
+    """
+    interval = median_interval(t)
+    if np.isnan(interval):
+        return np.empty(0), np.empty(0)
+    idx = np.flatnonzero(np.diff(t) > max(gap_factor * interval, min_gap_s))
+    return t[idx], t[idx + 1]
+
+
+def rate_changes(t, window=16, ratio=2.0):
+    """
+    Detects sampling-rate changes (e.g. a sensor switching from 50 Hz to 5 Hz).
+    Time steps are grouped in blocks of `window`; a change is reported where
+    the median step of one block differs from the previous one by at least
+    `ratio`. Returns (change_times, old_interval, new_interval) arrays.
+    """
+    dt = np.diff(t)
+    n_blocks = dt.size // window
+    if n_blocks < 2:
+        return np.empty(0), np.empty(0), np.empty(0)
+    blocks = np.median(dt[:n_blocks * window].reshape(n_blocks, window), axis=1)
+    prev, cur = blocks[:-1], blocks[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = cur / prev
+    idx = np.flatnonzero((r >= ratio) | (r <= 1.0 / ratio))
+    return t[(idx + 1) * window], prev[idx], cur[idx]
+
+
+def lttb(t, v, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling to `n_out` points.
+    Keeps the first and last samples and, per bucket, the sample forming the
+    largest triangle with the previously kept point and the next bucket's
+    mean, so peaks and drops survive. Cost is O(len(t)).
+    """
+    n = t.size
+    if n_out >= n or n_out < 3:
+        return t, v
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo = edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < edges.size else n
+        avg_t = t[next_lo:next_hi].mean()
+        avg_v = v[next_lo:next_hi].mean()
+        area = np.abs((t[a] - avg_t) * (v[lo:hi] - v[a]) - (t[a] - t[lo:hi]) * (avg_v - v[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return t[keep], v[keep]
+
+
+def summarize_series(name, t, v, gap_factor=5.0, min_gap_s=0.0):
+    """One SUMMARY_COLUMNS row (dict) for a series; `t`/`v` as returned by as_series."""
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row.update({"Series": name, "Samples": int(v.size), "Gaps": 0, "Rate Changes": 0})
+    if v.size == 0:
+        return row
+    p5, median, p95 = np.percentile(v, [5, 50, 95])
+    gap_starts, gap_ends = find_gaps(t, gap_factor, min_gap_s)
+    row.update({
+        "Start": float(t[0]), "End": float(t[-1]),
+        "Min": float(v.min()), "Max": float(v.max()),
+        "Mean": float(v.mean()), "Std": float(v.std()),
+        "P5": float(p5), "Median": float(median), "P95": float(p95),
+        "Median Interval (s)": median_interval(t),
+        "Gaps": int(gap_starts.size),
+        "Longest Gap (s)": float((gap_ends - gap_starts).max()) if gap_starts.size else None,
+        "Rate Changes": int(rate_changes(t)[0].size),
+    })
+    return row
+
+
+def summarize_frame(t, df, columns, prefix="", max_points=1000, gap_factor=5.0, min_gap_s=0.0):
+    """
+    Summarises the numeric `columns` of `df` against time axis `t`.
+    Returns (summary_df, lines) where lines maps each column to its
+    LTTB-downsampled (t, v) arrays of at most `max_points` points.
+    """
+    rows = []
+    lines = {}
+    for col in columns:
+        if col not in df:
+            continue
+        ct, cv = as_series(t, pd.to_numeric(df[col], errors="coerce"))
+        rows.append(summarize_series(f"{prefix}{col}", ct, cv, gap_factor, min_gap_s))
+        if cv.size:
+            lines[col] = lttb(ct, cv, max_points)
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    summary[SUMMARY_COLUMNS[1:]] = summary[SUMMARY_COLUMNS[1:]].apply(pd.to_numeric)
+    return summary.round(3), lines